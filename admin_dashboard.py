@@ -1,13 +1,35 @@
+import os
 import streamlit as st
 import pandas as pd
-from db_connection import fetch_data_as_df, execute_query
-from datetime import date, timedelta
+from db_connection import fetch_data_as_df, get_pool_stats, get_replica_stats, get_router, run_parallel
+from pagination import paginated_dataframe
+from query_cache import cached_fetch_df, get_query_cache
+from sales_rollup import rebuild_sales_rollup
+from catalog_io import REQUIRED_COLUMNS, OPTIONAL_COLUMNS, import_products
+from stocktake import normalize_counts, preview_stocktake, apply_stocktake
+from stock_movements import move_stock, set_stock_level
+from receiving import receive_purchase_order
+from ledger_archive import HOT_MONTHS, take_stock_snapshot
+from stock_history import stock_timeline
+from reorder import (DEMAND_WINDOW_DAYS, LEAD_TIME_DAYS, REVIEW_PERIOD_DAYS, SERVICE_LEVEL, build_reorder_plan,
+                     draft_purchase_orders)
+from repositories import ProductRepo, OrderRepo, InventoryRepo, PurchaseOrderRepo
+from query_stats import get_query_stats, SLOW_QUERY_MS
+from image_cache import get_thumbnail_stats
+from jobs import get_job_runner, get_job_stats
+import reports
+import time
+from functools import partial
+from datetime import date, datetime, timedelta
+
+# Seconds between page refreshes while a background job is running.
+JOB_POLL_SECONDS = 1
 
 def admin_dashboard():
     st.title("🏢 Retail Inventory Management")
     st.sidebar.header("Admin Navigation")
 
-    menu = ["📦 Inventory Overview", "➕ Product Management", "📊 Reports", "👥 Customer Management", "📦 Stock Management", "🛒 Order Management"]
+    menu = ["📦 Inventory Overview", "➕ Product Management", "📊 Reports", "👥 Customer Management", "📦 Stock Management", "🛒 Order Management", "⚡ Performance"]
     choice = st.sidebar.radio("Go to", menu)
 
     if choice == "📦 Inventory Overview":
@@ -22,58 +44,45 @@ def admin_dashboard():
         stock_management()
     elif choice == "🛒 Order Management":
         order_management()
+    elif choice == "⚡ Performance":
+        performance()
 
 def inventory_overview():
     st.subheader("📦 Inventory Overview")
     
-    # Get inventory summary
     try:
-        products = fetch_data_as_df("""
-            SELECT 
-                COUNT(*) as total_products,
-                SUM(stock_quantity) as total_stock,
-                SUM(stock_quantity * price) as total_value,
-                COUNT(CASE WHEN stock_quantity <= min_stock_level THEN 1 END) as low_stock_items,
-                COUNT(CASE WHEN stock_quantity = 0 THEN 1 END) as out_of_stock_items
-            FROM Product
-        """)
+        # The summary metrics, low stock list and recent transactions are independent; read them side by side
+        summary, low_stock, transactions = run_parallel(
+            lambda: ProductRepo.inventory_summary().first(),
+            lambda: ProductRepo.low_stock(10).to_df(),
+            lambda: fetch_data_as_df("""
+                SELECT it.transaction_date, p.name, it.transaction_type, it.quantity_change, it.notes
+                FROM Inventory_Transaction it
+                JOIN Product p ON it.product_id = p.product_id
+                ORDER BY it.transaction_date DESC
+                LIMIT 10
+            """),
+        )
         
-        if not products.empty:
+        if summary:
             col1, col2, col3, col4, col5 = st.columns(5)
             with col1:
-                st.metric("Total Products", products.iloc[0]['total_products'])
+                st.metric("Total Products", summary['total_products'])
             with col2:
-                st.metric("Total Stock Items", int(products.iloc[0]['total_stock']))
+                st.metric("Total Stock Items", int(summary['total_stock'] or 0))
             with col3:
-                st.metric("Total Value", f"${products.iloc[0]['total_value']:,.2f}")
+                st.metric("Total Value", f"${summary['total_value'] or 0:,.2f}")
             with col4:
-                st.metric("Low Stock Items", products.iloc[0]['low_stock_items'])
+                st.metric("Low Stock Items", summary['low_stock_items'])
             with col5:
-                st.metric("Out of Stock", products.iloc[0]['out_of_stock_items'])
+                st.metric("Out of Stock", summary['out_of_stock_items'])
         
         # Low stock alerts
-        low_stock = fetch_data_as_df("""
-            SELECT p.product_id, p.name, p.stock_quantity, p.min_stock_level, c.category_name
-            FROM Product p
-            JOIN Category c ON p.category_id = c.category_id
-            WHERE p.stock_quantity <= p.min_stock_level
-            ORDER BY p.stock_quantity ASC
-            LIMIT 10
-        """)
-        
         if not low_stock.empty:
             st.warning("⚠️ Low Stock Alert - Items Need Reordering")
             st.dataframe(low_stock, use_container_width=True)
         
         # Recent inventory transactions
-        transactions = fetch_data_as_df("""
-            SELECT it.transaction_date, p.name, it.transaction_type, it.quantity_change, it.notes
-            FROM Inventory_Transaction it
-            JOIN Product p ON it.product_id = p.product_id
-            ORDER BY it.transaction_date DESC
-            LIMIT 10
-        """)
-        
         if not transactions.empty:
             st.subheader("📋 Recent Inventory Transactions")
             st.dataframe(transactions, use_container_width=True)
@@ -84,7 +93,7 @@ def inventory_overview():
 def product_management():
     st.subheader("➕ Product Management")
     
-    tab1, tab2, tab3 = st.tabs(["Add Product", "View Products", "Update Product"])
+    tab1, tab2, tab3, tab4 = st.tabs(["Add Product", "View Products", "Update Product", "Bulk Import / Export"])
     
     with tab1:
         with st.form("add_product_form"):
@@ -99,7 +108,7 @@ def product_management():
             supplier = st.text_input("Supplier")
             cost_price = st.number_input("Cost Price", min_value=0.0, format="%.2f")
             
-            categories = fetch_data_as_df("SELECT category_id, category_name FROM Category")
+            categories = cached_fetch_df("SELECT category_id, category_name FROM Category ORDER BY category_name", tables=("Category",))
             if not categories.empty:
                 category_map = dict(zip(categories['category_name'], categories['category_id']))
                 selected_category_name = st.selectbox("Category", list(category_map.keys()))
@@ -112,38 +121,32 @@ def product_management():
             
             if submit_button:
                 if name and price is not None and stock_quantity is not None and category_id:
-                    success = execute_query("""
-                        INSERT INTO Product (name, description, price, stock_quantity, min_stock_level, 
-                                           category_id, sku, supplier, cost_price)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    """, (name, description, price, stock_quantity, min_stock_level, category_id, sku, supplier, cost_price))
+                    success, result = ProductRepo.create(name, description, price, stock_quantity, min_stock_level,
+                                                         category_id, sku, supplier, cost_price)
                     
-                    if success is not None:
+                    if success:
                         st.success("Product added successfully!")
                         st.rerun()
                     else:
-                        st.error("Failed to add product.")
+                        st.error(f"Failed to add product. {result}")
                 else:
                     st.error("Please fill in all required fields.")
     
     with tab2:
         st.write("View All Products")
-        products = fetch_data_as_df("""
+        products = paginated_dataframe("admin_products", """
             SELECT p.product_id, p.name, p.description, p.price, p.stock_quantity, 
                    p.min_stock_level, p.sku, p.supplier, c.category_name, p.status
             FROM Product p
             LEFT JOIN Category c ON p.category_id = c.category_id
-            ORDER BY p.product_id DESC
-        """)
+        """, [("p.product_id", "product_id")], "Product")
         
-        if not products.empty:
-            st.dataframe(products, use_container_width=True)
-        else:
+        if products.empty:
             st.info("No products found.")
     
     with tab3:
         st.write("Update Product")
-        products = fetch_data_as_df("SELECT product_id, name FROM Product ORDER BY name")
+        products = cached_fetch_df("SELECT product_id, name FROM Product ORDER BY name", tables=("Product",))
         
         if not products.empty:
             product_map = dict(zip(products['name'], products['product_id']))
@@ -151,12 +154,9 @@ def product_management():
             selected_product_id = product_map.get(selected_product_name)
             
             if selected_product_id:
-                current_product = fetch_data_as_df("""
-                    SELECT * FROM Product WHERE product_id = %s
-                """, (selected_product_id,))
+                product = ProductRepo.get(selected_product_id)
                 
-                if not current_product.empty:
-                    product = current_product.iloc[0]
+                if product:
                     
                     with st.form("update_product_form"):
                         new_name = st.text_input("Product Name", value=product['name'])
@@ -165,7 +165,7 @@ def product_management():
                         new_stock = st.number_input("Stock Quantity", min_value=0, value=int(product['stock_quantity']))
                         new_min_stock = st.number_input("Min Stock Level", min_value=0, value=int(product['min_stock_level']))
                         
-                        categories = fetch_data_as_df("SELECT category_id, category_name FROM Category")
+                        categories = cached_fetch_df("SELECT category_id, category_name FROM Category ORDER BY category_name", tables=("Category",))
                         if not categories.empty:
                             category_map = dict(zip(categories['category_name'], categories['category_id']))
                             current_category = categories[categories['category_id'] == product['category_id']]['category_name'].iloc[0] if product['category_id'] else ""
@@ -175,36 +175,86 @@ def product_management():
                         update_button = st.form_submit_button("Update Product")
                         
                         if update_button:
-                            success = execute_query("""
-                                UPDATE Product SET name=%s, description=%s, price=%s, stock_quantity=%s, 
-                                                   min_stock_level=%s, category_id=%s
-                                WHERE product_id=%s
-                            """, (new_name, new_description, new_price, new_stock, new_min_stock, new_category_id, selected_product_id))
+                            success, message = ProductRepo.update_details(selected_product_id, new_name, new_description,
+                                                                          new_price, new_min_stock, new_category_id)
+                            
+                            # Stock goes through the ledger so the change is recorded and race-free,
+                            # and only once the details were saved, so a failed update changes nothing
+                            if success and new_stock != int(product['stock_quantity']):
+                                success, result = set_stock_level(selected_product_id, int(new_stock),
+                                                                  "Set from product form", st.session_state.get('user_id'))
+                                if not success:
+                                    message = f"Details saved, but stock was not changed: {result}"
                             
-                            if success is not None:
-                                st.success("Product updated successfully!")
+                            if success:
+                                st.success(message)
                                 st.rerun()
                             else:
-                                st.error("Failed to update product.")
+                                st.error(message)
         else:
             st.info("No products available to update.")
+    
+    with tab4:
+        bulk_import_export()
+
+def bulk_import_export():
+    st.write("Import Supplier Catalogue")
+    st.caption(f"CSV or Parquet. Required columns: {', '.join(REQUIRED_COLUMNS)}. "
+               f"Optional: {', '.join(OPTIONAL_COLUMNS)}. Existing SKUs are updated; "
+               "stock_quantity only applies to new SKUs.")
+    
+    uploaded_file = st.file_uploader("Catalogue file", type=["csv", "parquet"])
+    chunk_size = st.number_input("Rows per batch", min_value=500, max_value=50000, value=5000, step=500)
+    
+    if uploaded_file and st.button("Import Products"):
+        progress = st.empty()
+        try:
+            result = import_products(uploaded_file, uploaded_file.name, int(chunk_size),
+                                     on_progress=lambda rows: progress.caption(f"Processed {rows:,} rows..."))
+        except ValueError as e:
+            st.error(str(e))
+        else:
+            st.success(f"Imported {result['imported']:,} of {result['rows']:,} rows.")
+            if not result['errors'].empty:
+                st.warning(f"{len(result['errors']):,} rows were rejected:")
+                st.dataframe(result['errors'], use_container_width=True)
+    
+    st.markdown("---")
+    st.write("Export Catalogue")
+    export_format = st.radio("Format", ["csv", "parquet"], horizontal=True)
+    runner = get_job_runner()
+    if st.button("Prepare Export"):
+        job = runner.submit("catalog_export", {"format": export_format},
+                            partial(reports.catalog_export, get_router(), export_format),
+                            label="Catalogue export", suffix=f".{export_format}", force=True)
+        st.session_state['export_job'] = job.job_id
+    
+    job = session_job('export_job')
+    path = job_result(job) if job else None
+    if path is not None:
+        with open(path, "rb") as f:
+            st.download_button("Download", f.read(), file_name=f"products{os.path.splitext(path)[1]}")
+    if job:
+        poll_jobs([job])
 
 def stock_management():
     st.subheader("📦 Stock Management")
     
-    tab1, tab2 = st.tabs(["Update Stock", "Stock Transactions"])
+    tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["Update Stock", "Stock Transactions", "Stocktake",
+                                                  "Reorder Planning", "Receive Purchase Order", "Stock History"])
     
     with tab1:
         st.write("Update Product Stock")
         
-        products = fetch_data_as_df("SELECT product_id, name, stock_quantity FROM Product ORDER BY name")
+        products = cached_fetch_df("SELECT product_id, name FROM Product ORDER BY name", tables=("Product",))
         if not products.empty:
             product_map = dict(zip(products['name'], products['product_id']))
             selected_product_name = st.selectbox("Select Product", list(product_map.keys()))
             selected_product_id = product_map.get(selected_product_name)
             
             if selected_product_id:
-                current_stock = products[products['product_id'] == selected_product_id]['stock_quantity'].iloc[0]
+                # Stock changes constantly, so read it fresh rather than from the cache
+                current_stock = int(InventoryRepo.current_stock(selected_product_id) or 0)
                 st.info(f"Current Stock: {current_stock}")
                 
                 with st.form("update_stock_form"):
@@ -227,41 +277,276 @@ def stock_management():
                         db_transaction_type = transaction_map.get(transaction_type, "adjustment")
                         actual_change = quantity_change if db_transaction_type in ["purchase", "return"] else -quantity_change
                         
-                        success = execute_query("""
-                            UPDATE Product SET stock_quantity = stock_quantity + %s 
-                            WHERE product_id = %s
-                        """, (actual_change, selected_product_id))
+                        success, result = move_stock(selected_product_id, actual_change, db_transaction_type,
+                                                     notes, st.session_state.get('user_id'))
                         
-                        if success is not None:
-                            # Record inventory transaction
-                            execute_query("""
-                                INSERT INTO Inventory_Transaction 
-                                (product_id, transaction_type, quantity_change, reference_type, notes, stock_before, stock_after)
-                                VALUES (%s, %s, %s, 'manual', %s, %s, %s)
-                            """, (selected_product_id, db_transaction_type, actual_change, notes, current_stock, current_stock + actual_change))
-                            
-                            st.success(f"Stock updated successfully! New stock: {current_stock + actual_change}")
+                        if success:
+                            st.success(f"Stock updated successfully! New stock: {result}")
                             st.rerun()
                         else:
-                            st.error("Failed to update stock.")
+                            st.error(result)
         else:
             st.info("No products found.")
     
     with tab2:
         st.write("Recent Stock Transactions")
-        transactions = fetch_data_as_df("""
-            SELECT it.transaction_date, p.name, it.transaction_type, it.quantity_change, 
-                   it.stock_before, it.stock_after, it.notes
-            FROM Inventory_Transaction it
-            JOIN Product p ON it.product_id = p.product_id
-            ORDER BY it.transaction_date DESC
-            LIMIT 50
-        """)
+        transactions = InventoryRepo.recent_transactions(50).to_df()
         
         if not transactions.empty:
             st.dataframe(transactions, use_container_width=True)
         else:
             st.info("No transactions found.")
+        
+        with st.expander("Ledger maintenance"):
+            st.caption(f"Daily stock snapshots let past stock levels be rebuilt without replaying the whole ledger. "
+                       f"Archiving moves ledger months older than {HOT_MONTHS} months to Parquet files, "
+                       f"after snapshotting the day before the cutoff if needed, then thins old snapshots.")
+            snapshot_day = st.date_input("Snapshot day", date.today() - timedelta(days=1),
+                                         max_value=date.today() - timedelta(days=1))
+            col1, col2 = st.columns(2)
+            with col1:
+                if st.button("Take stock snapshot"):
+                    success, message = take_stock_snapshot(snapshot_day)
+                    if success:
+                        st.success(message)
+                    else:
+                        st.error(message)
+            with col2:
+                if st.button("Archive cold months"):
+                    job = get_job_runner().submit("ledger_archive", {}, reports.ledger_archive,
+                                                  label="Ledger archiving", force=True)
+                    st.session_state['ledger_archive_job'] = job.job_id
+            job = session_job('ledger_archive_job')
+            if job:
+                steps = job_result(job)
+                if steps is not None:
+                    for message in steps["message"]:
+                        st.success(message)
+                poll_jobs([job])
+    
+    with tab3:
+        stocktake()
+    
+    with tab4:
+        reorder_planning()
+    
+    with tab5:
+        receive_purchase_order_form()
+    
+    with tab6:
+        stock_history_view()
+
+def stock_history_view():
+    st.write("Stock at a Point in Time")
+    st.caption("Rebuilt by replaying the ledger backwards from the nearest later daily snapshot, "
+               "or from current stock.")
+    
+    runner = get_job_runner()
+    col1, col2 = st.columns(2)
+    with col1:
+        day = st.date_input("Date", date.today() - timedelta(days=1), max_value=date.today(), key="history_date")
+    with col2:
+        at = st.time_input("Time", datetime.max.time().replace(microsecond=0), key="history_time")
+    moment = datetime.combine(day, at)
+    if st.button("Show stock at this time"):
+        job = runner.submit("stock_at", {"moment": moment.isoformat()},
+                            partial(reports.stock_snapshot_at, get_router(), moment),
+                            label=f"Stock at {moment:%d %b %Y %H:%M}")
+        st.session_state['stock_at_job'] = job.job_id
+    
+    jobs = []
+    job = session_job('stock_at_job')
+    if job:
+        jobs.append(job)
+        stock = job_result(job)
+        if stock is not None:
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Products", f"{len(stock):,}")
+            col2.metric("Units in Stock", f"{int(stock['stock_quantity'].sum()):,}")
+            col3.metric("Out of Stock", f"{int((stock['stock_quantity'] <= 0).sum()):,}")
+            st.dataframe(stock, use_container_width=True, hide_index=True)
+            st.download_button("Download CSV", stock.to_csv(index=False),
+                               file_name=f"stock_{job.params['moment'][:16].replace(':', '')}.csv")
+    
+    st.divider()
+    st.write("Stock Timeline")
+    products = cached_fetch_df("SELECT product_id, name FROM Product ORDER BY name", tables=("Product",))
+    if not products.empty:
+        product_map = dict(zip(products['name'], products['product_id']))
+        selected = st.selectbox("Product", list(product_map.keys()), key="history_product")
+        since = st.date_input("Since", date.today() - timedelta(days=90), key="history_since")
+        timeline = stock_timeline([product_map[selected]], since)
+        if timeline.empty:
+            st.info("No stock movements for this product in the period.")
+        else:
+            st.line_chart(timeline.set_index("transaction_date")["stock_after"])
+            st.dataframe(timeline, use_container_width=True, hide_index=True)
+    
+    st.divider()
+    st.write("Ledger Consistency")
+    st.caption("Flags ledger rows whose stock_after isn't stock_before plus the change, rows that don't "
+               "continue from the product's previous row, and products whose last row disagrees with current stock.")
+    if st.button("Check ledger"):
+        job = runner.submit("ledger_check", {}, partial(reports.ledger_consistency, get_router()),
+                            label="Ledger check", force=True)
+        st.session_state['ledger_check_job'] = job.job_id
+    
+    job = session_job('ledger_check_job')
+    if job:
+        jobs.append(job)
+        flagged = job_result(job)
+        if flagged is not None:
+            counts = flagged.attrs.get("counts") or {"rows": None, **flagged["problem"].value_counts().to_dict()}
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("Rows Checked", f"{counts['rows']:,}" if counts.get("rows") is not None else "—")
+            col2.metric("Arithmetic Errors", f"{counts.get('arithmetic', 0):,}")
+            col3.metric("Chain Breaks", f"{counts.get('chain', 0):,}")
+            col4.metric("Stock Drift", f"{counts.get('drift', 0):,}")
+            if flagged.empty:
+                st.success("The ledger is consistent.")
+            else:
+                st.dataframe(flagged, use_container_width=True, hide_index=True)
+    poll_jobs(jobs)
+
+def receive_purchase_order_form():
+    st.write("Receive Purchase Order")
+    
+    pending = PurchaseOrderRepo.pending().to_df()
+    if pending.empty:
+        st.info("No pending purchase orders.")
+        return
+    
+    labels = {
+        row.purchase_order_id: f"PO #{row.purchase_order_id} · {row.supplier} · {row.line_count} lines · "
+                               f"{int(row.outstanding_units or 0):,} units outstanding"
+        for row in pending.itertuples()
+    }
+    purchase_order_id = st.selectbox("Purchase Order", list(labels), format_func=labels.get)
+    
+    items = PurchaseOrderRepo.items(purchase_order_id).to_df()
+    items['outstanding'] = items['quantity'] - items['received_quantity']
+    # Default to receiving everything outstanding; edit the column for a partial delivery
+    items['receive_now'] = items['outstanding']
+    edited = st.data_editor(
+        items, hide_index=True, use_container_width=True, key=f"receive_{purchase_order_id}",
+        disabled=[c for c in items.columns if c != 'receive_now'],
+        column_config={"receive_now": st.column_config.NumberColumn("Receive now", min_value=0, step=1)},
+    )
+    notes = st.text_input("Delivery notes", key="receive_notes")
+    
+    if st.button("Receive Delivery"):
+        quantities = dict(zip(edited['purchase_order_item_id'], edited['receive_now'].fillna(0)))
+        success, message = receive_purchase_order(purchase_order_id, quantities, notes or None,
+                                                  st.session_state.get('user_id'))
+        if success:
+            st.success(message)
+        else:
+            st.error(message)
+
+def reorder_planning():
+    st.write("Reorder Planning")
+    st.caption("Reorder points come from each product's sales history: expected demand over the lead time "
+               "plus safety stock for the service level, never below its minimum stock level. Stock on "
+               "pending purchase orders counts as available. Windows reaching past the online ledger also "
+               "read the archived months, which takes longer.")
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        window_days = st.number_input("Demand window (days)", min_value=7, max_value=730, value=DEMAND_WINDOW_DAYS)
+    with col2:
+        lead_time_days = st.number_input("Lead time (days)", min_value=1, max_value=180, value=LEAD_TIME_DAYS)
+    with col3:
+        review_days = st.number_input("Order cover (days)", min_value=1, max_value=180, value=REVIEW_PERIOD_DAYS)
+    with col4:
+        service_level = st.selectbox("Service level", [0.90, 0.95, 0.98, 0.99],
+                                     index=[0.90, 0.95, 0.98, 0.99].index(SERVICE_LEVEL), format_func="{:.0%}".format)
+    
+    if st.button("Compute Reorder Plan"):
+        with st.spinner("Computing reorder points..."):
+            plan = build_reorder_plan(int(window_days), int(lead_time_days), int(review_days), service_level)
+        st.session_state['reorder_plan'] = (plan, int(lead_time_days))
+    
+    saved = st.session_state.get('reorder_plan')
+    if not saved:
+        return
+    plan, planned_lead_time = saved
+    to_order = plan[plan['order_quantity'] > 0].sort_values('days_of_cover')
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Products Analysed", f"{len(plan):,}")
+    with col2:
+        st.metric("Need Reordering", f"{len(to_order):,}")
+    with col3:
+        st.metric("Order Value", f"${to_order['order_value'].sum():,.2f}")
+    
+    if to_order.empty:
+        st.success("Every product is above its reorder point.")
+        return
+    st.dataframe(to_order[['sku', 'name', 'supplier', 'stock_quantity', 'on_order', 'daily_demand', 'days_of_cover',
+                           'safety_stock', 'reorder_point', 'order_quantity', 'order_value']],
+                 use_container_width=True)
+    
+    if st.button("Draft Purchase Orders"):
+        success, message = draft_purchase_orders(plan, planned_lead_time, st.session_state.get('user_id'))
+        if success:
+            st.session_state.pop('reorder_plan', None)
+            st.success(message)
+        else:
+            st.error(message)
+
+def stocktake():
+    st.write("Stocktake Reconciliation")
+    st.caption("Enter counted quantities; stock is set to the count and the difference is logged as an adjustment.")
+    
+    source = st.radio("Counts from", ["Upload count sheet", "Edit grid"], horizontal=True)
+    counts = None
+    if source == "Upload count sheet":
+        count_file = st.file_uploader("CSV with sku and counted_quantity columns", type=["csv"])
+        if count_file:
+            counts = pd.read_csv(count_file, dtype={"sku": str})
+    else:
+        categories = cached_fetch_df("SELECT category_id, category_name FROM Category ORDER BY category_name", tables=("Category",))
+        if categories.empty:
+            st.info("No categories found.")
+            return
+        category_map = dict(zip(categories['category_name'], categories['category_id']))
+        category_name = st.selectbox("Category to count", list(category_map.keys()), key="stocktake_category")
+        grid = fetch_data_as_df("""
+            SELECT sku, name, stock_quantity AS system_quantity, stock_quantity AS counted_quantity
+            FROM Product
+            WHERE category_id = %s AND sku IS NOT NULL
+            ORDER BY name
+        """, (category_map[category_name],))
+        edited = st.data_editor(grid, disabled=["sku", "name", "system_quantity"],
+                                use_container_width=True, key=f"stocktake_grid_{category_name}")
+        counts = edited[edited['counted_quantity'] != edited['system_quantity']]
+    
+    if counts is None:
+        return
+    counts, errors = normalize_counts(counts)
+    for error in errors[:20]:
+        st.error(error)
+    if counts.empty:
+        st.info("No counts to apply.")
+        return
+    
+    success, diff, unknown = preview_stocktake(counts)
+    if not success:
+        st.error(diff)
+        return
+    if unknown:
+        st.warning(f"{len(unknown):,} SKUs not found and will be skipped: {', '.join(unknown[:20])}")
+    st.write(f"{len(diff):,} of {len(counts):,} counted SKUs differ from system stock")
+    st.dataframe(diff, use_container_width=True)
+    
+    notes = st.text_input("Notes", key="stocktake_notes")
+    if st.button("Apply Stocktake", type="primary", disabled=diff.empty):
+        success, message, _ = apply_stocktake(counts, notes, st.session_state.get('user_id'))
+        if success:
+            st.success(message)
+        else:
+            st.error(message)
 
 def sales_reports():
     st.subheader("📊 Sales Reports")
@@ -273,14 +558,41 @@ def sales_reports():
     with col2:
         end_date = st.date_input("End Date", date.today())
     
-    tab1, tab2, tab3 = st.tabs(["Sales Summary", "Top Products", "Category Performance"])
+    with st.expander("Rollup maintenance"):
+        st.caption("Reports read the daily sales rollup, which is kept current automatically. "
+                   "Rebuild it for the selected dates after bulk edits to Orders.")
+        if st.button("Rebuild rollup for selected dates"):
+            success, message = rebuild_sales_rollup(start_date, end_date)
+            if success:
+                get_job_runner().discard_results("sales_summary", "top_products", "category_sales")
+                st.success(message)
+            else:
+                st.error(message)
+    
+    # Reports run as background jobs so a long range never freezes the page;
+    # a report already computed for these dates is read back from disk.
+    runner = get_job_runner()
+    router = get_router()
+    force = st.button("Recompute reports")
+    jobs = [
+        runner.submit("sales_summary", {"start": start_date, "end": end_date},
+                      partial(reports.sales_summary, router, start_date, end_date),
+                      label="Sales summary", force=force),
+        runner.submit("top_products", {"limit": 10}, partial(reports.top_products, router, 10),
+                      label="Top products", force=force),
+        runner.submit("category_sales", {"start": start_date, "end": end_date},
+                      partial(reports.category_sales, router, start_date, end_date),
+                      label="Category performance", force=force),
+        runner.submit("category_stock_value", {}, partial(reports.category_stock_value, router),
+                      label="Stock value by category", force=force),
+    ]
+    summary_job, top_job, category_job, stock_value_job = jobs
+    
+    tab1, tab2, tab3, tab4 = st.tabs(["Sales Summary", "Top Products", "Category Performance", "Stock Value"])
     
     with tab1:
-        try:
-            sales_data = fetch_data_as_df("""
-                CALL GetSalesReport(%s, %s)
-            """, (start_date, end_date))
-            
+        sales_data = job_result(summary_job)
+        if sales_data is not None:
             if not sales_data.empty:
                 st.dataframe(sales_data, use_container_width=True)
                 
@@ -298,86 +610,160 @@ def sales_reports():
                     st.metric("Avg Order Value", f"${avg_order_value:.2f}")
             else:
                 st.info("No sales data found for the selected period.")
-        except Exception as e:
-            st.error(f"Error loading sales data: {e}")
     
     with tab2:
-        try:
-            top_products = fetch_data_as_df("CALL GetTopSellingProducts(10)")
-            
+        top_products = job_result(top_job)
+        if top_products is not None:
             if not top_products.empty:
                 st.dataframe(top_products, use_container_width=True)
             else:
                 st.info("No product sales data found.")
-        except Exception as e:
-            st.error(f"Error loading top products: {e}")
     
     with tab3:
-        try:
-            category_sales = fetch_data_as_df("""
-                SELECT 
-                    c.category_name,
-                    COUNT(DISTINCT o.order_id) as orders,
-                    SUM(oi.quantity) as items_sold,
-                    SUM(oi.subtotal) as revenue
-                FROM Category c
-                JOIN Product p ON c.category_id = p.category_id
-                JOIN Order_Item oi ON p.product_id = oi.product_id
-                JOIN Orders o ON oi.order_id = o.order_id
-                WHERE DATE(o.order_date) BETWEEN %s AND %s
-                  AND o.status != 'cancelled'
-                GROUP BY c.category_id, c.category_name
-                ORDER BY revenue DESC
-            """, (start_date, end_date))
-            
+        category_sales = job_result(category_job)
+        if category_sales is not None:
             if not category_sales.empty:
                 st.dataframe(category_sales, use_container_width=True)
             else:
                 st.info("No category sales data found.")
-        except Exception as e:
-            st.error(f"Error loading category data: {e}")
+    
+    with tab4:
+        stock_value = job_result(stock_value_job)
+        if stock_value is not None:
+            if not stock_value.empty:
+                st.dataframe(stock_value, use_container_width=True)
+                st.metric("Total Stock Value", f"${stock_value['stock_value'].sum():,.2f}")
+            else:
+                st.info("No categories found.")
+    
+    poll_jobs(jobs)
+
+def session_job(key):
+    """The background job whose id the session keeps under ``key``, or None.
+
+    A job the runner has forgotten (its result was pruned after RESULT_TTL,
+    or the app restarted) is reported once and dropped from the session.
+    """
+    job_id = st.session_state.get(key)
+    if job_id is None:
+        return None
+    job = get_job_runner().get(job_id)
+    if job is None:
+        st.info("The last result has expired; run it again.")
+        del st.session_state[key]
+    return job
+
+def job_ready(job):
+    """Shows a background job's progress; returns True once its result can be read."""
+    if job.status == "failed":
+        st.error(f"{job.label} failed: {job.error}")
+        return False
+    if job.status == "expired":
+        st.info(f"{job.label}: this result has expired; run it again.")
+        return False
+    if job.active:
+        st.progress(job.progress, text=f"{job.label}: {job.message}")
+        return False
+    source = "cached result" if job.cached else f"computed in {job.elapsed():.1f}s"
+    st.caption(f"{job.label}: {source}, {datetime.fromtimestamp(job.finished_at):%H:%M:%S}")
+    return True
+
+def job_result(job):
+    """Shows a background job's progress; returns its result once ready, else None."""
+    if not job_ready(job):
+        return None
+    result = job.result()
+    if result is None:
+        # Pruned between the check and the read
+        st.info(f"{job.label}: this result has expired; run it again.")
+    return result
+
+def poll_jobs(jobs):
+    """Reruns the page shortly while any of the jobs is still running."""
+    if any(job.active for job in jobs):
+        time.sleep(JOB_POLL_SECONDS)
+        st.rerun()
 
 def customer_management():
     st.subheader("👥 Customer Management")
     
-    customers = fetch_data_as_df("""
+    customers = paginated_dataframe("admin_customers", """
         SELECT customer_id, name, email, phone, city, state, created_at
         FROM Customer
-        ORDER BY created_at DESC
-    """)
+    """, [("created_at", "created_at"), ("customer_id", "customer_id")], "Customer")
     
-    if not customers.empty:
-        st.dataframe(customers, use_container_width=True)
-    else:
+    if customers.empty:
         st.info("No customers found.")
 
 def order_management():
     st.subheader("🛒 Order Management")
     
-    orders = fetch_data_as_df("""
+    orders = paginated_dataframe("admin_orders", """
         SELECT o.order_id, c.name as customer_name, o.order_date, o.total_amount, 
                o.status, o.payment_status, o.payment_method
         FROM Orders o
         JOIN Customer c ON o.customer_id = c.customer_id
-        ORDER BY o.order_date DESC
-    """)
+    """, [("o.order_date", "order_date"), ("o.order_id", "order_id")], "Orders")
     
     if not orders.empty:
-        st.dataframe(orders, use_container_width=True)
-        
         # Order details
         selected_order_id = st.selectbox("Select Order to View Details", orders['order_id'])
         
         if selected_order_id:
-            order_items = fetch_data_as_df("""
-                SELECT oi.order_item_id, p.name, oi.quantity, oi.price_at_purchase, oi.subtotal
-                FROM Order_Item oi
-                JOIN Product p ON oi.product_id = p.product_id
-                WHERE oi.order_id = %s
-            """, (selected_order_id,))
+            order_items = OrderRepo.items(selected_order_id).to_df()
             
             if not order_items.empty:
                 st.write("Order Items:")
                 st.dataframe(order_items, use_container_width=True)
     else:
         st.info("No orders found.")
+
+def performance():
+    st.subheader("⚡ Performance")
+    st.caption("Statistics cover this server process since it started or was last reset.")
+    
+    stats = get_query_stats()
+    sort_labels = {"Total time": "total_ms", "p95 latency": "p95_ms", "Calls": "calls", "Rows returned": "avg_rows"}
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        sort_label = st.selectbox("Rank statements by", list(sort_labels))
+    with col2:
+        if st.button("Reset statistics"):
+            stats.reset()
+            st.rerun()
+    
+    top = pd.DataFrame(stats.top_statements(order_by=sort_labels[sort_label]))
+    if top.empty:
+        st.info("No queries recorded yet.")
+    else:
+        st.dataframe(top, use_container_width=True)
+        
+        statement = st.selectbox("Latency histogram for", top['statement'])
+        histogram = pd.DataFrame(stats.histogram(statement), columns=["latency", "calls"])
+        st.bar_chart(histogram.set_index("latency"))
+    
+    st.write(f"**Slow queries** (over {SLOW_QUERY_MS} ms)")
+    slow = stats.slow_queries()
+    if not slow:
+        st.info("No slow queries recorded.")
+    for entry in slow:
+        with st.expander(f"{entry['at']} · {entry['duration_ms']:.0f} ms · {entry['call_site']}"):
+            st.code(entry['statement'], language="sql")
+            st.write(f"Rows: {entry['rows']}")
+            if entry['plan']:
+                st.dataframe(pd.DataFrame(entry['plan']), use_container_width=True)
+    
+    st.markdown("---")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.write("**Connection pool**")
+        st.json(get_pool_stats())
+        st.write("**Query cache**")
+        st.json(get_query_cache().stats())
+    with col2:
+        st.write("**Read replicas**")
+        st.json(get_replica_stats())
+        st.write("**Thumbnail cache**")
+        st.json(get_thumbnail_stats())
+        st.write("**Background jobs**")
+        st.json(get_job_stats())
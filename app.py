@@ -4,33 +4,34 @@ from customer_dashboard import customer_dashboard
 from admin_dashboard import admin_dashboard
 from db_connection import get_connection # To ensure connection is attempted on startup
 
-# Set page configuration
-st.set_page_config(
-    page_title="Retail Inventory Management",
-    page_icon="📦",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
+# Startup runs only when Streamlit executes this script as __main__, not when the
+# password hashing workers re-import it as __mp_main__ (see passwords.py).
+def init_app():
+    # Set page configuration
+    st.set_page_config(
+        page_title="Retail Inventory Management",
+        page_icon="📦",
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
 
+    # Initialize session state for authentication
+    if 'logged_in' not in st.session_state:
+        st.session_state['logged_in'] = False
+    if 'user_id' not in st.session_state:
+        st.session_state['user_id'] = None
+    if 'user_name' not in st.session_state:
+        st.session_state['user_name'] = None
+    if 'role' not in st.session_state:
+        st.session_state['role'] = None # 'customer' or 'admin'
 
-
-# Initialize session state for authentication
-if 'logged_in' not in st.session_state:
-    st.session_state['logged_in'] = False
-if 'user_id' not in st.session_state:
-    st.session_state['user_id'] = None
-if 'user_name' not in st.session_state:
-    st.session_state['user_name'] = None
-if 'role' not in st.session_state:
-    st.session_state['role'] = None # 'customer' or 'admin'
-
-# Attempt to connect to DB at startup (will show error if failed)
-try:
-    get_connection()
-    # st.success("Database connected successfully!") # Uncomment for debugging connection
-except Exception as e:
-    st.error(f"Failed to connect to the database. Please ensure MySQL is running and configured correctly. Error: {e}")
-    st.stop()
+    # Attempt to connect to DB at startup (will show error if failed)
+    try:
+        get_connection().close()
+        # st.success("Database connected successfully!") # Uncomment for debugging connection
+    except Exception as e:
+        st.error(f"Failed to connect to the database. Please ensure MySQL is running and configured correctly. Error: {e}")
+        st.stop()
 
 
 # Main application logic
@@ -74,4 +75,5 @@ def main():
                 st.sidebar.error("Invalid Admin credentials.")
 
 if __name__ == "__main__":
+    init_app()
     main()
\ No newline at end of file
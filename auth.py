@@ -1,11 +1,15 @@
 import streamlit as st
 from db_connection import get_connection, get_cursor
 import mysql.connector as mysql
+from cart_store import flush_cart
+from repositories import CustomerRepo
+from passwords import hash_password, verify_password
 
 def register_user(name, email, phone, password, city, state, pin, address):
     """Registers a new customer for the retail inventory system."""
     conn = None
     cursor = None
+    password = hash_password(password)
     try:
         conn = get_connection()
         cursor = conn.cursor(dictionary=True)
@@ -31,28 +35,24 @@ def register_user(name, email, phone, password, city, state, pin, address):
 
 def login_user(email, password):
     """Authenticates a user in the retail inventory system."""
-    conn = None
-    cursor = None
-    try:
-        conn = get_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT customer_id, name, password FROM Customer WHERE email = %s", (email,))
-        user = cursor.fetchone()
-        if user and password == user['password']:  # Plain text comparison
-            return True, user
-        else:
-            return False, None
-    except mysql.Error as err:
-        st.error(f"Login error: {err}")
+    # Prepared lookup: every login runs the same statement, so it is parsed once per pooled connection
+    user = CustomerRepo.login_lookup(email)
+    ok, needs_rehash = verify_password(password, user['password'] if user else None)
+    if not ok:
         return False, None
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+    if needs_rehash:
+        # Upgrade plain-text or old-cost rows in place; a failure here must not block the login
+        CustomerRepo.replace_password_hash(user['customer_id'], user['password'], hash_password(password))
+    del user['password']
+    return True, user
 
 def logout_user():
     """Logs out the current user."""
+    # Save any pending cart edits before the session forgets who owns them
+    flush_cart(st.session_state.get('user_id'), force=True)
+    st.session_state.pop('cart', None)
+    st.session_state.pop('cart_owner', None)
+    st.session_state.pop('cart_dirty', None)
     st.session_state['logged_in'] = False
     st.session_state['user_id'] = None
     st.session_state['user_name'] = None
@@ -0,0 +1,83 @@
+"""Compares sequential and parallel loading of the Reports and Inventory pages.
+
+Seeds a scratch database, then times the queries behind each admin page run
+one after another (the old behaviour) and side by side through
+db_connection.run_parallel, which is what the pages now do (the Reports tabs
+run as concurrent background jobs on the same pooled connections).
+
+    python benchmarks/bench_parallel_reports.py --orders 1000000
+    python benchmarks/bench_parallel_reports.py --skip-seed   # reuse existing data
+"""
+import argparse
+from datetime import date, timedelta
+
+from common import (analyze, connect, create_bench_database, make_rng, rebuild_rollup, seed_customers,
+                    seed_orders, seed_products, summarize, time_call, use_bench_database)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=1_000_000)
+    parser.add_argument("--customers", type=int, default=20_000)
+    parser.add_argument("--products", type=int, default=5_000)
+    parser.add_argument("--days", type=int, default=365, help="Report window length")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--skip-seed", action="store_true")
+    args = parser.parse_args()
+
+    if not args.skip_seed:
+        print(f"Seeding {args.orders:,} orders...")
+        create_bench_database()
+        conn = connect()
+        rng = make_rng()
+        customers = seed_customers(conn, args.customers, rng)
+        products = seed_products(conn, args.products, rng)
+        seed_orders(conn, args.orders, customers, products, rng)
+        rebuild_rollup(conn)
+        analyze(conn, "Orders", "Order_Item", "Product", "Customer", "Daily_Sales", "Daily_Category_Sales")
+        conn.close()
+
+    use_bench_database(pool_size=10)
+    import reports
+    from db_connection import fetch_data_as_df, get_router, run_parallel
+    from jobs import Job
+    from repositories import ProductRepo
+
+    router = get_router()
+    job = Job("bench", {}, "bench", None)  # only receives progress reports
+    end_date = date.today()
+    start_date = end_date - timedelta(days=args.days)
+
+    pages = [
+        ("Reports page", [
+            lambda: reports.sales_summary(router, start_date, end_date, job),
+            lambda: reports.top_products(router, 10, job),
+            lambda: reports.category_sales(router, start_date, end_date, job),
+            lambda: reports.category_stock_value(router, job),
+        ]),
+        ("Inventory overview", [
+            lambda: ProductRepo.inventory_summary().first(),
+            lambda: ProductRepo.low_stock(10).to_df(),
+            lambda: fetch_data_as_df("""
+                SELECT it.transaction_date, p.name, it.transaction_type, it.quantity_change, it.notes
+                FROM Inventory_Transaction it
+                JOIN Product p ON it.product_id = p.product_id
+                ORDER BY it.transaction_date DESC
+                LIMIT 10
+            """),
+        ]),
+    ]
+
+    for label, calls in pages:
+        print(f"\n{label} ({len(calls)} queries)")
+        for call in calls:
+            call()  # warm the buffer pool and connections so both modes start equal
+        sequential = summarize(time_call(lambda: [call() for call in calls], args.repeat))
+        parallel = summarize(time_call(lambda: run_parallel(*calls), args.repeat))
+        for mode, stats in (("sequential", sequential), ("parallel", parallel)):
+            print(f"  {mode:<10} median {stats['median_ms']:.1f} ms, p95 {stats['p95_ms']:.1f} ms "
+                  f"over {stats['runs']} runs")
+        if parallel["median_ms"]:
+            print(f"  speedup {sequential['median_ms'] / parallel['median_ms']:.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Measures login throughput with bcrypt hashing as concurrency grows.
+
+Part one needs no database: it runs bcrypt checks from N concurrent threads
+(as N Streamlit sessions logging in at once), either inline on the calling
+thread or through passwords.verify_password's process pool, and prints
+checks per second for each concurrency level.
+
+Part two drives auth.login_user end to end against a scratch database whose
+customers still hold the seed's plain-text passwords: the first round of
+logins migrates each row to bcrypt, the second verifies the new hashes.
+
+    python benchmarks/bench_password_hashing.py --rounds 12 --logins 64
+    python benchmarks/bench_password_hashing.py --no-db
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from common import connect, create_bench_database, make_rng, seed_customers, use_bench_database
+
+import passwords
+
+def throughput(fn, items, concurrency):
+    """Runs fn over items from ``concurrency`` threads; returns calls per second."""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(fn, items))
+    return len(items) / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=passwords.BCRYPT_ROUNDS, help="bcrypt work factor")
+    parser.add_argument("--logins", type=int, default=64, help="Logins per measurement")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--no-db", action="store_true", help="Skip the end-to-end login_user run")
+    args = parser.parse_args()
+
+    passwords.BCRYPT_ROUNDS = args.rounds
+    print(f"bcrypt rounds {args.rounds}, {passwords.HASH_WORKERS} hashing processes")
+    stored = passwords.hash_password("customer123")
+    # Start every worker process up front so the timings exclude spawn cost
+    list(passwords.get_hash_executor().map(passwords._check, ["x"] * passwords.HASH_WORKERS,
+                                           [stored] * passwords.HASH_WORKERS))
+    items = ["customer123"] * args.logins
+
+    print(f"\n{'threads':>8} {'inline/s':>10} {'pool/s':>10}")
+    for concurrency in args.concurrency:
+        inline = throughput(lambda pw: passwords._check(pw, stored), items, concurrency)
+        pooled = throughput(lambda pw: passwords.verify_password(pw, stored), items, concurrency)
+        print(f"{concurrency:>8} {inline:>10.1f} {pooled:>10.1f}")
+
+    if args.no_db:
+        return
+
+    create_bench_database()
+    conn = connect()
+    customers = seed_customers(conn, args.logins, make_rng())
+    conn.close()
+    use_bench_database(pool_size=max(args.concurrency))
+    from auth import login_user
+
+    emails = [f"bench{i}@example.com" for i in range(len(customers))]
+    concurrency = max(args.concurrency)
+    login = lambda email: login_user(email, "customer123")[0]
+    for label in ("first login (plain text -> bcrypt)", "second login (bcrypt)"):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(login, emails))
+        elapsed = time.perf_counter() - start
+        print(f"\n{label}: {len(emails) / elapsed:.1f} logins/s with {concurrency} threads, "
+              f"{sum(results)}/{len(results)} succeeded")
+
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM Customer WHERE password LIKE '$2%'")
+    print(f"rows migrated to bcrypt: {cursor.fetchone()[0]}/{len(customers)}")
+    cursor.close()
+    conn.close()
+
+if __name__ == "__main__":
+    main()
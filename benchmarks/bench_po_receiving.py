@@ -0,0 +1,98 @@
+"""Times receiving a large purchase order set-based versus line by line.
+
+Seeds a scratch database with products and two identical purchase orders of
+--lines lines each. The first is received with one call to
+receiving.receive_purchase_order. For comparison, the second is received the
+way the single-product stock-in form would do it: one move_stock call per
+line plus one received_quantity UPDATE per line. The script then checks that
+every product gained both deliveries and the batched ledger rows and order
+status are right.
+
+    python benchmarks/bench_po_receiving.py --lines 2000
+"""
+import argparse
+import time
+from datetime import date
+
+from common import connect, create_bench_database, make_rng, seed_products, use_bench_database
+
+def create_purchase_order(conn, products, lines):
+    cursor = conn.cursor()
+    cursor.execute("""
+        INSERT INTO Purchase_Order (supplier_id, order_date, status, total_amount)
+        VALUES (NULL, %s, 'pending', 0)
+    """, (date.today(),))
+    purchase_order_id = cursor.lastrowid
+    cursor.executemany("""
+        INSERT INTO Purchase_Order_Item (purchase_order_id, product_id, quantity, unit_cost)
+        VALUES (%s, %s, %s, %s)
+    """, [(purchase_order_id, product_id, 10, float(price)) for product_id, price in products[:lines]])
+    conn.commit()
+    cursor.close()
+    return purchase_order_id
+
+def stock_levels(conn, product_ids):
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT product_id, stock_quantity FROM Product WHERE product_id IN ({', '.join(['%s'] * len(product_ids))})",
+                   product_ids)
+    levels = dict(cursor.fetchall())
+    cursor.close()
+    return levels
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=2000)
+    args = parser.parse_args()
+
+    create_bench_database()
+    conn = connect()
+    products = seed_products(conn, args.lines, make_rng(), stock=100)
+    batched_po = create_purchase_order(conn, products, args.lines)
+    per_line_po = create_purchase_order(conn, products, args.lines)
+    conn.close()
+
+    conn = connect()
+    stock_before = stock_levels(conn, [product_id for product_id, _ in products[:args.lines]])
+    conn.close()
+
+    use_bench_database()
+    from receiving import receive_purchase_order
+    from stock_movements import move_stock
+
+    start = time.perf_counter()
+    success, message = receive_purchase_order(batched_po)
+    batched = time.perf_counter() - start
+    print(f"set-based receive: {batched * 1000:.0f} ms ({message if success else 'FAILED: ' + message})")
+
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute("SELECT purchase_order_item_id, product_id, quantity FROM Purchase_Order_Item "
+                   "WHERE purchase_order_id = %s", (per_line_po,))
+    lines = cursor.fetchall()
+    start = time.perf_counter()
+    for item_id, product_id, quantity in lines:
+        move_stock(product_id, quantity, "purchase", f"PO #{per_line_po}")
+        cursor.execute("UPDATE Purchase_Order_Item SET received_quantity = quantity WHERE purchase_order_item_id = %s",
+                       (item_id,))
+        conn.commit()
+    per_line = time.perf_counter() - start
+    print(f"line-by-line receive: {per_line * 1000:.0f} ms ({len(lines) * 2:,} statements)")
+    print(f"speedup {per_line / batched:.1f}x")
+
+    stock_after = stock_levels(conn, list(stock_before))
+    wrong_stock = sum(stock_after[product_id] != stock + 20 for product_id, stock in stock_before.items())
+    cursor.execute("SELECT COUNT(*) FROM Inventory_Transaction WHERE reference_type = 'purchase_order' "
+                   "AND reference_id = %s AND stock_after = stock_before + quantity_change", (batched_po,))
+    ledger_rows = cursor.fetchone()[0]
+    cursor.execute("SELECT status FROM Purchase_Order WHERE purchase_order_id = %s", (batched_po,))
+    status = cursor.fetchone()[0]
+    cursor.close()
+    conn.close()
+
+    ok = success and wrong_stock == 0 and ledger_rows == args.lines and status == "received"
+    print(f"products with wrong stock: {wrong_stock}, ledger rows: {ledger_rows}/{args.lines}, PO status: {status}")
+    print("PASS" if ok else "FAIL")
+    raise SystemExit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
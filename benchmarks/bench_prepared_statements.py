@@ -0,0 +1,118 @@
+"""Compares text-protocol, prepare-every-call and cached prepared statements.
+
+Seeds a scratch database, then times the hot parameterized lookups (order
+items by order, login by email, product by id, and a product IN list) three
+ways on one connection:
+
+* text     - a fresh cursor per call, parameters interpolated client-side
+* prepare  - a fresh prepared cursor per call (parse + execute every time)
+* cached   - the pool's StatementCache (execute only after the first call)
+
+    python benchmarks/bench_prepared_statements.py --calls 2000
+    python benchmarks/bench_prepared_statements.py --skip-seed   # reuse existing data
+"""
+import argparse
+
+from common import (analyze, connect, create_bench_database, make_rng, seed_customers, seed_orders,
+                    seed_products, summarize, time_call)
+from db_pool import PoolMetrics, StatementCache
+
+ORDER_ITEMS = """
+    SELECT oi.order_item_id, p.name, oi.quantity, oi.price_at_purchase, oi.subtotal
+    FROM Order_Item oi
+    JOIN Product p ON oi.product_id = p.product_id
+    WHERE oi.order_id = %s
+"""
+
+LOGIN_LOOKUP = "SELECT customer_id, name, password FROM Customer WHERE email = %s"
+
+PRODUCT_BY_ID = "SELECT * FROM Product WHERE product_id = %s"
+
+PRODUCTS_BY_IDS = """
+    SELECT product_id, name, price, stock_quantity, status
+    FROM Product
+    WHERE product_id IN (%s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+def run_text(conn, query, params):
+    cursor = conn.cursor()
+    cursor.execute(query, params)
+    cursor.fetchall()
+    cursor.close()
+
+def run_prepare(conn, query, params):
+    cursor = conn.cursor(prepared=True)
+    cursor.execute(query, params)
+    cursor.fetchall()
+    cursor.close()
+
+def fetch_column(conn, query):
+    cursor = conn.cursor()
+    cursor.execute(query)
+    values = [row[0] for row in cursor.fetchall()]
+    cursor.close()
+    return values
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=100_000)
+    parser.add_argument("--customers", type=int, default=10_000)
+    parser.add_argument("--products", type=int, default=5_000)
+    parser.add_argument("--calls", type=int, default=2_000, help="Calls per query and mode")
+    parser.add_argument("--skip-seed", action="store_true")
+    args = parser.parse_args()
+
+    if not args.skip_seed:
+        print(f"Seeding {args.orders:,} orders...")
+        create_bench_database()
+        conn = connect()
+        rng = make_rng()
+        customers = seed_customers(conn, args.customers, rng)
+        products = seed_products(conn, args.products, rng)
+        seed_orders(conn, args.orders, customers, products, rng)
+        analyze(conn, "Orders", "Order_Item", "Product", "Customer")
+        conn.close()
+
+    conn = connect()
+    rng = make_rng(7)
+    order_ids = fetch_column(conn, "SELECT order_id FROM Orders")
+    emails = fetch_column(conn, "SELECT email FROM Customer")
+    product_ids = fetch_column(conn, "SELECT product_id FROM Product")
+
+    cases = [
+        ("Order items by order", ORDER_ITEMS, lambda: (rng.choice(order_ids),)),
+        ("Login lookup by email", LOGIN_LOOKUP, lambda: (rng.choice(emails),)),
+        ("Product by id", PRODUCT_BY_ID, lambda: (rng.choice(product_ids),)),
+        ("Products by id list (8)", PRODUCTS_BY_IDS, lambda: tuple(rng.sample(product_ids, 8))),
+    ]
+    metrics = PoolMetrics()
+    statements = StatementCache(conn, max_size=16, metrics=metrics)
+    modes = [
+        ("text", lambda query, params: run_text(conn, query, params)),
+        ("prepare", lambda query, params: run_prepare(conn, query, params)),
+        ("cached", lambda query, params: statements.fetch(query, params)),
+    ]
+
+    for label, query, make_params in cases:
+        print(f"\n{label}")
+        medians = {}
+        for mode, run in modes:
+            params = [make_params() for _ in range(args.calls)]
+            calls = iter(params)
+            run(query, params[0])  # warm up; also prepares the cached statement
+            stats = summarize(time_call(lambda: run(query, next(calls)), args.calls - 1))
+            medians[mode] = stats["median_ms"]
+            print(f"  {mode:<8} median {stats['median_ms']:.3f} ms, p95 {stats['p95_ms']:.3f} ms "
+                  f"over {stats['runs']} calls")
+        if medians["cached"]:
+            print(f"  cached vs text {medians['text'] / medians['cached']:.2f}x, "
+                  f"vs prepare {medians['prepare'] / medians['cached']:.2f}x")
+
+    snapshot = metrics.snapshot()
+    print(f"\nstatement cache: {snapshot['statement_hits']} hits, {snapshot['statement_misses']} misses, "
+          f"{snapshot['statement_evictions']} evictions")
+    statements.clear()
+    conn.close()
+
+if __name__ == "__main__":
+    main()
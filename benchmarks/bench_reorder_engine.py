@@ -0,0 +1,103 @@
+"""Times the reorder engine over a large catalogue.
+
+By default no database is needed: synthetic products and sales summaries
+for --skus products are generated in memory and compute_reorder_plan is
+timed on its own. With --db, a scratch database is seeded with the
+products and a sales ledger, and the two bulk loads are timed as well.
+
+    python benchmarks/bench_reorder_engine.py --skus 100000
+    python benchmarks/bench_reorder_engine.py --skus 100000 --db --ledger-rows 2000000
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from common import (analyze, connect, create_bench_database, insert_batches, make_rng, seed_products,
+                    skewed_index, summarize, time_call, use_bench_database)
+
+def synthetic_inputs(skus, window_days, seed=42):
+    rng = np.random.default_rng(seed)
+    product_ids = np.arange(1, skus + 1)
+    products = pd.DataFrame({
+        "product_id": product_ids,
+        "sku": [f"BENCH-{i:08d}" for i in product_ids],
+        "name": [f"Bench Product {i}" for i in product_ids],
+        "supplier": rng.choice([f"Supplier {i}" for i in range(200)] + [None], size=skus),
+        "stock_quantity": rng.integers(0, 500, size=skus),
+        "min_stock_level": np.full(skus, 10),
+        "unit_cost": rng.uniform(1, 300, size=skus).round(2),
+        "on_order": np.where(rng.random(skus) < 0.05, rng.integers(1, 200, size=skus), 0),
+    })
+    # Roughly 70% of SKUs sold something in the window
+    sold = product_ids[rng.random(skus) < 0.7]
+    rate = rng.gamma(0.6, 3.0, size=len(sold))
+    units = rng.poisson(rate * window_days)
+    sales = pd.DataFrame({
+        "product_id": sold,
+        "units": units,
+        "units_sq": units * (rate + 1) * 1.5,  # a plausible sum of squared daily sales
+    })
+    return products, sales
+
+def seed_ledger(conn, products, rows, window_days, rng):
+    """Bulk-loads sale rows into Inventory_Transaction spread over the window."""
+    now = datetime.now()
+    ledger = []
+    for _ in range(rows):
+        product_id = products[skewed_index(len(products), 2.0, rng)][0]
+        quantity = rng.randint(1, 3)
+        when = now - timedelta(seconds=rng.randint(86400, window_days * 86400))
+        ledger.append((product_id, -quantity, when, 1000, 1000 - quantity))
+    insert_batches(conn, """
+        INSERT INTO Inventory_Transaction
+            (product_id, transaction_type, quantity_change, reference_type, transaction_date, stock_before, stock_after)
+        VALUES (%s, 'sale', %s, 'order', %s, %s, %s)
+    """, ledger)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--skus", type=int, default=100_000)
+    parser.add_argument("--window", type=int, default=90, help="Demand window in days")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--db", action="store_true", help="Also seed a scratch database and time the loads")
+    parser.add_argument("--ledger-rows", type=int, default=1_000_000)
+    parser.add_argument("--skip-seed", action="store_true")
+    args = parser.parse_args()
+
+    from reorder import compute_reorder_plan
+
+    products, sales = synthetic_inputs(args.skus, args.window)
+    stats = summarize(time_call(lambda: compute_reorder_plan(products, sales, args.window), args.repeat))
+    plan = compute_reorder_plan(products, sales, args.window)
+    print(f"compute_reorder_plan, {args.skus:,} SKUs: median {stats['median_ms']:.1f} ms, "
+          f"p95 {stats['p95_ms']:.1f} ms; {int((plan['order_quantity'] > 0).sum()):,} to reorder")
+
+    if not args.db:
+        return
+    if not args.skip_seed:
+        print(f"Seeding {args.skus:,} products and {args.ledger_rows:,} ledger rows...")
+        create_bench_database()
+        conn = connect()
+        rng = make_rng()
+        seeded = seed_products(conn, args.skus, rng)
+        seed_ledger(conn, seeded, args.ledger_rows, args.window, rng)
+        analyze(conn, "Product", "Inventory_Transaction")
+        conn.close()
+
+    use_bench_database()
+    from reorder import load_products, load_sales
+
+    for label, fn in (("load_products", load_products), ("load_sales", lambda: load_sales(args.window))):
+        start = time.perf_counter()
+        frame = fn()
+        print(f"{label}: {len(frame):,} rows in {(time.perf_counter() - start) * 1000:.0f} ms")
+    start = time.perf_counter()
+    plan = compute_reorder_plan(load_products(), load_sales(args.window), args.window)
+    print(f"end to end: {(time.perf_counter() - start) * 1000:.0f} ms, "
+          f"{int((plan['order_quantity'] > 0).sum()):,} of {len(plan):,} SKUs to reorder")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Compares the old DATE()-wrapped report filters with the sargable versions.
+
+Seeds a scratch database with a million orders (by default), then prints the
+EXPLAIN plan and timings for the DATE() form, the half-open range form and
+the daily-rollup form of the sales-summary and category-performance queries.
+
+    python benchmarks/bench_sales_report.py --orders 1000000
+    python benchmarks/bench_sales_report.py --skip-seed   # reuse existing data
+"""
+import argparse
+from datetime import date, timedelta
+
+from common import (analyze, connect, create_bench_database, explain, make_rng, rebuild_rollup,
+                    seed_customers, seed_orders, seed_products, summarize, time_call)
+
+LEGACY_SUMMARY = """
+    SELECT DATE(o.order_date) as sale_date, COUNT(o.order_id) as total_orders,
+           SUM(o.total_amount) as total_revenue, COUNT(DISTINCT o.customer_id) as unique_customers
+    FROM Orders o
+    WHERE DATE(o.order_date) BETWEEN %s AND %s
+      AND o.status != 'cancelled'
+    GROUP BY DATE(o.order_date)
+"""
+
+SARGABLE_SUMMARY = """
+    SELECT DATE(o.order_date) as sale_date, COUNT(o.order_id) as total_orders,
+           SUM(o.total_amount) as total_revenue, COUNT(DISTINCT o.customer_id) as unique_customers
+    FROM Orders o
+    WHERE o.order_date >= %s AND o.order_date < %s
+      AND o.status IN ('pending', 'processing', 'shipped', 'delivered')
+    GROUP BY DATE(o.order_date)
+"""
+
+ROLLUP_SUMMARY = """
+    SELECT sale_date, SUM(total_orders) as total_orders, SUM(total_revenue) as total_revenue,
+           SUM(unique_customers) as unique_customers
+    FROM Daily_Sales
+    WHERE sale_date BETWEEN %s AND %s
+    GROUP BY sale_date
+    HAVING SUM(total_orders) > 0
+"""
+
+ROLLUP_CATEGORY = """
+    SELECT c.category_name, SUM(d.order_count) as orders,
+           SUM(d.units_sold) as items_sold, SUM(d.revenue) as revenue
+    FROM Daily_Category_Sales d
+    JOIN Category c ON d.category_id = c.category_id
+    WHERE d.sale_date BETWEEN %s AND %s
+    GROUP BY c.category_id, c.category_name
+"""
+
+LEGACY_CATEGORY = """
+    SELECT c.category_name, COUNT(DISTINCT o.order_id) as orders,
+           SUM(oi.quantity) as items_sold, SUM(oi.subtotal) as revenue
+    FROM Category c
+    JOIN Product p ON c.category_id = p.category_id
+    JOIN Order_Item oi ON p.product_id = oi.product_id
+    JOIN Orders o ON oi.order_id = o.order_id
+    WHERE DATE(o.order_date) BETWEEN %s AND %s
+      AND o.status != 'cancelled'
+    GROUP BY c.category_id, c.category_name
+"""
+
+SARGABLE_CATEGORY = """
+    SELECT c.category_name, COUNT(DISTINCT o.order_id) as orders,
+           SUM(oi.quantity) as items_sold, SUM(oi.subtotal) as revenue
+    FROM Category c
+    JOIN Product p ON c.category_id = p.category_id
+    JOIN Order_Item oi ON p.product_id = oi.product_id
+    JOIN Orders o ON oi.order_id = o.order_id
+    WHERE o.order_date >= %s AND o.order_date < %s
+      AND o.status IN ('pending', 'processing', 'shipped', 'delivered')
+    GROUP BY c.category_id, c.category_name
+"""
+
+def run_query(conn, query, params):
+    cursor = conn.cursor()
+    cursor.execute(query, params)
+    cursor.fetchall()
+    cursor.close()
+
+def print_plan(conn, label, query, params):
+    print(f"\n{label}")
+    for row in explain(conn, query, params):
+        print(f"  {str(row['table']):<4} type={str(row['type']):<6} key={row['key']} rows={row['rows']} extra={row['Extra']}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=1_000_000)
+    parser.add_argument("--customers", type=int, default=20_000)
+    parser.add_argument("--products", type=int, default=5_000)
+    parser.add_argument("--days", type=int, default=30, help="Report window length")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--skip-seed", action="store_true")
+    args = parser.parse_args()
+
+    if not args.skip_seed:
+        print(f"Seeding {args.orders:,} orders...")
+        create_bench_database()
+        conn = connect()
+        rng = make_rng()
+        customers = seed_customers(conn, args.customers, rng)
+        products = seed_products(conn, args.products, rng)
+        seed_orders(conn, args.orders, customers, products, rng)
+        rebuild_rollup(conn)
+        analyze(conn, "Orders", "Order_Item", "Product", "Customer", "Daily_Sales", "Daily_Category_Sales")
+        conn.close()
+
+    conn = connect()
+    end_date = date.today()
+    start_date = end_date - timedelta(days=args.days)
+    legacy_params = (start_date, end_date)
+    sargable_params = (start_date, end_date + timedelta(days=1))
+
+    cases = [
+        ("Sales summary (DATE() BETWEEN)", LEGACY_SUMMARY, legacy_params),
+        ("Sales summary (half-open range)", SARGABLE_SUMMARY, sargable_params),
+        ("Sales summary (daily rollup)", ROLLUP_SUMMARY, legacy_params),
+        ("Category performance (DATE() BETWEEN)", LEGACY_CATEGORY, legacy_params),
+        ("Category performance (half-open range)", SARGABLE_CATEGORY, sargable_params),
+        ("Category performance (daily rollup)", ROLLUP_CATEGORY, legacy_params),
+    ]
+    for label, query, params in cases:
+        print_plan(conn, label, query, params)
+        stats = summarize(time_call(lambda: run_query(conn, query, params), args.repeat))
+        print(f"  median {stats['median_ms']:.1f} ms, p95 {stats['p95_ms']:.1f} ms over {stats['runs']} runs")
+    conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Times point-in-time stock reconstruction and the ledger consistency check.
+
+Seeds a scratch database with --products products and a correctly chained
+ledger of --ledger-rows movements spread over the last --days days, then
+corrupts --corrupt random rows' stock_before. It then:
+
+* rebuilds stock at the middle of the period with stock_history.stock_at and
+  with one grouped SQL query, and checks both against the stock tracked
+  while seeding;
+* runs stock_history.check_ledger_chain over the whole ledger and checks
+  that exactly the corrupted rows are flagged.
+
+    python benchmarks/bench_stock_history.py --ledger-rows 5000000
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from common import (analyze, connect, create_bench_database, insert_batches, make_rng, seed_products,
+                    skewed_index, use_bench_database)
+
+TYPES = ["sale", "sale", "sale", "purchase", "adjustment", "return", "damage"]
+
+def seed_ledger(conn, products, rows, days, rng):
+    """Writes a chained ledger in date order; returns (moment, stock per product at moment)."""
+    now = datetime.now()
+    start = now - timedelta(days=days)
+    moment = (start + (now - start) / 2).replace(microsecond=0)
+    stock = {product_id: 1000 for product_id, _ in products}
+    at_moment = None
+    ledger = []
+    step = (now - start) / rows
+    for i in range(rows):
+        when = (start + step * i).replace(microsecond=0)  # TIMESTAMP keeps whole seconds
+        if at_moment is None and when > moment:
+            at_moment = dict(stock)
+        product_id = products[skewed_index(len(products), 2.0, rng)][0]
+        kind = rng.choice(TYPES)
+        change = rng.randint(10, 50) if kind in ("purchase", "return") else -rng.randint(1, 5)
+        if kind == "adjustment":
+            change = rng.randint(-5, 5)
+        before = stock[product_id]
+        stock[product_id] = before + change
+        ledger.append((product_id, kind, change, when, before, before + change))
+    insert_batches(conn, """
+        INSERT INTO Inventory_Transaction
+            (product_id, transaction_type, quantity_change, transaction_date, stock_before, stock_after)
+        VALUES (%s, %s, %s, %s, %s, %s)
+    """, ledger)
+    cursor = conn.cursor()
+    # Products must exist before the period for stock_at to report them
+    cursor.execute("UPDATE Product SET stock_quantity = 1000, created_at = %s", (start.replace(microsecond=0),))
+    cursor.executemany("UPDATE Product SET stock_quantity = %s WHERE product_id = %s",
+                       [(quantity, product_id) for product_id, quantity in stock.items() if quantity != 1000])
+    conn.commit()
+    cursor.close()
+    return moment, at_moment
+
+def corrupt(conn, n, rng):
+    """Bumps stock_before on ``n`` random ledger rows; returns their transaction_ids.
+
+    A product's first row has nothing to chain from, so those are never picked.
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT MIN(transaction_id), MAX(transaction_id) FROM Inventory_Transaction")
+    low, high = cursor.fetchone()
+    cursor.execute("SELECT MIN(transaction_id) FROM Inventory_Transaction GROUP BY product_id")
+    firsts = {row[0] for row in cursor.fetchall()}
+    ids = set()
+    while len(ids) < n:
+        candidate = rng.randint(low, high)
+        if candidate not in firsts:
+            ids.add(candidate)
+    ids = sorted(ids)
+    cursor.executemany("UPDATE Inventory_Transaction SET stock_before = stock_before + 7 WHERE transaction_id = %s",
+                       [(transaction_id,) for transaction_id in ids])
+    conn.commit()
+    cursor.close()
+    return ids
+
+def sql_stock_at(conn, moment):
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT p.product_id, p.stock_quantity - COALESCE(SUM(t.quantity_change), 0)
+        FROM Product p
+        LEFT JOIN Inventory_Transaction t ON t.product_id = p.product_id AND t.transaction_date > %s
+        GROUP BY p.product_id, p.stock_quantity
+    """, (moment,))
+    stock = dict(cursor.fetchall())
+    cursor.close()
+    return stock
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=20_000)
+    parser.add_argument("--ledger-rows", type=int, default=2_000_000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--corrupt", type=int, default=25)
+    args = parser.parse_args()
+
+    print(f"Seeding {args.products:,} products and {args.ledger_rows:,} ledger rows...")
+    rng = make_rng()
+    create_bench_database()
+    conn = connect()
+    products = seed_products(conn, args.products, rng, stock=1000)
+    moment, expected = seed_ledger(conn, products, args.ledger_rows, args.days, rng)
+    corrupted = corrupt(conn, args.corrupt, rng)
+    analyze(conn, "Product", "Inventory_Transaction")
+
+    start = time.perf_counter()
+    by_sql = sql_stock_at(conn, moment)
+    sql_ms = (time.perf_counter() - start) * 1000
+    conn.close()
+
+    use_bench_database()
+    from stock_history import check_ledger_chain, stock_at
+
+    start = time.perf_counter()
+    stock = stock_at(moment)
+    replay_ms = (time.perf_counter() - start) * 1000
+    rebuilt = dict(zip(stock["product_id"], stock["stock_quantity"]))
+    wrong = sum(rebuilt.get(product_id) != quantity for product_id, quantity in expected.items())
+    wrong_sql = sum(by_sql.get(product_id) != quantity for product_id, quantity in expected.items())
+    print(f"stock at {moment}: NumPy replay {replay_ms:.0f} ms, grouped SQL {sql_ms:.0f} ms; "
+          f"wrong products {wrong} / {wrong_sql}")
+
+    start = time.perf_counter()
+    counts, flagged = check_ledger_chain()
+    check_s = time.perf_counter() - start
+    print(f"check_ledger_chain: {counts['rows']:,} rows in {check_s:.1f} s "
+          f"({counts['rows'] / check_s:,.0f} rows/s); {counts}")
+
+    chain_ids = sorted(flagged.loc[flagged["problem"] == "chain", "transaction_id"])
+    arithmetic_ids = sorted(flagged.loc[flagged["problem"] == "arithmetic", "transaction_id"])
+    ok = (wrong == 0 and chain_ids == corrupted and arithmetic_ids == corrupted and counts["drift"] == 0)
+    print("PASS" if ok else "FAIL")
+    raise SystemExit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
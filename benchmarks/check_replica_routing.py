@@ -0,0 +1,107 @@
+"""Checks primary/replica read routing against a fake MySQL driver.
+
+No database is needed: each pool gets a fake connect() that records which
+host served a query, and replica lag is scripted per host. Verifies that
+reads spread over healthy replicas, lagging or broken replicas are skipped,
+an unreachable replica is skipped until retry_after, forced-primary reads
+(read-your-writes) never touch a replica, and the on_commit hook fires.
+
+    python benchmarks/check_replica_routing.py
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import mysql.connector
+
+from db_pool import ConnectionPool
+from db_routing import ReplicaRouter
+
+class FakeConnection:
+    def __init__(self, host):
+        self.host = host
+        self.in_transaction = False
+
+    def ping(self, reconnect=False):
+        pass
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+class FakeServer:
+    def __init__(self, host, lag=0):
+        self.host = host
+        self.lag = lag
+        self.reachable = True
+
+    def connect(self, **config):
+        if not self.reachable:
+            raise mysql.connector.InterfaceError(f"Can't connect to MySQL server on '{self.host}'")
+        return FakeConnection(self.host)
+
+def main():
+    commits = []
+    primary_server = FakeServer("primary")
+    replica_servers = [FakeServer("replica-1"), FakeServer("replica-2")]
+    primary = ConnectionPool({"host": "primary"}, size=4, connect=primary_server.connect,
+                             on_commit=lambda: commits.append(1))
+    replicas = [ConnectionPool({"host": s.host}, size=4, connect=s.connect) for s in replica_servers]
+    lags = {s.host: s for s in replica_servers}
+    # lag_check_interval=0 re-reads the scripted lag on every borrow
+    router = ReplicaRouter(primary, replicas, max_lag=5, lag_check_interval=0, retry_after=60,
+                           lag_probe=lambda conn: lags[conn.host].lag)
+
+    def read_hosts(n, use_primary=False):
+        hosts = []
+        for _ in range(n):
+            conn = router.acquire_read(use_primary)
+            hosts.append(conn.host)
+            conn.close()
+        return hosts
+
+    checks = []
+    def check(name, ok):
+        checks.append(ok)
+        print(f"{'ok  ' if ok else 'FAIL'} {name}")
+
+    hosts = read_hosts(10)
+    check("reads spread over healthy replicas", set(hosts) == {"replica-1", "replica-2"})
+
+    replica_servers[0].lag = 30
+    check("lagging replica is skipped", set(read_hosts(10)) == {"replica-2"})
+
+    replica_servers[1].lag = None
+    check("falls back to primary when no replica qualifies", set(read_hosts(5)) == {"primary"})
+
+    replica_servers[0].lag = 0
+    replica_servers[1].lag = 0
+    check("read-your-writes reads stay on the primary", set(read_hosts(5, use_primary=True)) == {"primary"})
+
+    replicas[1].close_all()
+    replica_servers[1].reachable = False
+    hosts = read_hosts(10)
+    check("unreachable replica is skipped", set(hosts) == {"replica-1"})
+    check("unreachable replica is reported down", router.stats()["replicas"][1]["down"])
+
+    conn = router.acquire_write()
+    conn.commit()
+    conn.close()
+    check("primary commit fires on_commit", commits == [1] and conn.raw is None)
+
+    stats = router.stats()
+    print(f"primary reads {stats['primary_reads']}, replica reads {stats['replica_reads']}, "
+          f"fallbacks {stats['fallbacks']}")
+    ok = all(checks)
+    print("PASS" if ok else "FAIL")
+    raise SystemExit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""Shared helpers for the benchmark scripts.
+
+Benchmarks run against a scratch database (``retail_bench`` by default,
+override with the BENCH_DB environment variable) that is built from
+sql/retail_setup.sql, so they never touch retail_db.
+"""
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import mysql.connector
+import db_connection
+from db_connection import DB_CONFIG
+
+BENCH_DB = os.environ.get("BENCH_DB", "retail_bench")
+SETUP_SQL = os.path.join(ROOT, "sql", "retail_setup.sql")
+ORDER_STATUSES = ["pending", "processing", "shipped", "delivered", "cancelled"]
+STATUS_WEIGHTS = [5, 5, 10, 70, 10]
+
+def split_sql_script(text):
+    """Splits a mysql-client script into statements, honouring DELIMITER lines."""
+    statements = []
+    delimiter = ";"
+    buffer = []
+    for line in text.splitlines():
+        stripped = line.strip()
+        if stripped.upper().startswith("DELIMITER "):
+            delimiter = stripped.split(None, 1)[1]
+            continue
+        if not buffer and (not stripped or stripped.startswith("--")):
+            continue
+        # Trailing "-- comment" after the delimiter still ends the statement
+        code = stripped.split(" --")[0].rstrip()
+        if code.endswith(delimiter):
+            buffer.append(code[:-len(delimiter)])
+            statement = "\n".join(buffer).strip()
+            if statement:
+                statements.append(statement)
+            buffer = []
+        else:
+            buffer.append(line)
+    return statements
+
+def load_setup_statements(database=BENCH_DB):
+    """Returns the setup script's statements, retargeted at ``database``."""
+    with open(SETUP_SQL) as f:
+        text = f.read().replace("retail_db", database)
+    return split_sql_script(text)
+
+def connect(database=BENCH_DB, **overrides):
+    """Opens a raw connection to the benchmark database."""
+    config = dict(DB_CONFIG, database=database, **overrides)
+    return mysql.connector.connect(**config)
+
+def use_bench_database(database=BENCH_DB, pool_size=None):
+    """Points the app's own connection pool at the benchmark database.
+
+    Call this before anything borrows a connection, so benchmarks can drive
+    the same functions the dashboards use.
+    """
+    DB_CONFIG["database"] = database
+    if pool_size:
+        db_connection.POOL_CONFIG["size"] = pool_size
+
+def create_bench_database(database=BENCH_DB):
+    """Drops and recreates the benchmark database from the setup script."""
+    config = {k: v for k, v in DB_CONFIG.items() if k != "database"}
+    conn = mysql.connector.connect(**config)
+    cursor = conn.cursor()
+    for statement in load_setup_statements(database):
+        cursor.execute(statement)
+        if cursor.with_rows:
+            cursor.fetchall()
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+def trigger_definitions(database=BENCH_DB):
+    """Returns {trigger_name: CREATE TRIGGER statement} from the setup script."""
+    triggers = {}
+    for statement in load_setup_statements(database):
+        if statement.upper().startswith("CREATE TRIGGER"):
+            triggers[statement.split()[2]] = statement
+    return triggers
+
+class TriggersDisabled:
+    """Drops the setup script's triggers for a bulk load and recreates them after.
+
+    Seeded history is written directly, so the per-row stock and ledger
+    triggers would only slow the load down and drive stock negative.
+    """
+
+    def __init__(self, conn, database=BENCH_DB):
+        self.conn = conn
+        self.triggers = trigger_definitions(database)
+
+    def __enter__(self):
+        cursor = self.conn.cursor()
+        for name in self.triggers:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+        cursor.close()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        cursor = self.conn.cursor()
+        for statement in self.triggers.values():
+            cursor.execute(statement)
+        cursor.close()
+
+def insert_batches(conn, sql, rows, batch_size=5000):
+    """Inserts rows with executemany in chunks (one multi-row INSERT per chunk)."""
+    cursor = conn.cursor()
+    first_ids = []
+    for start in range(0, len(rows), batch_size):
+        cursor.executemany(sql, rows[start:start + batch_size])
+        first_ids.append(cursor.lastrowid)
+    conn.commit()
+    cursor.close()
+    return first_ids
+
+def skewed_index(n, skew, rng):
+    """Picks an index in [0, n) where low indexes are far more likely (skew > 1)."""
+    return min(int(n * (rng.random() ** skew)), n - 1)
+
+def seed_customers(conn, n, rng):
+    rows = [(f"Bench Customer {i}", f"bench{i}@example.com", f"9{i:09d}", "customer123",
+             "Springfield", "IL", "62701", f"{i} Bench St") for i in range(n)]
+    insert_batches(conn, """
+        INSERT INTO Customer (name, email, phone, password, city, state, pin, address)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+    """, rows)
+    cursor = conn.cursor()
+    cursor.execute("SELECT customer_id FROM Customer")
+    ids = [row[0] for row in cursor.fetchall()]
+    cursor.close()
+    return ids
+
+def seed_products(conn, n, rng, stock=1_000_000):
+    cursor = conn.cursor()
+    cursor.execute("SELECT category_id FROM Category")
+    categories = [row[0] for row in cursor.fetchall()]
+    cursor.close()
+    rows = []
+    for i in range(n):
+        price = round(rng.uniform(2, 500), 2)
+        rows.append((f"Bench Product {i}", f"Synthetic product number {i} for benchmarking",
+                     price, stock, rng.choice(categories), f"BENCH-{i:08d}", round(price * 0.6, 2), 10))
+    insert_batches(conn, """
+        INSERT INTO Product (name, description, price, stock_quantity, category_id, sku, cost_price, min_stock_level)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+    """, rows)
+    cursor = conn.cursor()
+    cursor.execute("SELECT product_id, price FROM Product ORDER BY product_id")
+    products = cursor.fetchall()
+    cursor.close()
+    return products
+
+def seed_orders(conn, n_orders, customer_ids, products, rng, days=365, skew=3.0, chunk=50_000):
+    """Bulk-loads orders and their items spread over the last ``days`` days.
+
+    Product popularity is skewed so a few SKUs dominate, as in real sales.
+    Loads in chunks so memory stays flat for multi-million-order runs.
+    """
+    now = datetime.now()
+    with TriggersDisabled(conn):
+        for chunk_start in range(0, n_orders, chunk):
+            orders = []
+            items = []
+            for _ in range(min(chunk, n_orders - chunk_start)):
+                lines = {}
+                for _ in range(rng.randint(1, 4)):
+                    product_id, price = products[skewed_index(len(products), skew, rng)]
+                    lines[product_id] = (rng.randint(1, 3), price)
+                total = sum(q * float(p) for q, p in lines.values())
+                order_date = now - timedelta(seconds=rng.randint(0, days * 86400))
+                status = rng.choices(ORDER_STATUSES, STATUS_WEIGHTS)[0]
+                orders.append((rng.choice(customer_ids), order_date, total, status, "paid"))
+                items.append(lines)
+
+            cursor = conn.cursor()
+            for start in range(0, len(orders), 5000):
+                batch = orders[start:start + 5000]
+                cursor.executemany("""
+                    INSERT INTO Orders (customer_id, order_date, total_amount, status, payment_status)
+                    VALUES (%s, %s, %s, %s, %s)
+                """, batch)
+                first_id = cursor.lastrowid
+                item_rows = [(first_id + offset, product_id, quantity, price)
+                             for offset, lines in enumerate(items[start:start + 5000])
+                             for product_id, (quantity, price) in lines.items()]
+                cursor.executemany("""
+                    INSERT INTO Order_Item (order_id, product_id, quantity, price_at_purchase)
+                    VALUES (%s, %s, %s, %s)
+                """, item_rows)
+            conn.commit()
+            cursor.close()
+
+def rebuild_rollup(conn):
+    """Backfills the daily sales rollups, which seeding bypasses with triggers off."""
+    cursor = conn.cursor()
+    cursor.callproc("RebuildSalesRollup", (None, None))
+    conn.commit()
+    cursor.close()
+
+def analyze(conn, *tables):
+    cursor = conn.cursor()
+    for table in tables:
+        cursor.execute(f"ANALYZE TABLE {table}")
+        cursor.fetchall()
+    cursor.close()
+
+def explain(conn, query, params=()):
+    """Returns EXPLAIN rows as dicts."""
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("EXPLAIN " + query, params)
+    rows = cursor.fetchall()
+    cursor.close()
+    return rows
+
+def time_call(fn, repeat=5):
+    """Runs fn ``repeat`` times and returns the durations in seconds."""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+def summarize(durations):
+    return {
+        "runs": len(durations),
+        "median_ms": statistics.median(durations) * 1000 if durations else 0.0,
+        "p95_ms": percentile(durations, 95) * 1000,
+        "min_ms": min(durations) * 1000 if durations else 0.0,
+    }
+
+def make_rng(seed=42):
+    return random.Random(seed)
@@ -0,0 +1,366 @@
+"""Load-tests the dashboards' query functions with concurrent simulated users.
+
+Seeds a scratch database (1M products, 10M orders with skewed product
+popularity by default; this takes a while, so later runs pass --skip-seed),
+then runs --shoppers customer threads and --admins admin threads for
+--duration seconds. Each thread picks weighted operations that call the
+same functions the dashboards use: keyset browse pages, FULLTEXT search,
+cart revalidation, checkout, order history, the inventory overview, the
+report jobs, the admin order list and stock updates.
+
+Prints calls, errors, rejections, throughput and p50/p95/p99 latency per
+operation and writes them to a JSON file. The app's read helpers report
+database errors with st.error, which does nothing outside Streamlit, so the
+harness makes st.error raise; checkouts and stock updates that fail on a
+database error (rather than being turned away for stock) count as errors
+too. Pass --compare with an earlier file to flag
+operations whose p95 or throughput got worse by more than --tolerance; the
+exit status is 1 when anything regressed or raised.
+
+    python benchmarks/load_test.py                                   # seed + run
+    python benchmarks/load_test.py --skip-seed --duration 120 --shoppers 32
+    python benchmarks/load_test.py --skip-seed --compare benchmarks/results/load_test_20260101-120000.json
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+import streamlit as st
+from common import (ROOT, analyze, connect, create_bench_database, make_rng, percentile, rebuild_rollup,
+                    seed_customers, seed_orders, seed_products, skewed_index, use_bench_database)
+
+# The app's pools are created on first use, so importing before use_bench_database is fine
+import reports
+from checkout import place_order
+from customer_dashboard import BROWSE_SELECT, SORT_OPTIONS
+from db_connection import fetch_data_as_df, get_router, run_parallel
+from pagination import estimate_row_count, fetch_keyset_page, fetch_offset_page
+from product_search import search_condition
+from repositories import OrderRepo, ProductRepo
+from stock_movements import move_stock
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+# Same skew seed_orders uses, so the hot products in the load match the hot products in the history.
+POPULARITY_SKEW = 3.0
+SEARCH_TERMS = ["bench", "synthetic product", "benchmarking", "product 1234", "number 42"]
+
+# Message prefixes place_order and move_stock use for database errors; anything
+# else they return on failure is a business rejection (stock, availability).
+CHECKOUT_ERROR_PREFIX = "Checkout failed:"
+STOCK_ERROR_PREFIX = "Stock update failed:"
+
+class AppError(RuntimeError):
+    """An error the app reported through st.error."""
+
+def _raise_app_error(body, *args, **kwargs):
+    raise AppError(str(body))
+
+def _write_outcome(success, message, error_prefix):
+    if success:
+        return "ok"
+    return "error" if str(message).startswith(error_prefix) else "rejected"
+
+class _NoProgress:
+    """Stands in for a jobs.Job when a report function is called directly."""
+
+    def report(self, fraction, message=None):
+        pass
+
+class Recorder:
+    """Collects per-operation latencies from every worker thread."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.durations = {}
+        self.errors = {}
+        self.rejected = {}
+
+    def record(self, op, seconds, outcome):
+        with self.lock:
+            self.durations.setdefault(op, []).append(seconds)
+            if outcome == "error":
+                self.errors[op] = self.errors.get(op, 0) + 1
+            elif outcome == "rejected":
+                self.rejected[op] = self.rejected.get(op, 0) + 1
+
+    def summary(self, elapsed):
+        operations = {}
+        for op, durations in sorted(self.durations.items()):
+            operations[op] = {
+                "calls": len(durations),
+                "errors": self.errors.get(op, 0),
+                "rejected": self.rejected.get(op, 0),
+                "throughput_per_s": len(durations) / elapsed,
+                "p50_ms": percentile(durations, 50) * 1000,
+                "p95_ms": percentile(durations, 95) * 1000,
+                "p99_ms": percentile(durations, 99) * 1000,
+                "max_ms": max(durations) * 1000,
+            }
+        return operations
+
+def seed(args):
+    rng = make_rng(args.seed)
+    started = time.perf_counter()
+    print(f"Seeding {args.products:,} products, {args.customers:,} customers and {args.orders:,} orders...")
+    create_bench_database()
+    conn = connect()
+    customers = seed_customers(conn, args.customers, rng)
+    products = seed_products(conn, args.products, rng)
+    seed_orders(conn, args.orders, customers, products, rng, skew=POPULARITY_SKEW)
+    rebuild_rollup(conn)
+    analyze(conn, "Orders", "Order_Item", "Product", "Customer", "Inventory_Transaction",
+            "Daily_Sales", "Daily_Category_Sales")
+    conn.close()
+    print(f"Seeded in {time.perf_counter() - started:,.0f} s")
+
+def load_dataset():
+    """Ids the simulated users pick from, in the order seed_products created them (popular first)."""
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute("SELECT product_id FROM Product ORDER BY product_id")
+    products = [row[0] for row in cursor.fetchall()]
+    cursor.execute("SELECT customer_id FROM Customer ORDER BY customer_id")
+    customers = [row[0] for row in cursor.fetchall()]
+    cursor.execute("SELECT category_id FROM Category")
+    categories = [row[0] for row in cursor.fetchall()]
+    cursor.execute("SELECT COUNT(*) FROM Orders")
+    orders = cursor.fetchone()[0]
+    cursor.close()
+    conn.close()
+    return {"products": products, "customers": customers, "categories": categories, "orders": orders}
+
+class Shopper:
+    """One simulated customer session: browses, searches, fills a cart and checks out."""
+
+    def __init__(self, data, rng):
+        self.data = data
+        self.rng = rng
+        self.customer_id = rng.choice(data["customers"])
+        self.cart = {}
+        self.cursor = None
+        self.operations = [
+            ("browse", self.browse, 40),
+            ("search", self.search, 20),
+            ("view_cart", self.view_cart, 15),
+            ("checkout", self.checkout, 5),
+            ("my_orders", self.my_orders, 10),
+        ]
+
+    def popular_product(self):
+        products = self.data["products"]
+        return products[skewed_index(len(products), POPULARITY_SKEW, self.rng)]
+
+    def browse(self):
+        # Carry on to the next page some of the time, like pressing "Load more"
+        if self.cursor is None or self.rng.random() < 0.5:
+            self.sort = self.rng.choice(list(SORT_OPTIONS))
+            self.where = "p.stock_quantity > 0 AND p.status = 'active'"
+            self.params = ()
+            if self.rng.random() < 0.5:
+                self.where += " AND p.category_id = %s"
+                self.params = (self.rng.choice(self.data["categories"]),)
+            self.cursor = None
+        order_by, descending = SORT_OPTIONS[self.sort]
+        page, self.cursor = fetch_keyset_page(BROWSE_SELECT, order_by, 24, after=self.cursor,
+                                              where=self.where, params=self.params, descending=descending)
+        if len(page):
+            self.cart[self.popular_product()] = self.rng.randint(1, 3)
+        return "ok"
+
+    def search(self):
+        where_sql, where_params, order_sql, order_params = search_condition(self.rng.choice(SEARCH_TERMS))
+        query = f"{BROWSE_SELECT} WHERE p.stock_quantity > 0 AND p.status = 'active' AND {where_sql} ORDER BY {order_sql}"
+        fetch_offset_page(query, where_params + order_params, 24, 0)
+        return "ok"
+
+    def view_cart(self):
+        if not self.cart:
+            self.cart[self.popular_product()] = 1
+        ProductRepo.by_ids(list(self.cart))
+        return "ok"
+
+    def checkout(self):
+        if not self.cart:
+            self.cart[self.popular_product()] = 1
+        items = [{"product_id": product_id, "quantity": quantity} for product_id, quantity in self.cart.items()]
+        success, result = place_order(self.customer_id, items, "Credit Card", "1 Load Test Way")
+        self.cart = {}
+        return _write_outcome(success, result, CHECKOUT_ERROR_PREFIX)
+
+    def my_orders(self):
+        orders = OrderRepo.for_customer(self.customer_id).to_df()
+        if not orders.empty:
+            OrderRepo.items(int(orders["order_id"].iloc[0]))
+        return "ok"
+
+class Admin:
+    """One simulated back-office user: overview, reports, order list and stock updates."""
+
+    def __init__(self, data, rng):
+        self.data = data
+        self.rng = rng
+        self.operations = [
+            ("inventory_overview", self.inventory_overview, 30),
+            ("sales_summary", self.sales_summary, 15),
+            ("top_products", self.top_products, 10),
+            ("category_sales", self.category_sales, 10),
+            ("order_list", self.order_list, 25),
+            ("stock_update", self.stock_update, 10),
+        ]
+
+    def inventory_overview(self):
+        run_parallel(
+            lambda: ProductRepo.inventory_summary().first(),
+            lambda: ProductRepo.low_stock(10).to_df(),
+            lambda: fetch_data_as_df("""
+                SELECT it.transaction_date, p.name, it.transaction_type, it.quantity_change, it.notes
+                FROM Inventory_Transaction it
+                JOIN Product p ON it.product_id = p.product_id
+                ORDER BY it.transaction_date DESC
+                LIMIT 10
+            """),
+        )
+        return "ok"
+
+    def report_window(self):
+        days = self.rng.choice([7, 30, 90, 365])
+        return date.today() - timedelta(days=days), date.today()
+
+    def sales_summary(self):
+        reports.sales_summary(get_router(), *self.report_window(), _NoProgress())
+        return "ok"
+
+    def top_products(self):
+        reports.top_products(get_router(), 10, _NoProgress())
+        return "ok"
+
+    def category_sales(self):
+        reports.category_sales(get_router(), *self.report_window(), _NoProgress())
+        return "ok"
+
+    def order_list(self):
+        estimate_row_count("Orders")
+        fetch_keyset_page("""
+            SELECT o.order_id, c.name as customer_name, o.order_date, o.total_amount,
+                   o.status, o.payment_status, o.payment_method
+            FROM Orders o
+            JOIN Customer c ON o.customer_id = c.customer_id
+        """, [("o.order_date", "order_date"), ("o.order_id", "order_id")], 50)
+        return "ok"
+
+    def stock_update(self):
+        products = self.data["products"]
+        product_id = products[skewed_index(len(products), POPULARITY_SKEW, self.rng)]
+        success, result = move_stock(product_id, self.rng.randint(1, 50), "purchase", "load test restock")
+        return _write_outcome(success, result, STOCK_ERROR_PREFIX)
+
+def run_user(user, recorder, deadline, think_s):
+    weights = [weight for _, _, weight in user.operations]
+    while time.monotonic() < deadline:
+        op, fn, _ = user.rng.choices(user.operations, weights)[0]
+        start = time.perf_counter()
+        try:
+            outcome = fn()
+        except Exception:
+            outcome = "error"
+        recorder.record(op, time.perf_counter() - start, outcome)
+        if think_s:
+            time.sleep(user.rng.expovariate(1 / think_s))
+
+def print_table(operations):
+    print(f"{'operation':<20}{'calls':>9}{'errors':>8}{'rejected':>10}{'ops/s':>9}{'p50 ms':>9}{'p95 ms':>9}"
+          f"{'p99 ms':>9}")
+    for op, stats in operations.items():
+        print(f"{op:<20}{stats['calls']:>9,}{stats['errors']:>8,}{stats['rejected']:>10,}"
+              f"{stats['throughput_per_s']:>9.1f}{stats['p50_ms']:>9.1f}{stats['p95_ms']:>9.1f}{stats['p99_ms']:>9.1f}")
+
+def compare(operations, baseline_path, tolerance):
+    """Prints p95, throughput and error changes against a saved run; returns the operations that regressed."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)["operations"]
+    regressed = []
+    print(f"\nCompared with {baseline_path} (tolerance {tolerance:.0%}):")
+    for op, stats in operations.items():
+        before = baseline.get(op)
+        if before is None:
+            print(f"{op:<20} new operation")
+            continue
+        p95_change = stats["p95_ms"] / before["p95_ms"] - 1 if before["p95_ms"] else 0.0
+        rate_change = stats["throughput_per_s"] / before["throughput_per_s"] - 1 if before["throughput_per_s"] else 0.0
+        more_errors = stats["errors"] > before.get("errors", 0)
+        worse = p95_change > tolerance or rate_change < -tolerance or more_errors
+        if worse:
+            regressed.append(op)
+        print(f"{op:<20} p95 {before['p95_ms']:8.1f} -> {stats['p95_ms']:8.1f} ms ({p95_change:+.0%}), "
+              f"throughput {rate_change:+.0%}, errors {before.get('errors', 0):,} -> {stats['errors']:,}"
+              f"{'  REGRESSION' if worse else ''}")
+    return regressed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--orders", type=int, default=10_000_000)
+    parser.add_argument("--customers", type=int, default=200_000)
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse the existing benchmark database")
+    parser.add_argument("--shoppers", type=int, default=16, help="Concurrent simulated customers")
+    parser.add_argument("--admins", type=int, default=2, help="Concurrent simulated admins")
+    parser.add_argument("--duration", type=float, default=60, help="Seconds to run the load")
+    parser.add_argument("--think-ms", type=float, default=0, help="Mean pause between a user's operations")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/load_test_<time>.json)")
+    parser.add_argument("--compare", help="Earlier results file to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed p95/throughput change before flagging")
+    args = parser.parse_args()
+
+    if not args.skip_seed:
+        seed(args)
+    data = load_dataset()
+    users = args.shoppers + args.admins
+    use_bench_database(pool_size=users + 4)
+
+    # Turn the app's swallowed database errors into exceptions run_user records
+    st.error = _raise_app_error
+    recorder = Recorder()
+    rng = make_rng(args.seed)
+    sessions = ([Shopper(data, make_rng(rng.random())) for _ in range(args.shoppers)]
+                + [Admin(data, make_rng(rng.random())) for _ in range(args.admins)])
+    print(f"Running {args.shoppers} shoppers and {args.admins} admins for {args.duration:.0f} s "
+          f"against {len(data['products']):,} products and {data['orders']:,} orders...")
+    deadline = time.monotonic() + args.duration
+    threads = [threading.Thread(target=run_user, args=(user, recorder, deadline, args.think_ms / 1000))
+               for user in sessions]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    operations = recorder.summary(elapsed)
+    print_table(operations)
+    total = sum(stats["calls"] for stats in operations.values())
+    errors = sum(stats["errors"] for stats in operations.values())
+    print(f"{total:,} operations in {elapsed:.1f} s ({total / elapsed:,.0f}/s), {errors:,} errors")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"load_test_{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({
+            "finished_at": datetime.now().isoformat(timespec="seconds"),
+            "settings": {"shoppers": args.shoppers, "admins": args.admins, "duration_s": args.duration,
+                         "think_ms": args.think_ms, "seed": args.seed},
+            "dataset": {"products": len(data["products"]), "customers": len(data["customers"]),
+                        "orders": data["orders"]},
+            "elapsed_s": elapsed,
+            "operations": operations,
+        }, f, indent=2)
+    print(f"Results saved to {output}")
+
+    regressed = compare(operations, args.compare, args.tolerance) if args.compare else []
+    raise SystemExit(1 if regressed or errors else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Hammers one SKU with concurrent stock movements and checks nothing was lost.
+
+Many threads call stock_movements.move_stock on the same product with random
+stock-in and stock-out quantities. Afterwards the script verifies that:
+
+* final stock == starting stock + sum of the accepted movements,
+* stock never went negative (every rejected movement was a stock-out),
+* the Inventory_Transaction rows chain: each stock_before equals the
+  previous row's stock_after.
+
+    python benchmarks/stress_stock_movements.py --threads 32 --moves 200
+"""
+import argparse
+import threading
+import time
+
+from common import connect, create_bench_database, make_rng, use_bench_database
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--moves", type=int, default=200, help="Movements per thread")
+    parser.add_argument("--start-stock", type=int, default=50)
+    parser.add_argument("--skip-setup", action="store_true", help="Reuse the existing benchmark database")
+    args = parser.parse_args()
+
+    if not args.skip_setup:
+        create_bench_database()
+    use_bench_database(pool_size=args.threads)
+    from stock_movements import move_stock
+
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute("SELECT product_id FROM Product ORDER BY product_id LIMIT 1")
+    product_id = cursor.fetchone()[0]
+    cursor.execute("SELECT IFNULL(MAX(transaction_id), 0) FROM Inventory_Transaction")
+    first_txn = cursor.fetchone()[0]
+    cursor.execute("UPDATE Product SET stock_quantity = %s WHERE product_id = %s", (args.start_stock, product_id))
+    conn.commit()
+
+    accepted = []
+    rejected = []
+    lock = threading.Lock()
+
+    def worker(seed):
+        rng = make_rng(seed)
+        for _ in range(args.moves):
+            change = rng.choice([-3, -2, -1, 1, 2, 3])
+            kind = "purchase" if change > 0 else "sale"
+            success, result = move_stock(product_id, change, kind, "stress test")
+            with lock:
+                (accepted if success else rejected).append((change, result))
+
+    threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(args.threads)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    # The commit after the setup UPDATE ended that transaction, so this read sees every movement
+    cursor.execute("SELECT stock_quantity FROM Product WHERE product_id = %s", (product_id,))
+    final_stock = cursor.fetchone()[0]
+    cursor.execute("""
+        SELECT quantity_change, stock_before, stock_after
+        FROM Inventory_Transaction
+        WHERE product_id = %s AND transaction_id > %s
+        ORDER BY transaction_id
+    """, (product_id, first_txn))
+    ledger = cursor.fetchall()
+    cursor.close()
+    conn.close()
+
+    expected = args.start_stock + sum(change for change, _ in accepted)
+    broken_links = sum(1 for prev, row in zip(ledger, ledger[1:]) if row[1] != prev[2])
+    bad_rows = sum(1 for change, before, after in ledger if before + change != after or after < 0)
+    bad_rejections = [r for change, r in rejected if change > 0]
+
+    total = args.threads * args.moves
+    print(f"{total:,} movements in {elapsed:.2f}s ({total / elapsed:,.0f}/s): "
+          f"{len(accepted):,} accepted, {len(rejected):,} rejected")
+    print(f"final stock {final_stock}, expected {expected}")
+    print(f"ledger rows {len(ledger):,}, broken links {broken_links}, inconsistent rows {bad_rows}")
+
+    ok = (final_stock == expected and len(ledger) == len(accepted)
+          and ledger and ledger[0][1] == args.start_stock
+          and broken_links == 0 and bad_rows == 0 and not bad_rejections)
+    print("PASS" if ok else "FAIL")
+    raise SystemExit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
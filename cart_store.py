@@ -0,0 +1,196 @@
+import time
+
+import mysql.connector
+import streamlit as st
+from db_connection import get_connection
+
+# Seconds a cart change may sit in the session before it is written to Cart_Item.
+CART_FLUSH_INTERVAL = 10
+
+def get_cart():
+    """Returns the session cart: {product_id: {'product_id', 'name', 'price', 'quantity'}}."""
+    if not isinstance(st.session_state.get('cart'), dict):
+        st.session_state.cart = {}
+    return st.session_state.cart
+
+def mark_dirty():
+    st.session_state.cart_dirty = True
+
+def add_item(product_id, name, price, quantity=1):
+    """Adds a product to the session cart; returns the new quantity."""
+    cart = get_cart()
+    product_id = int(product_id)
+    item = cart.get(product_id)
+    if item:
+        item['quantity'] += quantity
+    else:
+        item = cart[product_id] = {
+            'product_id': product_id,
+            'name': name,
+            'price': float(price),
+            'quantity': quantity
+        }
+    mark_dirty()
+    return item['quantity']
+
+def set_quantity(product_id, quantity):
+    item = get_cart().get(product_id)
+    if item and item['quantity'] != quantity:
+        item['quantity'] = quantity
+        mark_dirty()
+
+def remove_item(product_id):
+    if get_cart().pop(product_id, None):
+        mark_dirty()
+
+def clear_cart():
+    st.session_state.cart = {}
+    mark_dirty()
+
+def _load_saved_cart(customer_id):
+    conn = None
+    cursor = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("""
+            SELECT ci.product_id, p.name, p.price, ci.quantity
+            FROM Cart c
+            JOIN Cart_Item ci ON ci.cart_id = c.cart_id
+            JOIN Product p ON p.product_id = ci.product_id
+            WHERE c.customer_id = %s
+        """, (customer_id,))
+        return cursor.fetchall()
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+def load_cart(customer_id):
+    """Loads the customer's saved cart into the session, once per login.
+
+    Items already in the session (e.g. added in this tab before the saved cart
+    was read) win over the saved copy; saved items not in the session are
+    added, so carts from different sessions merge rather than overwrite.
+    """
+    if st.session_state.get('cart_owner') == customer_id:
+        return
+    cart = get_cart()
+    try:
+        saved = _load_saved_cart(customer_id)
+    except mysql.connector.Error as err:
+        st.warning(f"Could not load your saved cart: {err}")
+        return
+    for row in saved:
+        if row['product_id'] not in cart:
+            cart[row['product_id']] = {
+                'product_id': row['product_id'],
+                'name': row['name'],
+                'price': float(row['price']),
+                'quantity': row['quantity']
+            }
+    st.session_state.cart_owner = customer_id
+    st.session_state.cart_flushed_at = time.monotonic()
+    if len(cart) != len(saved):
+        mark_dirty()
+
+def flush_cart(customer_id, force=False):
+    """Writes the session cart to Cart/Cart_Item if it changed (write-behind).
+
+    Without ``force`` the write is skipped until CART_FLUSH_INTERVAL seconds
+    have passed since the last one, so a burst of add-to-cart clicks costs a
+    single round of writes. Callers force a flush at the points after which
+    no further rerun may come: page switches, checkout and logout.
+    """
+    if not customer_id or not st.session_state.get('cart_dirty'):
+        return
+    if not force and time.monotonic() - st.session_state.get('cart_flushed_at', 0) < CART_FLUSH_INTERVAL:
+        return
+
+    items = list(get_cart().values())
+    conn = None
+    cursor = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO Cart (customer_id) VALUES (%s)
+            ON DUPLICATE KEY UPDATE updated_at = CURRENT_TIMESTAMP, cart_id = LAST_INSERT_ID(cart_id)
+        """, (customer_id,))
+        cart_id = cursor.lastrowid
+
+        if items:
+            placeholders = ", ".join(["%s"] * len(items))
+            cursor.execute(f"DELETE FROM Cart_Item WHERE cart_id = %s AND product_id NOT IN ({placeholders})",
+                           (cart_id,) + tuple(item['product_id'] for item in items))
+            cursor.executemany("""
+                INSERT INTO Cart_Item (cart_id, product_id, quantity, price_at_add)
+                VALUES (%s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE quantity = VALUES(quantity)
+            """, [(cart_id, item['product_id'], int(item['quantity']), item['price']) for item in items])
+        else:
+            cursor.execute("DELETE FROM Cart_Item WHERE cart_id = %s", (cart_id,))
+        conn.commit()
+        st.session_state.cart_dirty = False
+        st.session_state.cart_flushed_at = time.monotonic()
+    except mysql.connector.Error as err:
+        if conn:
+            conn.rollback()
+        # Keep the cart dirty so the next rerun retries the write
+        st.warning(f"Could not save your cart: {err}")
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+def revalidate_cart():
+    """Refreshes prices and availability for every cart item with one query.
+
+    Prices are updated to the current catalogue price, quantities are capped
+    at available stock and unavailable products are removed. Returns a list
+    of messages describing what changed.
+    """
+    cart = get_cart()
+    if not cart:
+        return []
+
+    product_ids = list(cart)
+    placeholders = ", ".join(["%s"] * len(product_ids))
+    conn = None
+    cursor = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(f"""
+            SELECT product_id, name, price, stock_quantity, status
+            FROM Product
+            WHERE product_id IN ({placeholders})
+        """, tuple(product_ids))
+        current = {row['product_id']: row for row in cursor.fetchall()}
+    except mysql.connector.Error as err:
+        st.warning(f"Could not check your cart against current stock: {err}")
+        return []
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+    notices = []
+    for product_id in product_ids:
+        item = cart[product_id]
+        row = current.get(product_id)
+        if row is None or row['status'] != 'active' or row['stock_quantity'] <= 0:
+            notices.append(f"{item['name']} is no longer available and was removed.")
+            remove_item(product_id)
+            continue
+        price = float(row['price'])
+        if price != item['price']:
+            notices.append(f"{item['name']} price changed from ${item['price']:.2f} to ${price:.2f}.")
+            item['price'] = price
+        if item['quantity'] > row['stock_quantity']:
+            notices.append(f"Only {row['stock_quantity']} of {item['name']} in stock; quantity reduced.")
+            set_quantity(product_id, row['stock_quantity'])
+    return notices
@@ -0,0 +1,253 @@
+import csv
+import os
+import tempfile
+
+import mysql.connector
+import pandas as pd
+from db_connection import get_connection, fetch_data_as_df
+from query_cache import invalidate_tables
+
+REQUIRED_COLUMNS = ["sku", "name", "price"]
+OPTIONAL_COLUMNS = ["description", "cost_price", "stock_quantity", "min_stock_level",
+                    "category_name", "supplier", "barcode", "image_url", "status"]
+# Stock is only set for new SKUs; existing stock changes go through the stock ledger.
+UPDATABLE_COLUMNS = ["name", "description", "price", "cost_price", "min_stock_level",
+                     "category_id", "supplier", "barcode", "image_url", "status"]
+PRODUCT_STATUSES = {"active", "discontinued", "out_of_stock"}
+INSERT_COLUMNS = ["sku", "name", "description", "price", "cost_price", "stock_quantity",
+                  "min_stock_level", "category_id", "supplier", "barcode", "image_url", "status"]
+EXPORT_COLUMNS = ["product_id", "sku", "name", "description", "price", "cost_price", "stock_quantity",
+                  "min_stock_level", "category_name", "supplier", "barcode", "image_url", "status"]
+MAX_REPORTED_ERRORS = 10000
+
+def load_category_map():
+    """Returns {lower-cased category name: category_id}."""
+    categories = fetch_data_as_df("SELECT category_id, category_name FROM Category")
+    return {str(name).strip().lower(): int(cid) for name, cid in zip(categories['category_name'], categories['category_id'])}
+
+def iter_import_chunks(uploaded_file, file_name, chunk_size):
+    """Yields the uploaded CSV or Parquet file as DataFrames of ``chunk_size`` rows."""
+    if file_name.lower().endswith(".parquet"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError("Parquet import needs pyarrow (pip install pyarrow).")
+        for batch in pq.ParquetFile(uploaded_file).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(uploaded_file, chunksize=chunk_size, dtype=str, keep_default_na=False)
+
+def _text(chunk, column):
+    if column not in chunk.columns:
+        return pd.Series("", index=chunk.index)
+    return chunk[column].fillna("").astype(str).str.strip()
+
+def _number(chunk, column):
+    """Numeric column with blanks as NaN; the second value flags unparseable cells."""
+    raw = _text(chunk, column)
+    values = pd.to_numeric(raw.where(raw != ""), errors="coerce")
+    return values, (raw != "") & values.isna()
+
+def _blank_to_nan(values):
+    return values.where(values != "")
+
+def _nullable(values):
+    return [None if pd.isna(v) else (v.item() if hasattr(v, "item") else v) for v in values]
+
+def validate_chunk(chunk, category_map, first_row):
+    """Validates one chunk and returns (rows ready for INSERT, per-row errors).
+
+    ``first_row`` is the file line number of the chunk's first row, so error
+    reports point at the line the supplier needs to fix.
+    """
+    chunk = chunk.rename(columns=lambda c: str(c).strip().lower()).reset_index(drop=True)
+    missing = [c for c in REQUIRED_COLUMNS if c not in chunk.columns]
+    if missing:
+        raise ValueError(f"Missing required column(s): {', '.join(missing)}")
+
+    problems = pd.Series("", index=chunk.index)
+    def flag(mask, message):
+        problems[mask] = problems[mask] + message + "; "
+
+    sku = _text(chunk, "sku")
+    name = _text(chunk, "name")
+    flag(sku == "", "sku is required")
+    flag(name == "", "name is required")
+
+    price, bad_price = _number(chunk, "price")
+    flag(bad_price | price.isna(), "price must be a number")
+    flag(price < 0, "price cannot be negative")
+
+    cost_price, bad_cost = _number(chunk, "cost_price")
+    flag(bad_cost, "cost_price must be a number")
+
+    stock, bad_stock = _number(chunk, "stock_quantity")
+    flag(bad_stock | (stock < 0) | (stock.notna() & (stock % 1 != 0)), "stock_quantity must be a whole number >= 0")
+    min_stock, bad_min = _number(chunk, "min_stock_level")
+    flag(bad_min | (min_stock < 0) | (min_stock.notna() & (min_stock % 1 != 0)), "min_stock_level must be a whole number >= 0")
+
+    category_name = _text(chunk, "category_name")
+    category_id = category_name.str.lower().map(category_map)
+    flag((category_name != "") & category_id.isna(), "unknown category_name")
+
+    status = _text(chunk, "status").str.lower().replace("", "active")
+    flag(~status.isin(PRODUCT_STATUSES), "status must be active, discontinued or out_of_stock")
+
+    valid = problems == ""
+    errors = [{"row": first_row + i, "sku": sku[i], "error": problems[i].rstrip("; ")}
+              for i in chunk.index[~valid]]
+
+    columns = [
+        sku[valid],
+        name[valid],
+        _text(chunk, "description")[valid],
+        price[valid].round(2),
+        cost_price[valid].round(2),
+        stock[valid].fillna(0).astype(int),
+        min_stock[valid].fillna(10).astype(int),
+        category_id[valid].astype("Int64"),
+        _blank_to_nan(_text(chunk, "supplier")[valid]),
+        _blank_to_nan(_text(chunk, "barcode")[valid]),
+        _blank_to_nan(_text(chunk, "image_url")[valid]),
+        status[valid],
+    ]
+    rows = list(zip(*(_nullable(col.tolist()) for col in columns)))
+    return rows, errors
+
+def build_upsert_sql(present_columns):
+    """INSERT ... ON DUPLICATE KEY UPDATE that only overwrites columns the file supplied."""
+    present = set(present_columns)
+    if "category_name" in present:
+        present.add("category_id")
+    updates = [c for c in UPDATABLE_COLUMNS if c in present]
+    placeholders = ", ".join(["%s"] * len(INSERT_COLUMNS))
+    return (f"INSERT INTO Product ({', '.join(INSERT_COLUMNS)}) VALUES ({placeholders}) "
+            "ON DUPLICATE KEY UPDATE " + ", ".join(f"{c} = VALUES({c})" for c in updates))
+
+def import_products(uploaded_file, file_name, chunk_size=5000, on_progress=None):
+    """Streams a supplier catalogue into Product, upserting by sku.
+
+    Each chunk is validated, then written with one batched INSERT ... ON
+    DUPLICATE KEY UPDATE and committed, so memory stays flat and a bad chunk
+    doesn't undo the ones before it. ``on_progress(rows_read)`` is called
+    after every chunk. Returns {'rows', 'imported', 'errors'} where errors is
+    a DataFrame of (row, sku, error).
+    """
+    category_map = load_category_map()
+    errors = []
+    rows_read = 0
+    imported = 0
+    upsert_sql = None
+    # Reported rows are 1-based file lines; a CSV's first line is its header, Parquet has none
+    header_lines = 0 if file_name.lower().endswith(".parquet") else 1
+
+    conn = None
+    cursor = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        for chunk in iter_import_chunks(uploaded_file, file_name, chunk_size):
+            first_row = rows_read + header_lines + 1
+            rows, chunk_errors = validate_chunk(chunk, category_map, first_row)
+            if upsert_sql is None:
+                upsert_sql = build_upsert_sql(str(c).strip().lower() for c in chunk.columns)
+            rows_read += len(chunk)
+
+            if rows:
+                try:
+                    cursor.executemany(upsert_sql, rows)
+                    conn.commit()
+                    imported += len(rows)
+                except mysql.connector.Error as err:
+                    conn.rollback()
+                    chunk_errors.append({"row": first_row, "sku": "",
+                                         "error": f"rows {first_row}-{first_row + len(chunk) - 1} not imported: {err}"})
+
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.extend(chunk_errors[:MAX_REPORTED_ERRORS - len(errors)])
+            if on_progress:
+                on_progress(rows_read)
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+        if imported:
+            invalidate_tables("Product")
+
+    return {
+        "rows": rows_read,
+        "imported": imported,
+        "errors": pd.DataFrame(errors, columns=["row", "sku", "error"]),
+    }
+
+def iter_export_chunks(chunk_size=10000, fetch=fetch_data_as_df):
+    """Yields the catalogue as DataFrames, paging by product_id so no chunk is re-scanned.
+
+    ``fetch(query, params)`` runs each page; background jobs pass one that
+    raises on errors instead of reporting them in the page.
+    """
+    last_id = 0
+    while True:
+        chunk = fetch(f"""
+            SELECT p.product_id, p.sku, p.name, p.description, p.price, p.cost_price, p.stock_quantity,
+                   p.min_stock_level, c.category_name, p.supplier, p.barcode, p.image_url, p.status
+            FROM Product p
+            LEFT JOIN Category c ON p.category_id = c.category_id
+            WHERE p.product_id > %s
+            ORDER BY p.product_id
+            LIMIT {int(chunk_size)}
+        """, (last_id,))
+        if chunk.empty:
+            return
+        yield chunk
+        last_id = int(chunk['product_id'].iloc[-1])
+        if len(chunk) < chunk_size:
+            return
+
+def export_products(fmt="csv", chunk_size=10000, fetch=fetch_data_as_df, on_progress=None):
+    """Writes the catalogue to a temporary CSV or Parquet file chunk by chunk.
+
+    The output uses the import column names, so it can be edited and
+    re-imported. ``on_progress(rows_written)`` is called after each chunk.
+    Returns the file path; the caller deletes it.
+    """
+    rows_written = 0
+    suffix = ".parquet" if fmt == "parquet" else ".csv"
+    fd, path = tempfile.mkstemp(prefix="products_", suffix=suffix)
+    os.close(fd)
+
+    if fmt == "parquet":
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            os.remove(path)
+            raise ValueError("Parquet export needs pyarrow (pip install pyarrow).")
+        writer = None
+        try:
+            for chunk in iter_export_chunks(chunk_size, fetch):
+                chunk[["price", "cost_price"]] = chunk[["price", "cost_price"]].astype(float)
+                table = pa.Table.from_pandas(chunk[EXPORT_COLUMNS], preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table.cast(writer.schema))
+                rows_written += len(chunk)
+                if on_progress:
+                    on_progress(rows_written)
+        finally:
+            if writer:
+                writer.close()
+    else:
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            out = csv.writer(f)
+            out.writerow(EXPORT_COLUMNS)
+            for chunk in iter_export_chunks(chunk_size, fetch):
+                chunk = chunk[EXPORT_COLUMNS].astype(object)
+                # Blank cells rather than "nan"/"None", so the file re-imports cleanly
+                chunk = chunk.where(chunk.notna(), "")
+                out.writerows(chunk.itertuples(index=False, name=None))
+                rows_written += len(chunk)
+                if on_progress:
+                    on_progress(rows_written)
+    return path
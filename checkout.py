@@ -0,0 +1,87 @@
+import mysql.connector
+from db_connection import get_connection
+
+def place_order(customer_id, cart_items, payment_method=None, shipping_address=None):
+    """Places a whole cart as one order inside a single transaction.
+
+    Stock rows are locked with SELECT ... FOR UPDATE and validated before
+    anything is written. Order_Item rows go in with one multi-row INSERT; the
+    update_stock_on_sale trigger then decrements stock and writes the
+    Inventory_Transaction rows, so stock is not decremented again here.
+    Items are charged the price read under the lock, not the price the cart
+    captured, and the customer's saved Cart_Item rows are cleared in the same
+    transaction.
+
+    Returns (True, order_id) on success or (False, message) on failure, in
+    which case nothing is written.
+    """
+    quantities = {}
+    for item in cart_items:
+        product_id = int(item['product_id'])
+        quantities[product_id] = quantities.get(product_id, 0) + int(item['quantity'])
+    if not quantities:
+        return False, "Your cart is empty."
+
+    # Lock rows in primary key order so concurrent checkouts cannot deadlock.
+    product_ids = sorted(quantities)
+
+    conn = None
+    cursor = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor(dictionary=True)
+        conn.start_transaction()
+
+        placeholders = ", ".join(["%s"] * len(product_ids))
+        cursor.execute(f"""
+            SELECT product_id, name, price, stock_quantity, status
+            FROM Product
+            WHERE product_id IN ({placeholders})
+            ORDER BY product_id
+            FOR UPDATE
+        """, tuple(product_ids))
+        locked = {row['product_id']: row for row in cursor.fetchall()}
+
+        problems = []
+        for product_id in product_ids:
+            row = locked.get(product_id)
+            if row is None or row['status'] != 'active':
+                problems.append(f"Product #{product_id} is no longer available")
+            elif row['stock_quantity'] < quantities[product_id]:
+                problems.append(f"{row['name']}: only {row['stock_quantity']} left in stock")
+        if problems:
+            conn.rollback()
+            return False, "; ".join(problems)
+
+        prices = {pid: locked[pid]['price'] for pid in product_ids}
+        total_amount = sum(prices[pid] * quantities[pid] for pid in product_ids)
+        cursor.execute("""
+            INSERT INTO Orders (customer_id, order_date, total_amount, status, payment_status,
+                                payment_method, shipping_address)
+            VALUES (%s, NOW(), %s, 'pending', 'pending', %s, %s)
+        """, (customer_id, total_amount, payment_method, shipping_address))
+        order_id = cursor.lastrowid
+
+        # executemany rewrites this into a single multi-row INSERT.
+        cursor.executemany("""
+            INSERT INTO Order_Item (order_id, product_id, quantity, price_at_purchase)
+            VALUES (%s, %s, %s, %s)
+        """, [(order_id, pid, quantities[pid], prices[pid]) for pid in product_ids])
+
+        cursor.execute("""
+            DELETE ci FROM Cart_Item ci
+            JOIN Cart c ON c.cart_id = ci.cart_id
+            WHERE c.customer_id = %s
+        """, (customer_id,))
+
+        conn.commit()
+        return True, order_id
+    except mysql.connector.Error as err:
+        if conn:
+            conn.rollback()
+        return False, f"Checkout failed: {err}"
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
@@ -1,13 +1,47 @@
 import streamlit as st
 import pandas as pd
-from db_connection import fetch_data_as_df, execute_query
+from repositories import OrderRepo, CustomerRepo
+from checkout import place_order
+from query_cache import cached_fetch_df, invalidate_tables
+from product_search import search_condition
+from image_cache import show_image
+from pagination import fetch_keyset_page, fetch_offset_page
+from cart_store import get_cart, add_item, set_quantity, remove_item, clear_cart, load_cart, flush_cart, revalidate_cart
+
+GRID_COLUMNS = 3
+GRID_PAGE_SIZES = [12, 24, 48]
+# Products in the first rows of the grid, whose images are loaded up front.
+EAGER_IMAGES = 6
+
+BROWSE_SELECT = """
+    SELECT p.product_id, p.name, p.description, p.price, p.stock_quantity,
+           p.image_url, p.created_at, c.category_name
+    FROM Product p
+    LEFT JOIN Category c ON p.category_id = c.category_id
+"""
+RELEVANCE = "Relevance"
+# Sort label -> (keyset order_by, descending). product_id breaks ties so the seek key is unique.
+SORT_OPTIONS = {
+    "Name (A-Z)": ([("p.name", "name"), ("p.product_id", "product_id")], False),
+    "Price: Low to High": ([("p.price", "price"), ("p.product_id", "product_id")], False),
+    "Price: High to Low": ([("p.price", "price"), ("p.product_id", "product_id")], True),
+    "Newest": ([("p.created_at", "created_at"), ("p.product_id", "product_id")], True),
+}
 
 def customer_dashboard():
     st.title("🛍️ Customer Portal")
     st.sidebar.header("Customer Navigation")
 
+    customer_id = st.session_state.get('user_id')
+    load_cart(customer_id)
+
     menu = ["🛒 Browse Products", "🛍️ Cart", "📦 My Orders", "👤 Profile"]
     choice = st.sidebar.radio("Go to", menu)
+    # Switching pages is a natural save point: the customer may not come back
+    # for another rerun before the session ends.
+    if st.session_state.get('customer_page') != choice:
+        st.session_state.customer_page = choice
+        flush_cart(customer_id, force=True)
 
     if choice == "🛒 Browse Products":
         browse_products()
@@ -18,61 +52,78 @@ def customer_dashboard():
     elif choice == "👤 Profile":
         profile()
 
+    # Write-behind: between page switches and checkouts, cart edits are saved at
+    # most every CART_FLUSH_INTERVAL seconds
+    flush_cart(customer_id)
+
 def browse_products():
     st.subheader("🛒 Browse Products")
     
+    # Get categories for filter
+    categories = cached_fetch_df("SELECT category_id, category_name FROM Category ORDER BY category_name", tables=("Category",))
+    category_map = dict(zip(categories['category_name'], categories['category_id'])) if not categories.empty else {}
+    
     # Search and filter
-    col1, col2 = st.columns(2)
+    col1, col2, col3, col4 = st.columns([3, 2, 2, 1])
     with col1:
         search_term = st.text_input("Search products...")
     with col2:
-        category_filter = st.selectbox("Filter by Category", ["All Categories"])
-    
-    # Get categories for filter
-    categories = fetch_data_as_df("SELECT category_id, category_name FROM Category ORDER BY category_name")
-    if not categories.empty:
-        category_map = dict(zip(categories['category_name'], categories['category_id']))
         category_filter = st.selectbox("Filter by Category", ["All Categories"] + list(category_map.keys()))
     
-    # Fetch products
-    if category_filter == "All Categories":
-        query = """
-            SELECT p.product_id, p.name, p.description, p.price, p.stock_quantity, 
-                   p.image_url, c.category_name
-            FROM Product p
-            LEFT JOIN Category c ON p.category_id = c.category_id
-            WHERE p.stock_quantity > 0 AND p.status = 'active'
-        """
-        params = ()
-    else:
-        category_id = category_map.get(category_filter)
-        query = """
-            SELECT p.product_id, p.name, p.description, p.price, p.stock_quantity, 
-                   p.image_url, c.category_name
-            FROM Product p
-            LEFT JOIN Category c ON p.category_id = c.category_id
-            WHERE p.stock_quantity > 0 AND p.status = 'active' AND p.category_id = %s
-        """
-        params = (category_id,)
+    conditions = ["p.stock_quantity > 0", "p.status = 'active'"]
+    params = ()
+    
+    if category_filter != "All Categories":
+        conditions.append("p.category_id = %s")
+        params = (category_map.get(category_filter),)
     
-    if search_term:
-        query += " AND (p.name LIKE %s OR p.description LIKE %s)"
-        params = params + (f"%{search_term}%", f"%{search_term}%")
+    search = search_condition(search_term) if search_term else None
+    if search_term and not search:
+        st.caption("Type at least 2 characters to search.")
+    order_sql, order_params = None, ()
+    if search:
+        where_sql, where_params, order_sql, order_params = search
+        conditions.append(where_sql)
+        params = params + where_params
     
-    query += " ORDER BY p.name"
+    # Relevance is only offered for FULLTEXT searches, which have a score to order by
+    sort_options = ([RELEVANCE] if order_params else []) + list(SORT_OPTIONS)
+    with col3:
+        sort = st.selectbox("Sort by", sort_options)
+    with col4:
+        page_size = st.selectbox("Per page", GRID_PAGE_SIZES)
     
-    products = fetch_data_as_df(query, params)
+    # Loaded pages are kept in the session, so reruns (e.g. an Add to Cart click)
+    # don't re-query; changing any filter starts again from the first page.
+    signature = (category_filter, search_term.strip(), sort, page_size)
+    grid = st.session_state.get('browse_grid')
+    if grid is None or grid['signature'] != signature:
+        grid = st.session_state.browse_grid = {
+            'signature': signature,
+            'where': " AND ".join(conditions),
+            'params': params,
+            'order_sql': order_sql,
+            'order_params': order_params,
+            'sort': sort,
+            'page_size': page_size,
+            'products': None,
+            'cursor': None,
+            'has_more': True
+        }
+        load_more_products(grid)
     
+    products = grid['products']
     if not products.empty:
-        st.write(f"Found {len(products)} products")
+        st.write(f"Showing {len(products)} products" + (" (more available)" if grid['has_more'] else ""))
         
         # Display products in grid
-        cols = st.columns(3)
+        cols = st.columns(GRID_COLUMNS)
         for idx, row in products.iterrows():
-            with cols[idx % 3]:
+            with cols[idx % GRID_COLUMNS]:
                 st.subheader(row['name'])
                 if row['image_url']:
-                    st.image(row['image_url'], width=200)
+                    # Rows below the first couple are lazy-loaded by the browser
+                    show_image(row['image_url'], 200, lazy=idx >= EAGER_IMAGES)
                 st.write(row['description'][:100] + "..." if len(row['description']) > 100 else row['description'])
                 st.write(f"**Price:** ${row['price']:.2f}")
                 st.write(f"**Stock:** {row['stock_quantity']} units")
@@ -80,29 +131,38 @@ def browse_products():
                 
                 if st.button(f"Add to Cart - {row['name']}", key=f"add_{row['product_id']}"):
                     add_to_cart(row['product_id'], row['name'], row['price'])
+        
+        if grid['has_more']:
+            # on_click runs before the rerun, so the new page renders straight away
+            st.button("⬇️ Load more", on_click=load_more_products, args=(grid,), use_container_width=True)
     else:
         st.info("No products found matching your criteria.")
 
-def add_to_cart(product_id, product_name, price):
-    """Add product to cart (simplified version)"""
-    if 'cart' not in st.session_state:
-        st.session_state.cart = []
-    
-    # Check if product already in cart
-    for item in st.session_state.cart:
-        if item['product_id'] == product_id:
-            item['quantity'] += 1
-            st.success(f"Added another {product_name} to cart!")
-            return
+def load_more_products(grid):
+    """Fetches the next page of the browse grid and appends it to the loaded products."""
+    loaded = grid['products']
+    if grid['sort'] == RELEVANCE:
+        query = f"{BROWSE_SELECT} WHERE {grid['where']} ORDER BY {grid['order_sql']}"
+        offset = 0 if loaded is None else len(loaded)
+        page, has_more = fetch_offset_page(query, grid['params'] + grid['order_params'], grid['page_size'], offset)
+    else:
+        order_by, descending = SORT_OPTIONS[grid['sort']]
+        page, grid['cursor'] = fetch_keyset_page(BROWSE_SELECT, order_by, grid['page_size'], after=grid['cursor'],
+                                                 where=grid['where'], params=grid['params'], descending=descending)
+        has_more = grid['cursor'] is not None
     
-    # Add new item to cart
-    st.session_state.cart.append({
-        'product_id': product_id,
-        'name': product_name,
-        'price': price,
-        'quantity': 1
-    })
-    st.success(f"Added {product_name} to cart!")
+    if loaded is not None:
+        # Offset pages can overlap if the catalogue changed in between
+        page = pd.concat([loaded, page]).drop_duplicates('product_id')
+    grid['products'] = page.reset_index(drop=True)
+    grid['has_more'] = has_more
+
+def add_to_cart(product_id, product_name, price):
+    """Add product to cart"""
+    if add_item(product_id, product_name, price) > 1:
+        st.success(f"Added another {product_name} to cart!")
+    else:
+        st.success(f"Added {product_name} to cart!")
 
 def my_orders():
     st.subheader("📦 My Orders")
@@ -112,13 +172,7 @@ def my_orders():
         st.error("Please login to view your orders.")
         return
     
-    orders = fetch_data_as_df("""
-        SELECT o.order_id, o.order_date, o.total_amount, o.status, 
-               o.payment_status, o.payment_method
-        FROM Orders o
-        WHERE o.customer_id = %s
-        ORDER BY o.order_date DESC
-    """, (customer_id,))
+    orders = OrderRepo.for_customer(customer_id).to_df()
     
     if not orders.empty:
         st.dataframe(orders, use_container_width=True)
@@ -127,12 +181,7 @@ def my_orders():
         selected_order_id = st.selectbox("Select Order to View Details", orders['order_id'])
         
         if selected_order_id:
-            order_items = fetch_data_as_df("""
-                SELECT oi.order_item_id, p.name, oi.quantity, oi.price_at_purchase, oi.subtotal
-                FROM Order_Item oi
-                JOIN Product p ON oi.product_id = p.product_id
-                WHERE oi.order_id = %s
-            """, (selected_order_id,))
+            order_items = OrderRepo.items(selected_order_id).to_df()
             
             if not order_items.empty:
                 st.write("Order Items:")
@@ -148,12 +197,9 @@ def profile():
         st.error("Please login to view your profile.")
         return
 
-    customer = fetch_data_as_df("""
-        SELECT * FROM Customer WHERE customer_id = %s
-    """, (customer_id,))
+    user = CustomerRepo.get(customer_id)
 
-    if not customer.empty:
-        user = customer.iloc[0]
+    if user:
         
         # Edit mode toggle
         edit_mode = st.checkbox("✏️ Edit Profile")
@@ -182,18 +228,12 @@ def profile():
                     cancel_button = st.form_submit_button("❌ Cancel")
                 
                 if submit_button:
-                    # Update profile
-                    update_query = """
-                        UPDATE Customer 
-                        SET name = %s, email = %s, phone = %s, city = %s, state = %s, pin = %s, address = %s
-                        WHERE customer_id = %s
-                    """
-                    try:
-                        execute_query(update_query, (name, email, phone, city, state, pin, address, customer_id))
-                        st.success("Profile updated successfully!")
+                    success, message = CustomerRepo.update_profile(customer_id, name, email, phone, city, state, pin, address)
+                    if success:
+                        st.success(message)
                         st.rerun()
-                    except Exception as e:
-                        st.error(f"Error updating profile: {e}")
+                    else:
+                        st.error(message)
                 
                 if cancel_button:
                     st.rerun()
@@ -216,17 +256,9 @@ def profile():
             st.write(f"Member since: {user['created_at']}")
             
             # Order statistics
-            order_stats = fetch_data_as_df("""
-                SELECT 
-                    COUNT(*) as total_orders,
-                    SUM(total_amount) as total_spent,
-                    MAX(order_date) as last_order_date
-                FROM Orders 
-                WHERE customer_id = %s
-            """, (customer_id,))
+            stats = OrderRepo.customer_stats(customer_id)
             
-            if not order_stats.empty:
-                stats = order_stats.iloc[0]
+            if stats:
                 st.markdown("---")
                 st.write("**Order Statistics**")
                 col1, col2, col3 = st.columns(3)
@@ -242,23 +274,35 @@ def profile():
 def cart():
     st.subheader("🛍️ Shopping Cart")
     
-    if 'cart' not in st.session_state or not st.session_state.cart:
+    customer_id = st.session_state.get('user_id')
+    cart_items = get_cart()
+    if not cart_items:
         st.info("Your cart is empty.")
         return
     
-    cart_items = st.session_state.cart
+    # One query refreshes every item's price and stock
+    notices = revalidate_cart()
+    for notice in notices:
+        st.warning(notice)
+    if notices:
+        # Reset quantity widgets so they show any clamped quantities
+        for product_id in cart_items:
+            st.session_state.pop(f"qty_{product_id}", None)
+    if not cart_items:
+        st.info("Your cart is empty.")
+        return
     
     # Display cart items
     total_amount = 0
-    for i, item in enumerate(cart_items):
+    for product_id, item in list(cart_items.items()):
         col1, col2, col3, col4, col5 = st.columns([3, 1, 1, 1, 1])
         
         with col1:
             st.write(f"**{item['name']}**")
         
         with col2:
-            quantity = st.number_input("Qty", min_value=1, value=item['quantity'], key=f"qty_{item['product_id']}")
-            item['quantity'] = quantity
+            quantity = st.number_input("Qty", min_value=1, value=item['quantity'], key=f"qty_{product_id}")
+            set_quantity(product_id, quantity)
         
         with col3:
             st.write(f"${item['price']:.2f}")
@@ -269,9 +313,9 @@ def cart():
             total_amount += subtotal
         
         with col5:
-            if st.button("🗑️", key=f"remove_{item['product_id']}"):
-                cart_items.pop(i)
-                st.session_state.cart = cart_items
+            if st.button("🗑️", key=f"remove_{product_id}"):
+                remove_item(product_id)
+                flush_cart(customer_id, force=True)
                 st.rerun()
     
     st.markdown("---")
@@ -280,46 +324,34 @@ def cart():
     col1, col2 = st.columns(2)
     with col1:
         if st.button("🔄 Clear Cart"):
-            st.session_state.cart = []
+            clear_cart()
+            flush_cart(customer_id, force=True)
             st.rerun()
     
     with col2:
         if st.button("💳 Checkout", type="primary"):
             if st.session_state.get('logged_in'):
+                # Persist pending edits first, so they survive a failed or abandoned checkout
+                flush_cart(customer_id, force=True)
                 # Create order
-                customer_id = st.session_state.get('user_id')
-                if customer_id and cart_items:
-                    try:
-                        # Insert order
-                        order_query = """
-                            INSERT INTO Orders (customer_id, order_date, total_amount, status, payment_status)
-                            VALUES (%s, NOW(), %s, 'pending', 'pending')
-                        """
-                        result = execute_query(order_query, (customer_id, total_amount), fetch_one=True)
-                        
-                        if result:
-                            order_id = result['order_id']
-                            
-                            # Insert order items
-                            for item in cart_items:
-                                item_query = """
-                                    INSERT INTO Order_Item (order_id, product_id, quantity, price_at_purchase, subtotal)
-                                    VALUES (%s, %s, %s, %s, %s)
-                                """
-                                execute_query(item_query, (order_id, item['product_id'], item['quantity'], item['price'], item['price'] * item['quantity']))
-                            
-                            # Update stock
-                            for item in cart_items:
-                                stock_query = "UPDATE Product SET stock_quantity = stock_quantity - %s WHERE product_id = %s"
-                                execute_query(stock_query, (item['quantity'], item['product_id']))
-                            
-                            # Clear cart
-                            st.session_state.cart = []
-                            st.success(f"Order placed successfully! Order ID: {order_id}")
-                            st.rerun()
-                        else:
-                            st.error("Failed to create order.")
-                    except Exception as e:
-                        st.error(f"Error during checkout: {e}")
+                notices = revalidate_cart()
+                if notices:
+                    # Let the customer review the changes before paying
+                    for notice in notices:
+                        st.warning(notice)
+                    st.info("Your cart was updated. Please review it and checkout again.")
+                elif customer_id and cart_items:
+                    success, result = place_order(customer_id, list(cart_items.values()))
+                    if success:
+                        invalidate_tables("Product", "Orders", "Order_Item", "Inventory_Transaction")
+                        # place_order already emptied the saved cart
+                        clear_cart()
+                        st.session_state.cart_dirty = False
+                        # Stock levels shown in the browse grid are now stale
+                        st.session_state.pop('browse_grid', None)
+                        st.success(f"Order placed successfully! Order ID: {result}")
+                        st.rerun()
+                    else:
+                        st.error(result)
             else:
                 st.error("Please login to checkout.")
@@ -1,6 +1,15 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import mysql.connector
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+import numpy as np
 import pandas as pd
+from db_pool import ConnectionPool
+from db_routing import ReplicaRouter
+from query_stats import record_query
 
 # Database connection details
 DB_CONFIG = {
@@ -10,56 +19,228 @@ DB_CONFIG = {
     "database": "retail_db"
 }
 
+# Connection pool settings
+POOL_CONFIG = {
+    "size": 10,              # Max open connections per Streamlit process
+    "max_lifetime": 1800,    # Seconds before a connection is recycled
+    "borrow_timeout": 10,    # Seconds to wait for a free connection
+    "statement_cache_size": 64  # Prepared statements kept open per connection (0 disables)
+}
+
+# Read replicas. Each entry overrides DB_CONFIG keys, e.g. {"host": "replica-1"}.
+# With none configured every query goes to the primary.
+REPLICA_CONFIGS = []
+
+REPLICA_ROUTING = {
+    "max_lag": 5,             # Seconds behind the primary before a replica is skipped
+    "lag_check_interval": 5,  # Seconds between replication lag checks per replica
+    "retry_after": 30         # Seconds to skip a replica that could not be reached
+}
+
+# Threads that run a page's independent reads side by side (see run_parallel).
+# Each running query holds one pooled connection, so keep this well below POOL_CONFIG["size"].
+PARALLEL_WORKERS = 4
+
+# Seconds a session reads from the primary after it commits, so it sees its own
+# writes (e.g. My Orders right after checkout). Keep this above max_lag.
+READ_YOUR_WRITES_WINDOW = 10
+
+def _note_write():
+    st.session_state['read_primary_until'] = time.monotonic() + READ_YOUR_WRITES_WINDOW
+
+@st.cache_resource
+def get_pool():
+    """Returns the primary connection pool shared by all sessions in this process."""
+    return ConnectionPool(DB_CONFIG, on_commit=_note_write if REPLICA_CONFIGS else None, **POOL_CONFIG)
+
+@st.cache_resource
+def get_router():
+    """Returns the primary/replica router shared by all sessions in this process."""
+    replicas = [ConnectionPool({**DB_CONFIG, **overrides}, **POOL_CONFIG) for overrides in REPLICA_CONFIGS]
+    return ReplicaRouter(get_pool(), replicas, **REPLICA_ROUTING)
+
+@st.cache_resource
+def get_parallel_executor():
+    """Returns the thread pool run_parallel shares across sessions in this process."""
+    return ThreadPoolExecutor(max_workers=PARALLEL_WORKERS, thread_name_prefix="parallel-read")
+
+def get_pool_stats():
+    """Returns borrow wait, in-use and churn metrics for the connection pool."""
+    return get_pool().stats()
+
+def get_replica_stats():
+    """Returns read routing counters and per-replica lag and health."""
+    return get_router().stats()
+
 def get_connection():
-    """Establishes and returns a connection to the MySQL database."""
+    """Borrows a connection from the pool; close() returns it to the pool."""
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
+        conn = get_pool().acquire()
         return conn
     except mysql.connector.Error as err:
         st.error(f"Error connecting to database: {err}")
         st.stop()
 
+def get_read_connection():
+    """Borrows a connection for read-only queries.
+
+    Uses a healthy replica unless this session committed within the last
+    READ_YOUR_WRITES_WINDOW seconds; falls back to the primary.
+    """
+    use_primary = time.monotonic() < st.session_state.get('read_primary_until', 0)
+    try:
+        return get_router().acquire_read(use_primary)
+    except mysql.connector.Error as err:
+        st.error(f"Error connecting to database: {err}")
+        st.stop()
+
 def get_cursor():
     """Returns a cursor object from the database connection."""
     conn = get_connection()
     return conn.cursor(dictionary=True) # Use dictionary=True for easier data access
 
-def execute_query(query, params=(), fetch_one=False, fetch_all=False):
-    """Execute a SQL query with proper error handling."""
+def execute_query(query, params=(), fetch_one=False, fetch_all=False, tables=()):
+    """Execute a SQL query with proper error handling.
+
+    Returns the fetched row(s) with ``fetch_one``/``fetch_all``, otherwise the
+    affected row count (0 is a successful write that matched nothing); None
+    means the query failed and the error has been shown.
+
+    ``tables`` names the cached tables a write touches; they are invalidated
+    after every write that commits, whatever its rowcount.
+    """
     conn = None
     cursor = None
+    error = False
+    start = time.perf_counter()
+    acquire_time = 0.0
     try:
         conn = get_connection()
+        acquire_time = time.perf_counter() - start
         cursor = conn.cursor(dictionary=True)
         cursor.execute(query, params)
         conn.commit()
+        if tables:
+            from query_cache import invalidate_tables  # query_cache imports this module
+            invalidate_tables(*tables)
         
         if fetch_one:
             return cursor.fetchone()
         elif fetch_all:
             return cursor.fetchall()
-        return None  # For INSERT, UPDATE, DELETE
+        return cursor.rowcount  # For INSERT, UPDATE, DELETE
     except mysql.connector.Error as err:
+        error = True
         st.error(f"Database error: {err}")
         if conn:
             conn.rollback()
         return None
     finally:
+        if conn:
+            rows = max(cursor.rowcount, 0) if cursor else 0
+            record_query(query, params, time.perf_counter() - start - acquire_time, rows, acquire_time, error=error)
         if cursor:
             cursor.close()
         if conn:
             conn.close()
 
-def fetch_data_as_df(query, params=()):
-    """Execute query and return results as pandas DataFrame."""
+class ResultSet:
+    """Query rows as plain tuples plus their column names.
+
+    Cheaper than one dict per row; build a DataFrame with to_df() only where
+    a view actually needs one.
+    """
+
+    __slots__ = ("columns", "rows")
+
+    def __init__(self, columns=(), rows=()):
+        self.columns = tuple(columns)
+        self.rows = list(rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    @property
+    def empty(self):
+        return not self.rows
+
+    def first(self):
+        """Returns the first row as a dict, or None."""
+        return dict(zip(self.columns, self.rows[0])) if self.rows else None
+
+    def scalar(self):
+        """Returns the first column of the first row, or None."""
+        return self.rows[0][0] if self.rows else None
+
+    def column(self, name):
+        """Returns one column as a NumPy array."""
+        index = self.columns.index(name)
+        return np.array([row[index] for row in self.rows])
+
+    def to_df(self):
+        return pd.DataFrame.from_records(self.rows, columns=self.columns, coerce_float=True)
+
+def fetch_rows(query, params=(), primary=False, prepared=False):
+    """Runs a read-only query and returns a ResultSet of tuples.
+
+    Reads go to a replica when one is available; pass ``primary=True`` for
+    reads that must be current. ``prepared=True`` runs the query through
+    the connection's prepared-statement cache (binary protocol), so hot
+    queries are parsed once per connection rather than on every call. Keep
+    the SQL text stable (no inlined values) or every call is a cache miss.
+    """
     conn = None
+    cursor = None
+    rows = []
+    error = False
+    start = time.perf_counter()
+    acquire_time = 0.0
     try:
-        conn = get_connection()
-        df = pd.read_sql_query(query, conn, params=params)
-        return df
+        conn = get_connection() if primary else get_read_connection()
+        acquire_time = time.perf_counter() - start
+        if prepared:
+            columns, rows = conn.fetch_prepared(query, tuple(params or ()))
+            return ResultSet(columns, rows)
+        cursor = conn.cursor()
+        cursor.execute(query, tuple(params or ()))
+        rows = cursor.fetchall()
+        return ResultSet(cursor.column_names, rows)
     except mysql.connector.Error as err:
+        error = True
         st.error(f"Database error: {err}")
-        return pd.DataFrame()
+        return ResultSet()
     finally:
+        if cursor:
+            cursor.close()
         if conn:
-            conn.close()
\ No newline at end of file
+            # Recorded before close so a slow SELECT can be EXPLAINed on the same server
+            record_query(query, params, time.perf_counter() - start - acquire_time, len(rows), acquire_time, conn, error)
+            conn.close()
+
+def fetch_data_as_df(query, params=(), primary=False):
+    """Execute a read-only query and return results as pandas DataFrame.
+
+    Reads go to a replica when one is available; pass ``primary=True`` for
+    reads that must be current.
+    """
+    return fetch_rows(query, params, primary).to_df()
+
+def run_parallel(*calls):
+    """Runs independent read helpers concurrently and returns their results in call order.
+
+    Each call borrows its own pooled connection, so a page that needs several
+    unrelated queries waits for the slowest one instead of their sum. Worker
+    threads are attached to the current script run, so the helpers can read
+    session state and report errors with st.error as usual.
+    """
+    ctx = get_script_run_ctx()
+
+    def run(call):
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return call()
+
+    futures = [get_parallel_executor().submit(run, call) for call in calls]
+    return [future.result() for future in futures]
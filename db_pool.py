@@ -0,0 +1,287 @@
+import threading
+import time
+from collections import OrderedDict, deque
+
+import mysql.connector
+
+
+class PoolTimeout(mysql.connector.Error):
+    """Raised when no pooled connection becomes free within the borrow timeout."""
+
+
+class PoolMetrics:
+    """Counters used to size the pool under load."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.borrows = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.opened = 0
+        self.closed = 0
+        self.expired = 0
+        self.failed_pings = 0
+        self.statement_hits = 0
+        self.statement_misses = 0
+        self.statement_evictions = 0
+
+    def record_borrow(self, waited):
+        with self._lock:
+            self.borrows += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+
+    def record_release(self):
+        with self._lock:
+            self.in_use -= 1
+
+    def incr(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self):
+        """Returns the current counters as a plain dict."""
+        with self._lock:
+            return {
+                "borrows": self.borrows,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": (self.total_wait / self.borrows * 1000) if self.borrows else 0.0,
+                "max_wait_ms": self.max_wait * 1000,
+                "in_use": self.in_use,
+                "peak_in_use": self.peak_in_use,
+                "opened": self.opened,
+                "closed": self.closed,
+                "expired": self.expired,
+                "failed_pings": self.failed_pings,
+                "statement_hits": self.statement_hits,
+                "statement_misses": self.statement_misses,
+                "statement_evictions": self.statement_evictions,
+            }
+
+
+class StatementCache:
+    """LRU of server-side prepared statements for one physical connection.
+
+    Each entry is a prepared cursor, which holds one statement handle, keyed
+    by SQL text. A hit skips the server-side parse and only sends
+    COM_STMT_EXECUTE over the binary protocol. Evicted cursors are closed,
+    which deallocates their statement on the server.
+    """
+
+    def __init__(self, raw, max_size, metrics):
+        self._raw = raw
+        self.max_size = max_size
+        self._metrics = metrics
+        self._cursors = OrderedDict()  # sql -> (sql, prepared cursor)
+
+    def fetch(self, sql, params=()):
+        """Executes a prepared statement and returns (column names, rows)."""
+        entry = self._cursors.get(sql)
+        if entry is None:
+            self._metrics.incr("statement_misses")
+            # The driver re-prepares unless it sees the very same SQL string object, so keep it with the cursor
+            entry = self._cursors[sql] = (sql, self._raw.cursor(prepared=True))
+            while len(self._cursors) > self.max_size:
+                _, (_, old_cursor) = self._cursors.popitem(last=False)
+                self._metrics.incr("statement_evictions")
+                _close_quietly(old_cursor)
+        else:
+            self._metrics.incr("statement_hits")
+            self._cursors.move_to_end(sql)
+
+        key, cursor = entry
+        try:
+            cursor.execute(key, tuple(params))
+            return cursor.column_names, cursor.fetchall()
+        except Exception:
+            # Don't reuse a statement handle in an unknown state
+            del self._cursors[sql]
+            _close_quietly(cursor)
+            raise
+
+    def clear(self):
+        for _, cursor in self._cursors.values():
+            _close_quietly(cursor)
+        self._cursors.clear()
+
+    def __len__(self):
+        return len(self._cursors)
+
+
+def _close_quietly(cursor):
+    try:
+        cursor.close()
+    except Exception:
+        pass
+
+
+class PooledConnection:
+    """Wraps a raw connection so that close() hands it back to the pool."""
+
+    def __init__(self, pool, raw, created_at, statements=None):
+        self._pool = pool
+        self._raw = raw
+        self._created_at = created_at
+        self._statements = statements
+
+    def __getattr__(self, name):
+        if self._raw is None:
+            raise mysql.connector.InterfaceError("Connection already returned to pool")
+        return getattr(self._raw, name)
+
+    @property
+    def raw(self):
+        return self._raw
+
+    def fetch_prepared(self, sql, params=()):
+        """Runs a read through this connection's prepared-statement cache; returns (columns, rows)."""
+        if self._raw is None:
+            raise mysql.connector.InterfaceError("Connection already returned to pool")
+        if self._statements is None:
+            cursor = self._raw.cursor(prepared=True)
+            try:
+                cursor.execute(sql, tuple(params))
+                return cursor.column_names, cursor.fetchall()
+            finally:
+                cursor.close()
+        return self._statements.fetch(sql, params)
+
+    def commit(self):
+        if self._raw is None:
+            raise mysql.connector.InterfaceError("Connection already returned to pool")
+        self._raw.commit()
+        if self._pool.on_commit:
+            self._pool.on_commit()
+
+    def close(self):
+        if self._raw is not None:
+            raw, self._raw = self._raw, None
+            self._pool._release(raw, self._created_at, self._statements)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ConnectionPool:
+    """Bounded MySQL connection pool with ping-on-borrow and max lifetime.
+
+    At most ``size`` connections are open at once. When all of them are
+    borrowed, ``acquire`` waits up to ``borrow_timeout`` seconds for one to be
+    returned before raising ``PoolTimeout``. ``on_commit`` is called after
+    every successful commit on a borrowed connection. Each connection keeps
+    up to ``statement_cache_size`` prepared statements (0 disables the cache).
+    """
+
+    def __init__(self, db_config, size=5, max_lifetime=1800, borrow_timeout=10, connect=None, on_commit=None,
+                 statement_cache_size=0):
+        self.db_config = dict(db_config)
+        self.size = size
+        self.max_lifetime = max_lifetime
+        self.borrow_timeout = borrow_timeout
+        self.statement_cache_size = statement_cache_size
+        self.on_commit = on_commit
+        self.metrics = PoolMetrics()
+        self._connect = connect or mysql.connector.connect
+        self._idle = deque()
+        self._open = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, timeout=None):
+        """Borrows a healthy connection from the pool."""
+        timeout = self.borrow_timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+        while True:
+            with self._cond:
+                while not self._idle and self._open >= self.size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.metrics.incr("timeouts")
+                        raise PoolTimeout(f"No database connection free after {timeout}s (pool size {self.size})")
+                    self._cond.wait(remaining)
+                if self._idle:
+                    raw, created_at, statements = self._idle.pop()
+                else:
+                    raw, created_at, statements = None, None, None
+                    self._open += 1
+
+            if raw is None:
+                try:
+                    raw, created_at = self._new_connection()
+                except Exception:
+                    self._forget()
+                    raise
+                if self.statement_cache_size:
+                    statements = StatementCache(raw, self.statement_cache_size, self.metrics)
+            elif not self._is_usable(raw, created_at):
+                self._discard(raw)
+                continue
+
+            self.metrics.record_borrow(time.monotonic() - start)
+            return PooledConnection(self, raw, created_at, statements)
+
+    def _new_connection(self):
+        raw = self._connect(**self.db_config)
+        self.metrics.incr("opened")
+        return raw, time.monotonic()
+
+    def _is_usable(self, raw, created_at):
+        if time.monotonic() - created_at > self.max_lifetime:
+            self.metrics.incr("expired")
+            return False
+        try:
+            raw.ping(reconnect=False)
+            return True
+        except Exception:
+            self.metrics.incr("failed_pings")
+            return False
+
+    def _release(self, raw, created_at, statements=None):
+        self.metrics.record_release()
+        try:
+            # Never hand the next borrower a half-finished transaction.
+            if raw.in_transaction:
+                raw.rollback()
+        except Exception:
+            self._discard(raw)
+            return
+        with self._cond:
+            self._idle.append((raw, created_at, statements))
+            self._cond.notify()
+
+    def _discard(self, raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+        self.metrics.incr("closed")
+        self._forget()
+
+    def _forget(self):
+        with self._cond:
+            self._open -= 1
+            self._cond.notify()
+
+    def stats(self):
+        """Returns pool metrics plus the current open/idle counts."""
+        stats = self.metrics.snapshot()
+        with self._cond:
+            stats["open"] = self._open
+            stats["idle"] = len(self._idle)
+        stats["size"] = self.size
+        return stats
+
+    def close_all(self):
+        """Closes every idle connection in the pool."""
+        with self._cond:
+            idle, self._idle = list(self._idle), deque()
+        for raw, _, _ in idle:
+            self._discard(raw)
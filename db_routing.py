@@ -0,0 +1,135 @@
+import threading
+import time
+
+import mysql.connector
+
+from db_pool import PoolTimeout
+
+
+def replica_lag(conn):
+    """Returns how many seconds a replica is behind its source.
+
+    A server with no replication configured (e.g. a local stand-in) counts as
+    0; None means replication is stopped or broken.
+    """
+    cursor = conn.cursor(dictionary=True)
+    try:
+        try:
+            cursor.execute("SHOW REPLICA STATUS")
+        except mysql.connector.Error:
+            cursor.execute("SHOW SLAVE STATUS")  # MySQL before 8.0.22, MariaDB
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+    if not rows:
+        return 0
+    lags = [row.get("Seconds_Behind_Source", row.get("Seconds_Behind_Master")) for row in rows]
+    if any(lag is None for lag in lags):
+        return None
+    return max(int(lag) for lag in lags)
+
+
+class ReplicaRouter:
+    """Routes read-only queries to replicas and everything else to the primary.
+
+    Replicas are tried round-robin. One is skipped when its last measured lag
+    is above ``max_lag`` or its replication is broken; lag is re-measured at
+    most every ``lag_check_interval`` seconds per replica. A replica that
+    can't be reached is skipped for ``retry_after`` seconds. When no replica
+    qualifies the read falls back to the primary, so replicas only ever add
+    capacity.
+    """
+
+    def __init__(self, primary, replicas=(), max_lag=5, lag_check_interval=5, retry_after=30, lag_probe=None):
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.max_lag = max_lag
+        self.lag_check_interval = lag_check_interval
+        self.retry_after = retry_after
+        self._lag_probe = lag_probe or replica_lag
+        self._state = [{"lag": None, "checked_at": None, "down_until": 0.0, "error": None} for _ in self.replicas]
+        self._next = 0
+        self._lock = threading.Lock()
+        self.primary_reads = 0
+        self.replica_reads = 0
+        self.fallbacks = 0
+
+    def acquire_write(self):
+        """Borrows a primary connection."""
+        return self.primary.acquire()
+
+    def acquire_read(self, use_primary=False):
+        """Borrows a connection for a read, from a replica when one qualifies.
+
+        ``use_primary`` forces the primary, for reads that must see this
+        session's own recent writes.
+        """
+        if not use_primary:
+            for index in self._candidates():
+                try:
+                    conn = self.replicas[index].acquire()
+                except PoolTimeout:
+                    continue  # busy, not broken
+                except mysql.connector.Error as err:
+                    self._mark_down(index, err)
+                    continue
+                if self._lag_ok(index, conn):
+                    with self._lock:
+                        self.replica_reads += 1
+                    return conn
+                conn.close()
+            if self.replicas:
+                with self._lock:
+                    self.fallbacks += 1
+
+        conn = self.primary.acquire()
+        with self._lock:
+            self.primary_reads += 1
+        return conn
+
+    def _candidates(self):
+        """Replica indexes in round-robin order, skipping ones marked down."""
+        now = time.monotonic()
+        with self._lock:
+            count = len(self.replicas)
+            start = self._next
+            self._next = (self._next + 1) % count if count else 0
+            return [i % count for i in range(start, start + count)
+                    if self._state[i % count]["down_until"] <= now]
+
+    def _lag_ok(self, index, conn):
+        state = self._state[index]
+        now = time.monotonic()
+        if state["checked_at"] is None or now - state["checked_at"] >= self.lag_check_interval:
+            try:
+                lag = self._lag_probe(conn)
+            except Exception as err:
+                self._mark_down(index, err)
+                return False
+            with self._lock:
+                state.update(lag=lag, checked_at=now, error=None if lag is not None else "replication stopped")
+        return state["lag"] is not None and state["lag"] <= self.max_lag
+
+    def _mark_down(self, index, err):
+        with self._lock:
+            self._state[index].update(down_until=time.monotonic() + self.retry_after, error=str(err))
+
+    def stats(self):
+        """Returns read routing counters plus the last known state of each replica."""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "primary_reads": self.primary_reads,
+                "replica_reads": self.replica_reads,
+                "fallbacks": self.fallbacks,
+                "replicas": [
+                    {
+                        "host": pool.db_config.get("host"),
+                        "lag_seconds": state["lag"],
+                        "down": state["down_until"] > now,
+                        "error": state["error"],
+                        "pool": pool.stats(),
+                    }
+                    for pool, state in zip(self.replicas, self._state)
+                ],
+            }
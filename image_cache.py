@@ -0,0 +1,211 @@
+import base64
+import hashlib
+import io
+import os
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import streamlit as st
+
+# Served by Streamlit's static file server (server.enableStaticServing) at STATIC_URL.
+THUMBNAIL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "thumbnails")
+STATIC_URL = "app/static/thumbnails"
+MAX_CACHE_BYTES = 200 * 1024 * 1024
+FETCH_TIMEOUT = 5
+MAX_SOURCE_BYTES = 20 * 1024 * 1024
+# Sources that failed to fetch or decode aren't retried until this many seconds pass.
+FAILURE_TTL = 300
+# Thumbnails are fetched and resized on these threads, never on a script run.
+THUMBNAIL_WORKERS = 4
+# Cold lookups beyond this many queued jobs are dropped and retried on a later render.
+MAX_PENDING = 256
+# Caps on the in-memory source index and failure list, evicted least recently used first.
+MAX_SOURCES = 20000
+MAX_FAILED = 2000
+
+class ThumbnailCache:
+    """Disk cache of resized product images, bounded by total size in LRU order.
+
+    Files are named by the SHA-256 of the source image plus the width, so the
+    same picture behind different URLs is stored once. A source -> file index
+    is kept in memory, so warm lookups neither fetch nor decode anything;
+    cold ones queue the fetch and resize on a small thread pool and return
+    None until the thumbnail exists.
+    """
+
+    def __init__(self, directory=THUMBNAIL_DIR, max_bytes=MAX_CACHE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+        self.evictions = 0
+        self._files = OrderedDict()  # file name -> size, least recently used first
+        self._bytes = 0
+        self._sources = OrderedDict()  # (source, width) -> file name, least recently used first
+        self._failed = OrderedDict()  # (source, width) -> retry_after, oldest first
+        self._pending = set()  # (source, width) queued or being generated
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=THUMBNAIL_WORKERS, thread_name_prefix="thumbnail")
+        os.makedirs(directory, exist_ok=True)
+        self._scan()
+
+    def _scan(self):
+        """Indexes thumbnails left by earlier runs, oldest access first."""
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith(".jpg") and os.path.isfile(path):
+                stat = os.stat(path)
+                entries.append((stat.st_atime, name, stat.st_size))
+        for _, name, size in sorted(entries):
+            self._files[name] = size
+            self._bytes += size
+
+    def get(self, source, width):
+        """Returns the thumbnail file name for an image URL or path, or None if not ready.
+
+        A miss queues the thumbnail to be generated in the background, so a
+        later render finds it; the caller shows the original meanwhile.
+        """
+        key = (source, width)
+        with self._lock:
+            name = self._sources.get(key)
+            if name in self._files:
+                self._sources.move_to_end(key)
+                self._files.move_to_end(name)
+                self.hits += 1
+                return name
+            self.misses += 1
+            retry_after = self._failed.get(key)
+            if retry_after is not None:
+                if retry_after > time.monotonic():
+                    return None
+                del self._failed[key]
+            if key in self._pending or len(self._pending) >= MAX_PENDING:
+                return None
+            self._pending.add(key)
+        self._executor.submit(self._generate, key)
+        return None
+
+    def _generate(self, key):
+        source, width = key
+        try:
+            data = _read_source(source)
+            name = f"{hashlib.sha256(data).hexdigest()[:32]}_{width}.jpg"
+            if name not in self._files:
+                self._write(name, _resize(data, width))
+        except Exception:
+            # Broken URLs, timeouts, non-images and a missing Pillow all fall back to the original
+            with self._lock:
+                self._pending.discard(key)
+                self.failures += 1
+                self._failed[key] = time.monotonic() + FAILURE_TTL
+                while len(self._failed) > MAX_FAILED:
+                    self._failed.popitem(last=False)
+            return
+
+        with self._lock:
+            self._pending.discard(key)
+            self._sources[key] = name
+            self._sources.move_to_end(key)
+            while len(self._sources) > MAX_SOURCES:
+                self._sources.popitem(last=False)
+
+    def _write(self, name, data):
+        path = os.path.join(self.directory, name)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._bytes += len(data) - self._files.get(name, 0)
+            self._files[name] = len(data)
+            self._files.move_to_end(name)
+            while self._bytes > self.max_bytes and len(self._files) > 1:
+                old_name, old_size = self._files.popitem(last=False)
+                self._bytes -= old_size
+                self.evictions += 1
+                try:
+                    os.remove(os.path.join(self.directory, old_name))
+                except OSError:
+                    pass
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "files": len(self._files),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "failures": self.failures,
+                "pending": len(self._pending),
+                "evictions": self.evictions,
+            }
+
+def _read_source(source):
+    if source.startswith(("http://", "https://")):
+        request = urllib.request.Request(source, headers={"User-Agent": "retail-inventory-thumbnailer"})
+        with urllib.request.urlopen(request, timeout=FETCH_TIMEOUT) as response:
+            data = response.read(MAX_SOURCE_BYTES + 1)
+        if len(data) > MAX_SOURCE_BYTES:
+            raise ValueError("image too large")
+        return data
+    with open(source, "rb") as f:
+        return f.read()
+
+def _resize(data, width):
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as image:
+        image = image.convert("RGB")
+        if image.width > width:
+            image.thumbnail((width, width * 4))
+        out = io.BytesIO()
+        image.save(out, format="JPEG", quality=85, optimize=True)
+        return out.getvalue()
+
+@st.cache_resource
+def get_thumbnail_cache():
+    """Returns the thumbnail cache shared by all sessions in this process."""
+    return ThumbnailCache()
+
+def get_thumbnail_stats():
+    return get_thumbnail_cache().stats()
+
+def show_image(source, width, lazy=False):
+    """Renders a product image from its cached thumbnail.
+
+    With ``lazy`` the image is emitted as an <img loading="lazy"> pointing at
+    the static thumbnail URL, so the browser only downloads it when it
+    scrolls into view. Until the thumbnail has been generated (or if it
+    can't be) the original source is shown through st.image instead, which
+    serves local file paths as well as URLs.
+    """
+    cache = get_thumbnail_cache()
+    name = cache.get(source, width)
+    if name is None:
+        st.image(source, width=width)
+    elif lazy:
+        st.markdown(f'<img src="{STATIC_URL}/{name}" width="{width}" loading="lazy">', unsafe_allow_html=True)
+    else:
+        st.image(cache.path(name), width=width)
+
+@lru_cache(maxsize=128)
+def _encode_base64(path, mtime, size):
+    with open(path, "rb") as f:
+        return base64.b64encode(f.read()).decode()
+
+def encode_base64(path):
+    """Base64 of a local file, memoized until the file changes."""
+    stat = os.stat(path)
+    return _encode_base64(path, stat.st_mtime_ns, stat.st_size)
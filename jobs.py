@@ -0,0 +1,242 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import streamlit as st
+
+# Background workers per Streamlit process. Each running job holds one pooled connection.
+# Four lets every Reports tab compute at once.
+JOB_WORKERS = 4
+# Finished results are kept on disk and reused for this many seconds.
+RESULT_TTL = 900
+# A failed job is handed back as-is for this many seconds rather than retried on every rerun.
+FAILURE_RETRY_AFTER = 60
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "job_results")
+# Finished jobs remembered for the UI; older ones are forgotten (their files stay cached).
+MAX_FINISHED_JOBS = 200
+
+class Job:
+    """One unit of background work and its progress, as seen by the UI."""
+
+    def __init__(self, kind, params, label, result_path):
+        self.job_id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.label = label
+        self.result_path = result_path
+        self.status = "queued"
+        self.progress = 0.0
+        self.message = "Waiting for a worker..."
+        self.error = None
+        self.cached = False
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def active(self):
+        return self.status in ("queued", "running")
+
+    def report(self, fraction, message=None):
+        """Progress hook for job functions; ``fraction`` is 0..1."""
+        self.progress = min(max(float(fraction), 0.0), 1.0)
+        if message:
+            self.message = message
+
+    def elapsed(self):
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    def result(self):
+        """Returns the result DataFrame (Parquet results) or the result file path.
+
+        Returns None if the job hasn't finished, or if its file has since been
+        pruned or discarded, in which case the job is marked ``expired``.
+        """
+        if self.status != "done":
+            return None
+        try:
+            if self.result_path.endswith(".parquet"):
+                return pd.read_parquet(self.result_path)
+            if not os.path.exists(self.result_path):
+                raise FileNotFoundError(self.result_path)
+            return self.result_path
+        except FileNotFoundError:
+            self.expire()
+            return None
+
+    def expire(self):
+        self.status = "expired"
+        self.message = "Result expired"
+
+class JobRunner:
+    """Runs slow admin work on a thread pool and caches the results on disk.
+
+    A job function takes the Job (for progress reports) and returns either a
+    DataFrame, saved as Parquet, or the path of a file it wrote, which is
+    moved into the results directory. Results are keyed by job kind plus
+    parameters, so the same report asked for twice within ``result_ttl`` is
+    read back from disk instead of recomputed, and a request for a report
+    that is already running attaches to that job.
+    """
+
+    def __init__(self, workers=JOB_WORKERS, results_dir=RESULTS_DIR, result_ttl=RESULT_TTL):
+        self.results_dir = results_dir
+        self.result_ttl = result_ttl
+        os.makedirs(results_dir, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._jobs = OrderedDict()  # job_id -> Job, oldest first
+        self._latest = {}           # result path -> newest Job writing or holding it
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.failed = 0
+        self.cache_hits = 0
+
+    def submit(self, kind, params, fn, label=None, suffix=".parquet", force=False):
+        """Queues ``fn(job)`` unless a fresh result or a running job already covers it.
+
+        ``force`` recomputes even when a cached result exists (or the last
+        attempt just failed).
+        """
+        path = self._result_path(kind, params, suffix)
+        with self._lock:
+            self._prune_expired()
+            latest = self._latest.get(path)
+            if latest is not None and latest.active:
+                return latest
+            if (not force and latest is not None and latest.status == "failed"
+                    and time.time() - latest.finished_at < FAILURE_RETRY_AFTER):
+                return latest
+            if not force and self._is_fresh(path):
+                self.cache_hits += 1
+                if latest is not None and latest.status == "done":
+                    return latest
+                job = Job(kind, params, label or kind, path)
+                job.status, job.progress, job.cached = "done", 1.0, True
+                job.message = "Loaded from cache"
+                job.started_at = job.finished_at = os.path.getmtime(path)
+                self._remember(job)
+                return job
+            job = Job(kind, params, label or kind, path)
+            self._remember(job)
+        self._executor.submit(self._run, job, fn)
+        return job
+
+    def _run(self, job, fn):
+        job.status = "running"
+        job.message = "Running..."
+        job.started_at = time.time()
+        tmp_path = f"{job.result_path}.{job.job_id}.tmp"
+        try:
+            result = fn(job)
+            if isinstance(result, pd.DataFrame):
+                result.to_parquet(tmp_path, index=False)
+            else:
+                shutil.move(result, tmp_path)  # may cross filesystems from the temp dir
+            # Atomic swap, so a reader never sees a half-written result
+            os.replace(tmp_path, job.result_path)
+        except Exception as err:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            job.error = str(err) or type(err).__name__
+            job.message = "Failed"
+            job.finished_at = time.time()
+            job.status = "failed"  # last, so readers never see a finished job without finished_at
+            with self._lock:
+                self.failed += 1
+        else:
+            job.progress = 1.0
+            job.message = "Done"
+            job.finished_at = time.time()
+            job.status = "done"
+            with self._lock:
+                self.completed += 1
+
+    def _result_path(self, kind, params, suffix):
+        digest = hashlib.sha256(json.dumps([kind, params], sort_keys=True, default=str).encode()).hexdigest()[:16]
+        return os.path.join(self.results_dir, f"{kind}_{digest}{suffix}")
+
+    def _is_fresh(self, path):
+        try:
+            return time.time() - os.path.getmtime(path) < self.result_ttl
+        except OSError:
+            return False
+
+    def _prune_expired(self):
+        """Deletes result files past their TTL, except ones a running job is about to replace."""
+        busy = {job.result_path for job in self._jobs.values() if job.active}
+        removed = set()
+        for name in os.listdir(self.results_dir):
+            path = os.path.join(self.results_dir, name)
+            if path not in busy and not name.endswith(".tmp") and not self._is_fresh(path):
+                try:
+                    os.remove(path)
+                    removed.add(path)
+                except OSError:
+                    pass
+        self._forget(removed)
+
+    def _forget(self, paths):
+        """Expires and forgets the finished jobs whose result files were deleted."""
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.result_path in paths and not job.active]:
+            job = self._jobs.pop(job_id)
+            job.expire()
+            if self._latest.get(job.result_path) is job:
+                del self._latest[job.result_path]
+
+    def _remember(self, job):
+        self._jobs[job.job_id] = job
+        self._latest[job.result_path] = job
+        finished = [job_id for job_id, j in self._jobs.items() if not j.active]
+        for job_id in finished[:max(len(finished) - MAX_FINISHED_JOBS, 0)]:
+            old = self._jobs.pop(job_id)
+            if self._latest.get(old.result_path) is old:
+                del self._latest[old.result_path]
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self):
+        """Returns the remembered jobs, newest first."""
+        with self._lock:
+            return list(reversed(self._jobs.values()))
+
+    def discard_results(self, *kinds):
+        """Deletes cached results of the given kinds, e.g. after the data behind them changed."""
+        prefixes = tuple(f"{kind}_" for kind in kinds)
+        with self._lock:
+            busy = {job.result_path for job in self._jobs.values() if job.active}
+            removed = set()
+            for name in os.listdir(self.results_dir):
+                path = os.path.join(self.results_dir, name)
+                if name.startswith(prefixes) and not name.endswith(".tmp") and path not in busy:
+                    os.remove(path)
+                    removed.add(path)
+            self._forget(removed)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "queued": sum(job.status == "queued" for job in self._jobs.values()),
+                "running": sum(job.status == "running" for job in self._jobs.values()),
+                "completed": self.completed,
+                "failed": self.failed,
+                "cache_hits": self.cache_hits,
+            }
+
+@st.cache_resource
+def get_job_runner():
+    """Returns the job runner shared by all sessions in this process."""
+    return JobRunner()
+
+def get_job_stats():
+    return get_job_runner().stats()
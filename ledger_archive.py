@@ -0,0 +1,348 @@
+import argparse
+import glob
+import os
+import re
+from datetime import date, datetime, timedelta
+
+import mysql.connector
+import pandas as pd
+from db_connection import get_connection
+from query_cache import invalidate_tables
+
+# Inventory_Transaction keeps this many whole months (plus the current one) online.
+HOT_MONTHS = 3
+# Daily snapshots older than this are thinned to month-end snapshots.
+SNAPSHOT_RETENTION_DAYS = 400
+ARCHIVE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ledger_archive")
+EXPORT_CHUNK = 50000
+DELETE_BATCH = 10000
+# Rows per record batch when archived months are read back.
+ARCHIVE_BATCH = 250000
+
+LEDGER_COLUMNS = ["transaction_id", "product_id", "transaction_type", "quantity_change", "reference_id",
+                  "reference_type", "transaction_date", "notes", "created_by", "stock_before", "stock_after"]
+_ARCHIVE_NAME = re.compile(r"ledger_(\d{4}-\d{2})_(\d+)-(\d+)\.parquet$")
+
+def _month_start(day):
+    return day.replace(day=1)
+
+def _next_month(day):
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+def archived_parts():
+    """Returns [(month 'YYYY-MM', first transaction_id, last transaction_id, path)] for every archive file."""
+    parts = []
+    for path in sorted(glob.glob(os.path.join(ARCHIVE_DIR, "ledger_*.parquet"))):
+        match = _ARCHIVE_NAME.search(path)
+        if match:
+            parts.append((match.group(1), int(match.group(2)), int(match.group(3)), path))
+    return parts
+
+def archived_through():
+    """First day that is still fully in the online ledger, or None if nothing was archived."""
+    months = [month for month, _, _, _ in archived_parts()]
+    if not months:
+        return None
+    return _next_month(datetime.strptime(max(months), "%Y-%m").date())
+
+def take_stock_snapshot(snapshot_date=None):
+    """Records every product's closing stock for ``snapshot_date`` (default yesterday).
+
+    Closing stock is current stock minus every ledger movement after that
+    day, so a missed day can be backfilled later as long as the ledger after
+    it is still online. Runs as one INSERT ... SELECT under READ COMMITTED,
+    which reads Product and the ledger from one consistent view without
+    locking either. Returns (success, message).
+    """
+    day = snapshot_date or date.today() - timedelta(days=1)
+    if day >= date.today():
+        return False, "Only finished days can be snapshotted."
+    archived = archived_through()
+    if archived and day < archived:
+        return False, f"The ledger before {archived} is archived; can't rebuild stock for {day}."
+
+    conn = None
+    cursor = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        conn.start_transaction(isolation_level="READ COMMITTED")
+        next_day = day + timedelta(days=1)
+        cursor.execute("""
+            INSERT INTO Stock_Snapshot (snapshot_date, product_id, stock_quantity)
+            SELECT %s, p.product_id, p.stock_quantity - COALESCE(later.change_sum, 0)
+            FROM Product p
+            LEFT JOIN (
+                SELECT product_id, SUM(quantity_change) AS change_sum
+                FROM Inventory_Transaction
+                WHERE transaction_date >= %s
+                GROUP BY product_id
+            ) later ON later.product_id = p.product_id
+            WHERE p.created_at < %s
+            ON DUPLICATE KEY UPDATE stock_quantity = VALUES(stock_quantity)
+        """, (day, next_day, next_day))
+        conn.commit()
+        invalidate_tables("Stock_Snapshot")
+        return True, f"Stock snapshot for {day} saved."
+    except mysql.connector.Error as err:
+        if conn:
+            conn.rollback()
+        return False, f"Stock snapshot failed: {err}"
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+def prune_snapshots(retention_days=SNAPSHOT_RETENTION_DAYS):
+    """Deletes daily snapshots older than the retention window, keeping month-end ones."""
+    conn = None
+    cursor = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            DELETE FROM Stock_Snapshot
+            WHERE snapshot_date < %s AND snapshot_date <> LAST_DAY(snapshot_date)
+        """, (date.today() - timedelta(days=retention_days),))
+        deleted = cursor.rowcount
+        conn.commit()
+        invalidate_tables("Stock_Snapshot")
+        return True, f"Pruned {deleted:,} old snapshot rows."
+    except mysql.connector.Error as err:
+        if conn:
+            conn.rollback()
+        return False, f"Snapshot pruning failed: {err}"
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+def stock_as_of(moment):
+    """Stock of every product at ``moment`` from the nearest earlier snapshot plus the ledger since.
+
+    Reads one day's snapshot and only the ledger rows after it, never the
+    whole history. Returns a DataFrame (product_id, stock_quantity), or None
+    when no snapshot is old enough to start from.
+    """
+    conn = None
+    cursor = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        # A snapshot holds closing stock, so the one for the day before ``moment`` is the latest usable one
+        cursor.execute("SELECT MAX(snapshot_date) FROM Stock_Snapshot WHERE snapshot_date < %s",
+                       (moment.date() if isinstance(moment, datetime) else moment,))
+        base = cursor.fetchone()[0]
+        if base is None:
+            return None
+        cursor.execute("""
+            SELECT s.product_id, s.stock_quantity + COALESCE(d.change_sum, 0) AS stock_quantity
+            FROM Stock_Snapshot s
+            LEFT JOIN (
+                SELECT product_id, SUM(quantity_change) AS change_sum
+                FROM Inventory_Transaction
+                WHERE transaction_date >= %s AND transaction_date <= %s
+                GROUP BY product_id
+            ) d ON d.product_id = s.product_id
+            WHERE s.snapshot_date = %s
+        """, (base + timedelta(days=1), moment, base))
+        return pd.DataFrame(cursor.fetchall(), columns=["product_id", "stock_quantity"])
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+def _ledger_schema():
+    import pyarrow as pa
+    return pa.schema([
+        ("transaction_id", pa.int64()), ("product_id", pa.int64()), ("transaction_type", pa.string()),
+        ("quantity_change", pa.int64()), ("reference_id", pa.int64()), ("reference_type", pa.string()),
+        ("transaction_date", pa.timestamp("s")), ("notes", pa.string()), ("created_by", pa.int64()),
+        ("stock_before", pa.int64()), ("stock_after", pa.int64()),
+    ])
+
+def _archive_month(conn, month, after_id):
+    """Copies one month's ledger rows past ``after_id`` to Parquet, then deletes what was archived.
+
+    Rows are read in keyset chunks and appended to the file chunk by chunk,
+    so memory stays flat however large the month is.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    start, end = month, _next_month(month)
+    schema = _ledger_schema()
+    tmp_path = os.path.join(ARCHIVE_DIR, f"ledger_{month:%Y-%m}.parquet.tmp")
+    cursor = conn.cursor()
+    writer = None
+    try:
+        first_id = None
+        last_id = after_id
+        archived = 0
+        while True:
+            cursor.execute(f"""
+                SELECT {', '.join(LEDGER_COLUMNS)}
+                FROM Inventory_Transaction
+                WHERE transaction_date >= %s AND transaction_date < %s AND transaction_id > %s
+                ORDER BY transaction_id
+                LIMIT {EXPORT_CHUNK}
+            """, (start, end, last_id))
+            chunk = cursor.fetchall()
+            if chunk:
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp_path, schema, compression="zstd")
+                    first_id = chunk[0][0]
+                columns = list(zip(*chunk))
+                writer.write_table(pa.table([pa.array(values, type=field.type)
+                                             for values, field in zip(columns, schema)], schema=schema))
+                archived += len(chunk)
+                last_id = chunk[-1][0]
+            if len(chunk) < EXPORT_CHUNK:
+                break
+        if writer is not None:
+            writer.close()
+            writer = None
+            os.replace(tmp_path, os.path.join(ARCHIVE_DIR, f"ledger_{month:%Y-%m}_{first_id}-{last_id}.parquet"))
+        conn.commit()  # end the read snapshot before deleting
+
+        # Only ever delete ids that are safely in a file; small batches keep locks and undo short
+        deleted = 0
+        while True:
+            cursor.execute(f"""
+                DELETE FROM Inventory_Transaction
+                WHERE transaction_date >= %s AND transaction_date < %s AND transaction_id <= %s
+                LIMIT {DELETE_BATCH}
+            """, (start, end, last_id))
+            batch = cursor.rowcount
+            conn.commit()
+            deleted += batch
+            if batch < DELETE_BATCH:
+                break
+        return archived, deleted
+    finally:
+        if writer is not None:
+            writer.close()
+            os.remove(tmp_path)
+        cursor.close()
+
+def archive_cold_months(hot_months=HOT_MONTHS, on_progress=None):
+    """Moves ledger months older than ``hot_months`` whole months to zstd Parquet files.
+
+    Each month is written to ledger_archive/ledger_YYYY-MM_<first id>-<last id>.parquet
+    before its rows are deleted. A rerun after a crash only exports rows
+    past the month's last archived id and finishes the delete, so nothing is
+    archived twice. Nothing is deleted unless Stock_Snapshot has the closing
+    stock of the day before the cutoff, which stock_as_of and stock_at start
+    from once the older ledger is offline; it is taken first when missing.
+    Returns (success, message).
+    """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False, "Ledger archiving needs pyarrow (pip install pyarrow)."
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+
+    cutoff = _month_start(date.today())
+    for _ in range(hot_months):
+        cutoff = _month_start(cutoff - timedelta(days=1))
+
+    conn = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT MIN(transaction_date) FROM Inventory_Transaction WHERE transaction_date < %s", (cutoff,))
+        oldest = cursor.fetchone()[0]
+        cursor.close()
+        conn.commit()
+        if oldest is None:
+            return True, f"Nothing older than {cutoff} to archive."
+
+        boundary = cutoff - timedelta(days=1)
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1 FROM Stock_Snapshot WHERE snapshot_date = %s LIMIT 1", (boundary,))
+        has_snapshot = cursor.fetchone() is not None
+        cursor.close()
+        conn.commit()
+        if not has_snapshot:
+            # Only possible while the ledger after the boundary is still online, i.e. now
+            success, message = take_stock_snapshot(boundary)
+            if not success:
+                return False, f"Archiving needs a stock snapshot for {boundary}: {message}"
+
+        archived_ids = {}
+        for month, _, last_id, _ in archived_parts():
+            archived_ids[month] = max(archived_ids.get(month, 0), last_id)
+
+        month = _month_start(oldest.date())
+        total_rows = total_deleted = 0
+        while month < cutoff:
+            rows, deleted = _archive_month(conn, month, archived_ids.get(f"{month:%Y-%m}", 0))
+            total_rows += rows
+            total_deleted += deleted
+            if on_progress:
+                on_progress(month, rows)
+            month = _next_month(month)
+        invalidate_tables("Inventory_Transaction")
+        return True, f"Archived {total_rows:,} ledger rows before {cutoff}; deleted {total_deleted:,} from the database."
+    except (mysql.connector.Error, OSError) as err:
+        if conn:
+            conn.rollback()
+        return False, f"Ledger archiving failed: {err}"
+    finally:
+        if conn:
+            conn.close()
+
+def iter_archived_ledger(start=None, end=None, columns=None, batch_size=ARCHIVE_BATCH):
+    """Yields archived ledger rows with transaction_date in [start, end) as DataFrames.
+
+    Frames hold at most ``batch_size`` rows. Only the months overlapping the
+    range are opened, and each file is read batch by batch, so memory stays
+    at one batch however much is archived.
+    """
+    import pyarrow.parquet as pq
+
+    read_columns = columns
+    if columns is not None and (start or end) and "transaction_date" not in columns:
+        read_columns = [*columns, "transaction_date"]
+    for month, _, _, path in archived_parts():
+        month_start = datetime.strptime(month, "%Y-%m").date()
+        if (end and month_start >= end) or (start and _next_month(month_start) <= start):
+            continue
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size, columns=read_columns):
+            frame = batch.to_pandas()
+            if start:
+                frame = frame[frame["transaction_date"] >= pd.Timestamp(start)]
+            if end:
+                frame = frame[frame["transaction_date"] < pd.Timestamp(end)]
+            if len(frame):
+                yield frame[columns] if columns is not None else frame
+
+def read_archived_ledger(start=None, end=None, columns=None):
+    """Reads archived ledger rows with transaction_date in [start, end) as one DataFrame."""
+    frames = list(iter_archived_ledger(start, end, columns))
+    if not frames:
+        return pd.DataFrame(columns=columns or LEDGER_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Nightly ledger maintenance: stock snapshots and cold-month archiving.")
+    parser.add_argument("--snapshot", type=date.fromisoformat, nargs="?", const=date.today() - timedelta(days=1),
+                        help="Snapshot closing stock for this day (default: yesterday)")
+    parser.add_argument("--archive", action="store_true", help=f"Archive ledger months older than {HOT_MONTHS} months")
+    parser.add_argument("--prune", action="store_true", help="Thin old daily snapshots to month-ends")
+    args = parser.parse_args()
+    results = []
+    if args.snapshot:
+        results.append(take_stock_snapshot(args.snapshot))
+    if args.archive:
+        results.append(archive_cold_months(on_progress=lambda month, rows: print(f"{month:%Y-%m}: {rows:,} rows")))
+    if args.prune:
+        results.append(prune_snapshots())
+    if not results:
+        parser.print_help()
+    for _, message in results:
+        print(message)
+    raise SystemExit(0 if all(success for success, _ in results) else 1)
@@ -0,0 +1,112 @@
+import streamlit as st
+from db_connection import fetch_data_as_df
+
+PAGE_SIZES = [25, 50, 100, 250]
+
+def _to_cursor_value(value):
+    """Converts a pandas/NumPy cell into a value the MySQL driver can bind."""
+    if hasattr(value, 'to_pydatetime'):
+        return value.to_pydatetime()
+    if hasattr(value, 'item'):
+        return value.item()
+    return value
+
+def estimate_row_count(table_name):
+    """Returns InnoDB's row estimate for a table without scanning it."""
+    df = fetch_data_as_df("""
+        SELECT TABLE_ROWS AS estimate
+        FROM information_schema.TABLES
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+    """, (table_name,))
+    if df.empty or df.iloc[0]['estimate'] is None:
+        return None
+    return int(df.iloc[0]['estimate'])
+
+def fetch_keyset_page(select_sql, order_by, page_size, after=None, where=None, params=(), descending=True):
+    """Fetches one page ordered by ``order_by``, seeking past ``after``.
+
+    ``order_by`` is a list of ``(sql_expression, result_column)`` pairs whose
+    last entry must be unique (normally the primary key); every key is sorted
+    descending unless ``descending`` is False. ``after`` holds the key values
+    of the last row of the previous page. Returns the page and the key for the
+    next page, or None when this is the last page.
+    """
+    conditions = [where] if where else []
+    params = tuple(params)
+    compare, direction = ("<", "DESC") if descending else (">", "ASC")
+
+    if after is not None:
+        # (a, b) < (x, y) expanded so MySQL can use the index range.
+        seek = []
+        seek_params = []
+        for i, (expr, _) in enumerate(order_by):
+            terms = [f"{prev} = %s" for prev, _ in order_by[:i]] + [f"{expr} {compare} %s"]
+            seek.append("(" + " AND ".join(terms) + ")")
+            seek_params.extend(after[:i + 1])
+        conditions.append("(" + " OR ".join(seek) + ")")
+        params = params + tuple(seek_params)
+
+    query = select_sql
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY " + ", ".join(f"{expr} {direction}" for expr, _ in order_by)
+    # One extra row tells us whether another page exists without a COUNT(*).
+    query += f" LIMIT {int(page_size) + 1}"
+
+    df = fetch_data_as_df(query, params)
+    next_key = None
+    if len(df) > page_size:
+        df = df.iloc[:page_size]
+        last = df.iloc[-1]
+        next_key = tuple(_to_cursor_value(last[col]) for _, col in order_by)
+    return df, next_key
+
+def fetch_offset_page(query, params, page_size, offset):
+    """LIMIT/OFFSET fallback for orderings that have no usable seek key, such as relevance.
+
+    Returns the page and whether another page exists.
+    """
+    df = fetch_data_as_df(f"{query} LIMIT {int(page_size) + 1} OFFSET {int(offset)}", params)
+    return df.iloc[:page_size], len(df) > page_size
+
+def paginated_dataframe(key, select_sql, order_by, table_name, where=None, params=()):
+    """Renders a keyset-paginated table with page-size and Prev/Next controls.
+
+    Only the visible page is fetched; the next page is queried when the user
+    asks for it. Returns the DataFrame of the current page.
+    """
+    state_key = f"{key}_page_keys"
+    size_key = f"{key}_page_size"
+
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        page_size = st.selectbox("Rows per page", PAGE_SIZES, key=size_key)
+    if st.session_state.get(f"{key}_last_size") != page_size:
+        st.session_state[state_key] = [None]
+        st.session_state[f"{key}_last_size"] = page_size
+
+    page_keys = st.session_state.setdefault(state_key, [None])
+    df, next_key = fetch_keyset_page(select_sql, order_by, page_size, after=page_keys[-1], where=where, params=params)
+
+    with col2:
+        estimate = estimate_row_count(table_name)
+        page_number = len(page_keys)
+        if estimate is not None:
+            st.caption(f"Page {page_number} · about {estimate:,} rows in total")
+        else:
+            st.caption(f"Page {page_number}")
+
+    if not df.empty:
+        st.dataframe(df, use_container_width=True)
+
+    prev_col, next_col = st.columns(2)
+    with prev_col:
+        if st.button("⬅️ Previous", key=f"{key}_prev", disabled=len(page_keys) == 1):
+            page_keys.pop()
+            st.rerun()
+    with next_col:
+        if st.button("Next ➡️", key=f"{key}_next", disabled=next_key is None):
+            page_keys.append(next_key)
+            st.rerun()
+
+    return df
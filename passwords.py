@@ -0,0 +1,74 @@
+import hmac
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import bcrypt
+
+# bcrypt work factor: each +1 doubles the time per hash (12 is ~250 ms on one core).
+# Raising it upgrades existing hashes as users log in.
+BCRYPT_ROUNDS = 12
+# Worker processes for hashing; defaults to one per core.
+HASH_WORKERS = os.cpu_count() or 2
+
+# Workers are forked from a forkserver that has preloaded this module (and so
+# bcrypt), rather than from the Streamlit process with all its threads. They
+# are not Streamlit-free: like spawned workers, each one re-imports the
+# parent's __main__ as __mp_main__ when it starts, which under `streamlit run`
+# is the Streamlit CLI, or app.py if the pool starts during a script run. The
+# pool is a plain module global rather than a st.cache_resource.
+_executor = None
+_executor_lock = threading.Lock()
+_dummy_hash = None
+
+def _hash(password, rounds):
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds)).decode("ascii")
+
+def _check(password, hashed):
+    return bcrypt.checkpw(password.encode("utf-8"), hashed.encode("ascii"))
+
+def _pool_context():
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(["passwords"])
+        return context
+    return multiprocessing.get_context("spawn")  # Windows has no forkserver
+
+def get_hash_executor():
+    """Returns the process pool that runs bcrypt off the Streamlit script threads."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=HASH_WORKERS, mp_context=_pool_context())
+        return _executor
+
+def is_hashed(stored):
+    return stored.startswith(("$2a$", "$2b$", "$2y$"))
+
+def hash_rounds(hashed):
+    """Returns the work factor a bcrypt hash was made with."""
+    return int(hashed.split("$")[2])
+
+def hash_password(password, rounds=None):
+    """Returns the bcrypt hash of ``password`` as a string, computed in the hashing pool."""
+    return get_hash_executor().submit(_hash, password, rounds or BCRYPT_ROUNDS).result()
+
+def verify_password(password, stored):
+    """Checks a password against its stored value; returns (ok, needs_rehash).
+
+    ``stored`` may be a bcrypt hash or a legacy plain-text password, which
+    always needs rehashing, as does a hash made with an old work factor.
+    ``stored=None`` (unknown account) still costs one bcrypt check, so
+    response time doesn't reveal which emails are registered.
+    """
+    global _dummy_hash
+    if stored is None:
+        if _dummy_hash is None:
+            _dummy_hash = hash_password("not-a-password")
+        get_hash_executor().submit(_check, password, _dummy_hash).result()
+        return False, False
+    if not is_hashed(stored):
+        return hmac.compare_digest(password.encode("utf-8"), stored.encode("utf-8")), True
+    ok = get_hash_executor().submit(_check, password, stored).result()
+    return ok, ok and hash_rounds(stored) != BCRYPT_ROUNDS
@@ -0,0 +1,36 @@
+import re
+
+# InnoDB ignores shorter words in FULLTEXT indexes (innodb_ft_min_token_size).
+MIN_TOKEN_LEN = 3
+# Don't hit the database until the search term is at least this long.
+MIN_SEARCH_LEN = 2
+
+MATCH_EXPR = "MATCH(p.name, p.description) AGAINST (%s IN BOOLEAN MODE)"
+
+def to_boolean_query(search_term):
+    """Turns free text into a BOOLEAN MODE query: every word required, prefix matched.
+
+    "wire mou" becomes "+wire* +mou*". Operator characters typed by the user
+    are dropped so they can't change the meaning of the query.
+    """
+    tokens = re.findall(r"\w+", search_term.lower())
+    return " ".join(f"+{token}*" for token in tokens if len(token) >= MIN_TOKEN_LEN)
+
+def search_condition(search_term):
+    """Returns (where_sql, where_params, order_sql, order_params) for a product search.
+
+    Uses the ft_product_search FULLTEXT index and orders by relevance. When
+    every word is too short for the index, falls back to a name prefix match
+    that can use idx_product_name. Returns None if the term is too short to
+    search at all.
+    """
+    search_term = search_term.strip()
+    if len(search_term) < MIN_SEARCH_LEN:
+        return None
+
+    boolean_query = to_boolean_query(search_term)
+    if boolean_query:
+        return MATCH_EXPR, (boolean_query,), f"{MATCH_EXPR} DESC, p.name", (boolean_query,)
+
+    escaped = search_term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return "p.name LIKE %s", (f"{escaped}%",), "p.name", ()
@@ -0,0 +1,93 @@
+import threading
+import time
+from collections import OrderedDict
+
+import streamlit as st
+from db_connection import fetch_data_as_df
+
+class QueryCache:
+    """Size-bounded LRU cache of query results with per-entry TTL.
+
+    Entries are keyed by SQL text plus parameters and tagged with the tables
+    they read, so write paths can drop everything that depends on a table.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()  # key -> (expires_at, tables, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key, value, ttl, tables):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, frozenset(tables), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, *tables):
+        """Drops every entry that read any of the given tables."""
+        tables = set(tables)
+        with self._lock:
+            stale = [key for key, (_, deps, _) in self._entries.items() if deps & tables]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+@st.cache_resource
+def get_query_cache():
+    """Returns the cache shared by all sessions in this process."""
+    return QueryCache()
+
+def cached_fetch_df(query, params=(), tables=(), ttl=300):
+    """Like fetch_data_as_df, but serves repeat queries from the shared cache.
+
+    ``tables`` lists the tables the query reads; pass the same names to
+    invalidate_tables() from any code that writes them.
+    """
+    cache = get_query_cache()
+    key = (" ".join(query.split()), tuple(params))
+    df = cache.get(key)
+    if df is None:
+        # Fill from the primary: a lagging replica could re-cache rows a write just invalidated
+        df = fetch_data_as_df(query, params, primary=True)
+        # Don't cache failures, which come back as an empty frame.
+        if not df.empty:
+            cache.put(key, df, ttl, tables)
+    return df.copy()
+
+def invalidate_tables(*tables):
+    """Invalidation hook for write paths."""
+    get_query_cache().invalidate(*tables)
@@ -0,0 +1,194 @@
+import logging
+import re
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+
+import streamlit as st
+
+logger = logging.getLogger(__name__)
+
+# Statements slower than this are logged with their EXPLAIN plan.
+SLOW_QUERY_MS = 200
+# The same statement is EXPLAINed at most once per this many seconds.
+EXPLAIN_INTERVAL = 300
+# Upper bounds of the latency histogram buckets; the last bucket is open-ended.
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+MAX_STATEMENTS = 500
+SLOW_LOG_SIZE = 100
+
+# Frames in these modules are plumbing; the call site is the first frame outside them.
+_PLUMBING_MODULES = ("query_stats", "db_connection", "db_pool", "db_routing", "query_cache", "pagination", "utils")
+
+_LITERALS = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.|\"\")*\"|\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r"\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))+\s*\)")
+
+def normalize_sql(query):
+    """Collapses a statement to its shape so calls with different values group together."""
+    query = " ".join(query.split())
+    query = _LITERALS.sub("?", query)
+    return _IN_LISTS.sub("(...)", query)
+
+def call_site():
+    """Returns 'module.function' for the nearest caller outside the database plumbing."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.split(".")[0] not in _PLUMBING_MODULES and not module.startswith(("pandas", "sqlalchemy")):
+            return f"{module}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return "unknown"
+
+class StatementStats:
+    """Aggregated timings for one normalized statement."""
+
+    def __init__(self, statement):
+        self.statement = statement
+        self.calls = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.acquire_ms = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+        self.call_sites = Counter()
+        self.explained_at = None
+
+    def add(self, duration_ms, rows, acquire_ms, site, error):
+        self.calls += 1
+        self.errors += error
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+        self.rows += rows
+        self.acquire_ms += acquire_ms
+        self.buckets[_bucket(duration_ms)] += 1
+        self.call_sites[site] += 1
+
+    def percentile(self, pct):
+        """Estimates a latency percentile as the upper bound of the bucket that holds it."""
+        target = self.calls * pct / 100
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= target:
+                return min(BUCKETS_MS[index], self.max_ms) if index < len(BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+def _bucket(duration_ms):
+    for index, bound in enumerate(BUCKETS_MS):
+        if duration_ms <= bound:
+            return index
+    return len(BUCKETS_MS)
+
+class QueryStats:
+    """Per-statement latency histograms plus a log of slow statements and their plans."""
+
+    def __init__(self, max_statements=MAX_STATEMENTS):
+        self.max_statements = max_statements
+        self._statements = OrderedDict()  # normalized SQL -> StatementStats, least recently run first
+        self._slow = deque(maxlen=SLOW_LOG_SIZE)
+        self._lock = threading.Lock()
+
+    def record(self, query, params, duration, rows, acquire_time, conn=None, error=False):
+        """Records one execution; times are in seconds.
+
+        If the statement was slow and ``conn`` is still open, its EXPLAIN plan
+        is captured on that connection for the slow log.
+        """
+        statement = normalize_sql(query)
+        duration_ms = duration * 1000
+        site = call_site()
+        with self._lock:
+            stats = self._statements.get(statement)
+            if stats is None:
+                stats = self._statements[statement] = StatementStats(statement)
+                while len(self._statements) > self.max_statements:
+                    self._statements.popitem(last=False)
+            self._statements.move_to_end(statement)
+            stats.add(duration_ms, rows, acquire_time * 1000, site, error)
+
+            if duration_ms < SLOW_QUERY_MS:
+                return
+            now = time.monotonic()
+            explain = stats.explained_at is None or now - stats.explained_at >= EXPLAIN_INTERVAL
+            if explain:
+                stats.explained_at = now
+
+        plan = _explain(conn, query, params) if explain and conn is not None else None
+        entry = {
+            "at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "duration_ms": round(duration_ms, 1),
+            "rows": rows,
+            "call_site": site,
+            "statement": statement,
+            "plan": plan,
+        }
+        with self._lock:
+            self._slow.appendleft(entry)
+        logger.warning("Slow query %.0f ms (%s rows) from %s: %s%s", duration_ms, rows, site, statement,
+                       f"\nEXPLAIN: {plan}" if plan else "")
+
+    def top_statements(self, limit=25, order_by="total_ms"):
+        """Returns summary rows for the statements with the highest ``order_by``."""
+        with self._lock:
+            rows = [{
+                "statement": s.statement,
+                "calls": s.calls,
+                "errors": s.errors,
+                "total_ms": round(s.total_ms, 1),
+                "avg_ms": round(s.total_ms / s.calls, 2),
+                "p50_ms": s.percentile(50),
+                "p95_ms": s.percentile(95),
+                "p99_ms": s.percentile(99),
+                "max_ms": round(s.max_ms, 1),
+                "avg_rows": round(s.rows / s.calls, 1),
+                "avg_acquire_ms": round(s.acquire_ms / s.calls, 2),
+                "call_sites": ", ".join(site for site, _ in s.call_sites.most_common(3)),
+            } for s in self._statements.values()]
+        rows.sort(key=lambda row: row[order_by], reverse=True)
+        return rows[:limit]
+
+    def histogram(self, statement):
+        """Returns [(bucket label, count)] for one normalized statement.
+
+        Labels are numbered so that charts sorting them as text keep bucket order.
+        """
+        with self._lock:
+            stats = self._statements.get(statement)
+            buckets = list(stats.buckets) if stats else [0] * (len(BUCKETS_MS) + 1)
+        labels = [f"{i:02d} ≤{bound} ms" for i, bound in enumerate(BUCKETS_MS)]
+        labels.append(f"{len(BUCKETS_MS):02d} >{BUCKETS_MS[-1]} ms")
+        return list(zip(labels, buckets))
+
+    def slow_queries(self):
+        with self._lock:
+            return list(self._slow)
+
+    def reset(self):
+        with self._lock:
+            self._statements.clear()
+            self._slow.clear()
+
+def _explain(conn, query, params):
+    if not query.lstrip().upper().startswith(("SELECT", "WITH")):
+        return None
+    cursor = None
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(f"EXPLAIN {query}", params or ())
+        return cursor.fetchall()
+    except Exception as err:
+        return [{"error": str(err)}]
+    finally:
+        if cursor:
+            cursor.close()
+
+@st.cache_resource
+def get_query_stats():
+    """Returns the statement statistics shared by all sessions in this process."""
+    return QueryStats()
+
+def record_query(query, params, duration, rows, acquire_time, conn=None, error=False):
+    """Instrumentation hook for the query helpers in db_connection and utils."""
+    get_query_stats().record(query, params, duration, rows, acquire_time, conn, error)
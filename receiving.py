@@ -0,0 +1,154 @@
+import mysql.connector
+from db_connection import get_connection
+from query_cache import invalidate_tables
+
+def _load_receipt(cursor, purchase_order_id, quantities):
+    """Fills a per-connection temporary table with this delivery's lines.
+
+    ``quantities`` maps purchase_order_item_id to the quantity received now;
+    None receives everything still outstanding on the order.
+    """
+    cursor.execute("DROP TEMPORARY TABLE IF EXISTS Receipt_Line")
+    cursor.execute("""
+        CREATE TEMPORARY TABLE Receipt_Line (
+            purchase_order_item_id INT PRIMARY KEY,
+            quantity INT NOT NULL
+        )
+    """)
+    if quantities is None:
+        cursor.execute("""
+            INSERT INTO Receipt_Line (purchase_order_item_id, quantity)
+            SELECT purchase_order_item_id, quantity - IFNULL(received_quantity, 0)
+            FROM Purchase_Order_Item
+            WHERE purchase_order_id = %s AND quantity > IFNULL(received_quantity, 0)
+        """, (purchase_order_id,))
+        return
+    rows = [(int(item_id), int(quantity)) for item_id, quantity in quantities.items() if int(quantity) > 0]
+    for start in range(0, len(rows), 10000):
+        cursor.executemany("INSERT INTO Receipt_Line (purchase_order_item_id, quantity) VALUES (%s, %s)",
+                           rows[start:start + 10000])
+
+def _receipt_problems(cursor, purchase_order_id):
+    """Lines that aren't on this order or would take received_quantity past the ordered quantity."""
+    cursor.execute("""
+        SELECT r.purchase_order_item_id, poi.quantity, IFNULL(poi.received_quantity, 0), r.quantity
+        FROM Receipt_Line r
+        LEFT JOIN Purchase_Order_Item poi
+               ON poi.purchase_order_item_id = r.purchase_order_item_id AND poi.purchase_order_id = %s
+        WHERE poi.purchase_order_item_id IS NULL OR IFNULL(poi.received_quantity, 0) + r.quantity > poi.quantity
+        LIMIT 20
+    """, (purchase_order_id,))
+    problems = []
+    for item_id, ordered, received, receiving in cursor.fetchall():
+        if ordered is None:
+            problems.append(f"Line {item_id} is not on this purchase order")
+        else:
+            problems.append(f"Line {item_id}: receiving {receiving} would exceed {ordered} ordered ({received} already received)")
+    return problems
+
+def receive_purchase_order(purchase_order_id, quantities=None, notes=None, user_id=None):
+    """Receives a whole or partial delivery against a pending purchase order in one transaction.
+
+    All lines are applied set-based, so the number of statements doesn't
+    grow with the delivery: received quantities are bumped with one UPDATE,
+    stock for every product with another, and the 'purchase' ledger rows
+    (reference_type 'purchase_order', true stock_before/stock_after) are
+    written by a single INSERT ... SELECT. The order flips to 'received'
+    once nothing is outstanding.
+
+    Returns (True, message) or (False, message).
+    """
+    purchase_order_id = int(purchase_order_id)
+    conn = None
+    cursor = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        conn.start_transaction()
+        cursor.execute("SELECT status FROM Purchase_Order WHERE purchase_order_id = %s FOR UPDATE",
+                       (purchase_order_id,))
+        row = cursor.fetchone()
+        if row is None:
+            conn.rollback()
+            return False, "Purchase order not found"
+        if row[0] != "pending":
+            conn.rollback()
+            return False, f"Purchase order is already {row[0]}"
+
+        _load_receipt(cursor, purchase_order_id, quantities)
+        problems = _receipt_problems(cursor, purchase_order_id)
+        if problems:
+            conn.rollback()
+            return False, "; ".join(problems)
+
+        # One row per product, in case the order lists a product on more than one line
+        cursor.execute("DROP TEMPORARY TABLE IF EXISTS Receipt_Product")
+        cursor.execute("""
+            CREATE TEMPORARY TABLE Receipt_Product (product_id INT PRIMARY KEY, quantity INT NOT NULL)
+            SELECT poi.product_id, SUM(r.quantity) AS quantity
+            FROM Receipt_Line r
+            JOIN Purchase_Order_Item poi ON poi.purchase_order_item_id = r.purchase_order_item_id
+            GROUP BY poi.product_id
+        """)
+        products = cursor.rowcount
+        if products <= 0:
+            conn.rollback()
+            return False, "Nothing to receive"
+
+        # Lock every product in id order, so the ledger's stock_before can't go stale under concurrent sales
+        cursor.execute("""
+            SELECT p.product_id
+            FROM Product p
+            JOIN Receipt_Product r ON r.product_id = p.product_id
+            ORDER BY p.product_id
+            FOR UPDATE
+        """)
+        cursor.fetchall()
+
+        cursor.execute("""
+            INSERT INTO Inventory_Transaction
+                (product_id, transaction_type, quantity_change, reference_id, reference_type, notes, created_by,
+                 stock_before, stock_after)
+            SELECT p.product_id, 'purchase', r.quantity, %s, 'purchase_order', %s, %s,
+                   p.stock_quantity, p.stock_quantity + r.quantity
+            FROM Product p
+            JOIN Receipt_Product r ON r.product_id = p.product_id
+        """, (purchase_order_id, notes or f"Received against PO #{purchase_order_id}", user_id))
+
+        cursor.execute("""
+            UPDATE Product p
+            JOIN Receipt_Product r ON r.product_id = p.product_id
+            SET p.stock_quantity = p.stock_quantity + r.quantity
+        """)
+        cursor.execute("""
+            UPDATE Purchase_Order_Item poi
+            JOIN Receipt_Line r ON r.purchase_order_item_id = poi.purchase_order_item_id
+            SET poi.received_quantity = IFNULL(poi.received_quantity, 0) + r.quantity
+        """)
+        cursor.execute("""
+            UPDATE Purchase_Order po
+            SET po.status = 'received'
+            WHERE po.purchase_order_id = %s
+              AND NOT EXISTS (
+                  SELECT 1 FROM Purchase_Order_Item poi
+                  WHERE poi.purchase_order_id = po.purchase_order_id
+                    AND IFNULL(poi.received_quantity, 0) < poi.quantity
+              )
+        """, (purchase_order_id,))
+        completed = cursor.rowcount == 1
+
+        conn.commit()
+        cursor.execute("DROP TEMPORARY TABLE IF EXISTS Receipt_Line")
+        cursor.execute("DROP TEMPORARY TABLE IF EXISTS Receipt_Product")
+        invalidate_tables("Product", "Inventory_Transaction", "Purchase_Order", "Purchase_Order_Item")
+        status = "order fully received" if completed else "order still has outstanding lines"
+        return True, f"Received stock for {products:,} products; {status}."
+    except mysql.connector.Error as err:
+        if conn:
+            conn.rollback()
+        return False, f"Receiving failed: {err}"
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
@@ -0,0 +1,199 @@
+from datetime import date, timedelta
+from statistics import NormalDist
+
+import mysql.connector
+import numpy as np
+import pandas as pd
+from db_connection import get_connection, fetch_rows
+from ledger_archive import archived_through, iter_archived_ledger
+from query_cache import invalidate_tables
+
+# Days of sales history used to estimate demand.
+DEMAND_WINDOW_DAYS = 90
+# Days from ordering to delivery; there is no per-supplier lead time in the schema yet.
+LEAD_TIME_DAYS = 7
+# Days of demand an order should cover beyond the reorder point (time until the next review).
+REVIEW_PERIOD_DAYS = 14
+# Probability of not running out during a lead time.
+SERVICE_LEVEL = 0.95
+
+def load_products():
+    """Every orderable product with stock, cost, and quantity already on open purchase orders."""
+    return fetch_rows("""
+        SELECT p.product_id, p.sku, p.name, p.supplier, p.stock_quantity, p.min_stock_level,
+               COALESCE(p.cost_price, p.price) AS unit_cost, COALESCE(o.on_order, 0) AS on_order
+        FROM Product p
+        LEFT JOIN (
+            SELECT poi.product_id, SUM(GREATEST(poi.quantity - IFNULL(poi.received_quantity, 0), 0)) AS on_order
+            FROM Purchase_Order_Item poi
+            JOIN Purchase_Order po ON po.purchase_order_id = poi.purchase_order_id
+            WHERE po.status = 'pending'
+            GROUP BY poi.product_id
+        ) o ON o.product_id = p.product_id
+        WHERE p.status <> 'discontinued'
+    """, primary=True).to_df()
+
+def _archived_sales(start, end):
+    """Per-product units and squared daily units from archived ledger months in [start, end)."""
+    days = []
+    for batch in iter_archived_ledger(start, end, columns=["product_id", "transaction_type", "quantity_change",
+                                                           "transaction_date"]):
+        sales = batch[batch["transaction_type"] == "sale"]
+        days.append((-sales["quantity_change"]).groupby(
+            [sales["product_id"], sales["transaction_date"].dt.normalize()]).sum())
+    if not days:
+        return pd.DataFrame(columns=["product_id", "units", "units_sq"])
+    # A day can span two batches, so days are totalled again before squaring
+    daily = pd.concat(days).groupby(level=[0, 1]).sum().astype(float)
+    units = daily.groupby(level=0).sum()
+    units_sq = (daily ** 2).groupby(level=0).sum()
+    return pd.DataFrame({"product_id": units.index, "units": units.to_numpy(), "units_sq": units_sq.to_numpy()})
+
+def load_sales(window_days=DEMAND_WINDOW_DAYS, end_date=None):
+    """Per-product units sold and sum of squared daily units over the window ending before ``end_date``.
+
+    Days are totalled in SQL, so only one row per product that sold comes
+    back however long the window is; days without sales count as zero.
+    Whole months moved to the ledger archive are totalled from its Parquet
+    files instead, so a long window isn't cut short at the archive boundary.
+    """
+    end_date = end_date or date.today()
+    start_date = end_date - timedelta(days=window_days)
+    archived = archived_through()
+    online_start = max(start_date, archived) if archived else start_date
+    online = fetch_rows("""
+        SELECT product_id, SUM(units) AS units, SUM(units * units) AS units_sq
+        FROM (
+            SELECT product_id, DATE(transaction_date) AS sale_day, -SUM(quantity_change) AS units
+            FROM Inventory_Transaction
+            WHERE transaction_type = 'sale'
+              AND transaction_date >= %s AND transaction_date < %s
+            GROUP BY product_id, DATE(transaction_date)
+        ) daily
+        GROUP BY product_id
+    """, (online_start, end_date), primary=True).to_df()
+    if not archived or start_date >= archived:
+        return online
+    online[["units", "units_sq"]] = online[["units", "units_sq"]].astype(float)
+    old = _archived_sales(start_date, min(archived, end_date))
+    # Archived months are whole, so no day is split between the archive and the online ledger
+    return pd.concat([online, old], ignore_index=True).groupby("product_id", as_index=False).sum()
+
+def compute_reorder_plan(products, sales, window_days=DEMAND_WINDOW_DAYS, lead_time_days=LEAD_TIME_DAYS,
+                         review_days=REVIEW_PERIOD_DAYS, service_level=SERVICE_LEVEL):
+    """Computes demand, safety stock, reorder point and order quantity for every product at once.
+
+    * daily_demand is mean units per day over the window, demand_std its
+      day-to-day standard deviation.
+    * safety_stock = z * demand_std * sqrt(lead time), for the service level's z.
+    * reorder_point covers expected lead-time demand plus safety stock, and
+      never drops below the product's static min_stock_level.
+    * When stock plus open orders is at or below the reorder point, the order
+      brings it up to the reorder point plus ``review_days`` of demand.
+    """
+    plan = products.merge(sales, on="product_id", how="left")
+    units = plan["units"].fillna(0).to_numpy(dtype=float)
+    units_sq = plan["units_sq"].fillna(0).to_numpy(dtype=float)
+    stock = plan["stock_quantity"].fillna(0).to_numpy(dtype=float)
+    on_order = plan["on_order"].fillna(0).to_numpy(dtype=float)
+    min_level = plan["min_stock_level"].fillna(0).to_numpy(dtype=float)
+
+    rate = units / window_days
+    # Sample variance over all days in the window, zero-sale days included
+    variance = np.maximum(units_sq / window_days - rate ** 2, 0) * window_days / max(window_days - 1, 1)
+    std = np.sqrt(variance)
+    z = NormalDist().inv_cdf(service_level)
+
+    safety_stock = np.ceil(z * std * np.sqrt(lead_time_days))
+    reorder_point = np.maximum(np.ceil(rate * lead_time_days + safety_stock), min_level)
+    position = stock + on_order
+    order_up_to = reorder_point + np.ceil(rate * review_days)
+    order_quantity = np.where(position <= reorder_point, np.maximum(order_up_to - position, 0), 0)
+
+    plan["daily_demand"] = rate.round(2)
+    plan["demand_std"] = std.round(2)
+    plan["safety_stock"] = safety_stock.astype(int)
+    plan["reorder_point"] = reorder_point.astype(int)
+    plan["inventory_position"] = position.astype(int)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        plan["days_of_cover"] = np.where(rate > 0, position / rate, np.inf).round(1)
+    plan["order_quantity"] = order_quantity.astype(int)
+    plan["order_value"] = (order_quantity * plan["unit_cost"].astype(float).to_numpy()).round(2)
+    return plan.drop(columns=["units", "units_sq"])
+
+def build_reorder_plan(window_days=DEMAND_WINDOW_DAYS, lead_time_days=LEAD_TIME_DAYS,
+                       review_days=REVIEW_PERIOD_DAYS, service_level=SERVICE_LEVEL):
+    """Loads the catalogue and sales history and returns the plan for every product."""
+    return compute_reorder_plan(load_products(), load_sales(window_days), window_days, lead_time_days,
+                                review_days, service_level)
+
+def _supplier_ids(cursor, names):
+    """Returns {lower-cased supplier name: supplier_id}, creating Supplier rows for names not on file yet."""
+    if not names:
+        return {}
+    query = f"SELECT name, MIN(supplier_id) FROM Supplier WHERE name IN ({', '.join(['%s'] * len(names))}) GROUP BY name"
+    cursor.execute(query, names)
+    ids = {name.lower(): supplier_id for name, supplier_id in cursor.fetchall()}
+    missing = [name for name in names if name.lower() not in ids]
+    if missing:
+        cursor.executemany("INSERT INTO Supplier (name) VALUES (%s)", [(name,) for name in missing])
+        cursor.execute(query, names)
+        ids = {name.lower(): supplier_id for name, supplier_id in cursor.fetchall()}
+    return ids
+
+def draft_purchase_orders(plan, lead_time_days=LEAD_TIME_DAYS, user_id=None):
+    """Writes one pending Purchase_Order per supplier for every plan line with an order quantity.
+
+    Products are matched to Supplier rows by their supplier name (new names
+    get a Supplier row); products without a supplier share one order with no
+    supplier. Everything is written in one transaction; the order lines go
+    in as multi-row INSERTs. Returns (True, message) or (False, message).
+    """
+    lines = plan[plan["order_quantity"] > 0].copy()
+    if lines.empty:
+        return True, "Nothing needs reordering."
+    lines["supplier"] = lines["supplier"].fillna("").astype(str).str.strip()
+    # Supplier names compare case-insensitively, like the Supplier.name column
+    lines["supplier_key"] = lines["supplier"].str.lower()
+
+    conn = None
+    cursor = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        conn.start_transaction()
+        names = lines.drop_duplicates("supplier_key")["supplier"]
+        supplier_ids = _supplier_ids(cursor, sorted(name for name in names if name))
+
+        today = date.today()
+        groups = list(lines.groupby("supplier_key", sort=True))
+        items = []
+        # One INSERT per supplier, so each order's id is its own lastrowid rather
+        # than assumed to follow on from the previous one
+        for key, group in groups:
+            cursor.execute("""
+                INSERT INTO Purchase_Order (supplier_id, order_date, expected_delivery_date, status, total_amount, created_by)
+                VALUES (%s, %s, %s, 'pending', %s, %s)
+            """, (supplier_ids.get(key), today, today + timedelta(days=lead_time_days),
+                  float(group["order_value"].sum()), user_id))
+            purchase_order_id = cursor.lastrowid
+            items.extend((purchase_order_id, int(product_id), int(quantity), float(cost))
+                         for product_id, quantity, cost in zip(group["product_id"], group["order_quantity"],
+                                                               group["unit_cost"]))
+        for start in range(0, len(items), 10000):
+            cursor.executemany("""
+                INSERT INTO Purchase_Order_Item (purchase_order_id, product_id, quantity, unit_cost)
+                VALUES (%s, %s, %s, %s)
+            """, items[start:start + 10000])
+        conn.commit()
+        invalidate_tables("Supplier", "Purchase_Order", "Purchase_Order_Item")
+        return True, f"Drafted {len(groups):,} purchase orders covering {len(items):,} products."
+    except mysql.connector.Error as err:
+        if conn:
+            conn.rollback()
+        return False, f"Drafting purchase orders failed: {err}"
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
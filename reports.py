@@ -0,0 +1,167 @@
+import time
+from datetime import timedelta
+
+import pandas as pd
+from catalog_io import export_products
+from ledger_archive import archive_cold_months, prune_snapshots
+from db_connection import ResultSet
+from query_stats import record_query
+from stock_history import check_ledger_chain, stock_at
+
+# Background report jobs. Each function takes the read router (resolved on the
+# script thread when the job is submitted) plus the Job for progress reports,
+# borrows one connection for its whole run, and raises on database errors so
+# a failure is never cached as an empty result.
+
+# Long sales summaries are read this many days at a time so the job can report progress.
+SUMMARY_CHUNK_DAYS = 31
+
+def _read_df(conn, query, params=()):
+    """Runs one read on a borrowed connection and returns a DataFrame; raises on errors."""
+    cursor = conn.cursor()
+    rows = []
+    error = False
+    start = time.perf_counter()
+    try:
+        cursor.execute(query, tuple(params))
+        rows = cursor.fetchall()
+        return ResultSet(cursor.column_names, rows).to_df()
+    except Exception:
+        error = True
+        raise
+    finally:
+        cursor.close()
+        record_query(query, params, time.perf_counter() - start, len(rows), 0.0, conn, error)
+
+def _call_df(conn, procedure, args=()):
+    """Calls a stored procedure on a borrowed connection and returns its rows as one DataFrame."""
+    cursor = conn.cursor()
+    frames = []
+    error = False
+    start = time.perf_counter()
+    try:
+        cursor.callproc(procedure, args)
+        for result in cursor.stored_results():
+            frames.append(ResultSet(result.column_names, result.fetchall()).to_df())
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    except Exception:
+        error = True
+        raise
+    finally:
+        cursor.close()
+        record_query(f"CALL {procedure}", args, time.perf_counter() - start,
+                     sum(len(frame) for frame in frames), 0.0, error=error)
+
+def date_windows(start_date, end_date, days=SUMMARY_CHUNK_DAYS):
+    """Splits an inclusive date range into consecutive inclusive windows of at most ``days`` days."""
+    windows = []
+    window_start = start_date
+    while window_start <= end_date:
+        window_end = min(window_start + timedelta(days=days - 1), end_date)
+        windows.append((window_start, window_end))
+        window_start = window_end + timedelta(days=1)
+    return windows
+
+def sales_summary(router, start_date, end_date, job):
+    """Daily sales rows from GetSalesReport, read window by window."""
+    conn = router.acquire_read()
+    try:
+        windows = date_windows(start_date, end_date)
+        frames = []
+        for done, (window_start, window_end) in enumerate(windows, 1):
+            frames.append(_call_df(conn, "GetSalesReport", (window_start, window_end)))
+            job.report(done / len(windows), f"Read sales up to {window_end:%d %b %Y}")
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    finally:
+        conn.close()
+
+def top_products(router, limit, job):
+    conn = router.acquire_read()
+    try:
+        job.report(0.1, "Ranking products...")
+        return _call_df(conn, "GetTopSellingProducts", (int(limit),))
+    finally:
+        conn.close()
+
+def category_sales(router, start_date, end_date, job):
+    conn = router.acquire_read()
+    try:
+        job.report(0.1, "Totalling categories...")
+        return _read_df(conn, """
+            SELECT
+                c.category_name,
+                SUM(d.order_count) as orders,
+                SUM(d.units_sold) as items_sold,
+                SUM(d.revenue) as revenue
+            FROM Daily_Category_Sales d
+            JOIN Category c ON d.category_id = c.category_id
+            WHERE d.sale_date BETWEEN %s AND %s
+            GROUP BY c.category_id, c.category_name
+            HAVING orders > 0
+            ORDER BY revenue DESC
+        """, (start_date, end_date))
+    finally:
+        conn.close()
+
+def category_stock_value(router, job):
+    """Stock value per category via GetCategoryStockValue."""
+    conn = router.acquire_read()
+    try:
+        job.report(0.1, "Valuing stock...")
+        return _read_df(conn, """
+            SELECT c.category_id, c.category_name, GetCategoryStockValue(c.category_id) AS stock_value
+            FROM Category c
+            ORDER BY stock_value DESC
+        """)
+    finally:
+        conn.close()
+
+def catalog_export(router, fmt, job):
+    """Writes the catalogue export file and returns its path."""
+    conn = router.acquire_read()
+    try:
+        total = int(_read_df(conn, "SELECT COUNT(*) AS products FROM Product")["products"].iloc[0])
+        return export_products(fmt, fetch=lambda query, params: _read_df(conn, query, params),
+                               on_progress=lambda rows: job.report(rows / max(total, 1),
+                                                                   f"Exported {rows:,} of {total:,} products"))
+    finally:
+        conn.close()
+
+def stock_snapshot_at(router, moment, job):
+    """Every product's stock at ``moment``, rebuilt from the ledger."""
+    conn = router.acquire_read()
+    try:
+        job.report(0.05, "Replaying ledger...")
+        return stock_at(moment, conn, on_progress=lambda rows: job.report(0.5, f"Replayed {rows:,} ledger rows"))
+    finally:
+        conn.close()
+
+def ledger_consistency(router, job):
+    """Flagged ledger rows from check_ledger_chain; exact per-problem counts ride along in ``attrs``."""
+    conn = router.acquire_read()
+    try:
+        counts, report = check_ledger_chain(
+            conn, on_progress=lambda done, total: job.report(done / max(total, 1), f"Checked up to #{done:,}"))
+        report.attrs["counts"] = counts
+        return report
+    finally:
+        conn.close()
+
+def ledger_archive(job):
+    """Archives cold ledger months, then thins old snapshots; one row per step.
+
+    Unlike the reports this writes, so it uses primary connections (through
+    ledger_archive) rather than the read router.
+    """
+    job.report(0.05, "Archiving cold ledger months...")
+    success, message = archive_cold_months(
+        on_progress=lambda month, rows: job.report(0.5, f"Archived {month:%Y-%m} ({rows:,} rows)"))
+    if not success:
+        raise RuntimeError(message)
+    steps = [("archive", message)]
+    job.report(0.9, "Pruning old snapshots...")
+    success, prune_message = prune_snapshots()
+    if not success:
+        raise RuntimeError(f"{message} But {prune_message}")
+    steps.append(("prune", prune_message))
+    return pd.DataFrame(steps, columns=["step", "message"])
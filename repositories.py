@@ -0,0 +1,202 @@
+import mysql.connector
+from db_connection import get_connection, fetch_rows, ResultSet
+from query_cache import invalidate_tables
+
+# Reads return a ResultSet of tuples (call .to_df() only where a view needs a
+# DataFrame) and use prepared statements. Writes run on the primary in their
+# own transaction and return (True, result) or (False, message).
+
+def _write(query, params, tables=()):
+    """Runs one write statement; returns (True, (rowcount, lastrowid)) or (False, message)."""
+    conn = None
+    cursor = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        conn.commit()
+        if tables:
+            invalidate_tables(*tables)
+        return True, (cursor.rowcount, cursor.lastrowid)
+    except mysql.connector.Error as err:
+        if conn:
+            conn.rollback()
+        if "Duplicate entry" in str(err):
+            return False, f"Already exists: {err.msg}"
+        return False, f"Database error: {err}"
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+def _placeholders(values):
+    return ", ".join(["%s"] * len(values))
+
+class ProductRepo:
+    @staticmethod
+    def get(product_id):
+        """Returns one product as a dict, or None."""
+        return fetch_rows("SELECT * FROM Product WHERE product_id = %s", (int(product_id),), prepared=True).first()
+
+    @staticmethod
+    def by_ids(product_ids, primary=False):
+        """Current price, stock and status for a batch of products in one round trip."""
+        product_ids = [int(pid) for pid in product_ids]
+        if not product_ids:
+            return ResultSet(("product_id", "name", "price", "stock_quantity", "status"))
+        return fetch_rows(f"""
+            SELECT product_id, name, price, stock_quantity, status
+            FROM Product
+            WHERE product_id IN ({_placeholders(product_ids)})
+        """, product_ids, primary=primary, prepared=True)
+
+    @staticmethod
+    def inventory_summary():
+        return fetch_rows("""
+            SELECT
+                COUNT(*) AS total_products,
+                SUM(stock_quantity) AS total_stock,
+                SUM(stock_quantity * price) AS total_value,
+                COUNT(CASE WHEN stock_quantity <= min_stock_level THEN 1 END) AS low_stock_items,
+                COUNT(CASE WHEN stock_quantity = 0 THEN 1 END) AS out_of_stock_items
+            FROM Product
+        """, prepared=True)
+
+    @staticmethod
+    def low_stock(limit=10):
+        return fetch_rows("""
+            SELECT p.product_id, p.name, p.stock_quantity, p.min_stock_level, c.category_name
+            FROM Product p
+            JOIN Category c ON p.category_id = c.category_id
+            WHERE p.stock_quantity <= p.min_stock_level
+            ORDER BY p.stock_quantity ASC
+            LIMIT %s
+        """, (int(limit),), prepared=True)
+
+    @staticmethod
+    def create(name, description, price, stock_quantity, min_stock_level, category_id, sku, supplier, cost_price):
+        """Returns (True, product_id) or (False, message)."""
+        success, result = _write("""
+            INSERT INTO Product (name, description, price, stock_quantity, min_stock_level,
+                                 category_id, sku, supplier, cost_price)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """, (name, description, price, int(stock_quantity), int(min_stock_level), int(category_id),
+              sku or None, supplier, cost_price), tables=("Product",))
+        return (True, result[1]) if success else (False, result)
+
+    @staticmethod
+    def update_details(product_id, name, description, price, min_stock_level, category_id):
+        """Updates everything but stock, which only changes through the stock ledger."""
+        success, result = _write("""
+            UPDATE Product SET name = %s, description = %s, price = %s,
+                               min_stock_level = %s, category_id = %s
+            WHERE product_id = %s
+        """, (name, description, price, int(min_stock_level), int(category_id), int(product_id)), tables=("Product",))
+        return (True, "Product updated successfully!") if success else (False, result)
+
+class OrderRepo:
+    @staticmethod
+    def for_customer(customer_id):
+        return fetch_rows("""
+            SELECT order_id, order_date, total_amount, status, payment_status, payment_method
+            FROM Orders
+            WHERE customer_id = %s
+            ORDER BY order_date DESC
+        """, (int(customer_id),), prepared=True)
+
+    @staticmethod
+    def items(order_id):
+        return fetch_rows("""
+            SELECT oi.order_item_id, p.name, oi.quantity, oi.price_at_purchase, oi.subtotal
+            FROM Order_Item oi
+            JOIN Product p ON oi.product_id = p.product_id
+            WHERE oi.order_id = %s
+        """, (int(order_id),), prepared=True)
+
+    @staticmethod
+    def customer_stats(customer_id):
+        """Returns {'total_orders', 'total_spent', 'last_order_date'}."""
+        return fetch_rows("""
+            SELECT COUNT(*) AS total_orders, SUM(total_amount) AS total_spent, MAX(order_date) AS last_order_date
+            FROM Orders
+            WHERE customer_id = %s
+        """, (int(customer_id),), prepared=True).first()
+
+class InventoryRepo:
+    @staticmethod
+    def current_stock(product_id):
+        """Reads stock from the primary, since it changes constantly."""
+        return fetch_rows("SELECT stock_quantity FROM Product WHERE product_id = %s", (int(product_id),),
+                          primary=True, prepared=True).scalar()
+
+    @staticmethod
+    def recent_transactions(limit=50):
+        return fetch_rows("""
+            SELECT it.transaction_date, p.name, it.transaction_type, it.quantity_change,
+                   it.stock_before, it.stock_after, it.notes
+            FROM Inventory_Transaction it
+            JOIN Product p ON it.product_id = p.product_id
+            ORDER BY it.transaction_date DESC
+            LIMIT %s
+        """, (int(limit),), prepared=True)
+
+class PurchaseOrderRepo:
+    @staticmethod
+    def pending():
+        """Pending purchase orders with their line counts and outstanding units."""
+        return fetch_rows("""
+            SELECT po.purchase_order_id, COALESCE(s.name, '(no supplier)') AS supplier, po.order_date,
+                   po.expected_delivery_date, po.total_amount, COUNT(poi.purchase_order_item_id) AS line_count,
+                   SUM(GREATEST(poi.quantity - IFNULL(poi.received_quantity, 0), 0)) AS outstanding_units
+            FROM Purchase_Order po
+            LEFT JOIN Supplier s ON s.supplier_id = po.supplier_id
+            JOIN Purchase_Order_Item poi ON poi.purchase_order_id = po.purchase_order_id
+            WHERE po.status = 'pending'
+            GROUP BY po.purchase_order_id, s.name, po.order_date, po.expected_delivery_date, po.total_amount
+            ORDER BY po.expected_delivery_date, po.purchase_order_id
+        """, primary=True)
+
+    @staticmethod
+    def items(purchase_order_id):
+        """Lines of one purchase order; read from the primary so received quantities are current."""
+        return fetch_rows("""
+            SELECT poi.purchase_order_item_id, p.sku, p.name, poi.quantity, poi.unit_cost,
+                   IFNULL(poi.received_quantity, 0) AS received_quantity
+            FROM Purchase_Order_Item poi
+            JOIN Product p ON p.product_id = poi.product_id
+            WHERE poi.purchase_order_id = %s
+            ORDER BY poi.purchase_order_item_id
+        """, (int(purchase_order_id),), primary=True, prepared=True)
+
+class CustomerRepo:
+    @staticmethod
+    def get(customer_id):
+        """Returns one customer as a dict, or None."""
+        return fetch_rows("SELECT * FROM Customer WHERE customer_id = %s", (int(customer_id),), prepared=True).first()
+
+    @staticmethod
+    def login_lookup(email):
+        """Returns {'customer_id', 'name', 'password'} for an email, or None. Reads the primary."""
+        return fetch_rows("SELECT customer_id, name, password FROM Customer WHERE email = %s", (email,),
+                          primary=True, prepared=True).first()
+
+    @staticmethod
+    def replace_password_hash(customer_id, old_value, new_hash):
+        """Swaps in a new password hash unless the password changed since ``old_value`` was read."""
+        success, result = _write("UPDATE Customer SET password = %s WHERE customer_id = %s AND password = %s",
+                                 (new_hash, int(customer_id), old_value))
+        return (True, result[0] == 1) if success else (False, result)
+
+    @staticmethod
+    def update_profile(customer_id, name, email, phone, city, state, pin, address):
+        success, result = _write("""
+            UPDATE Customer
+            SET name = %s, email = %s, phone = %s, city = %s, state = %s, pin = %s, address = %s
+            WHERE customer_id = %s
+        """, (name, email, phone, city, state, pin, address, int(customer_id)))
+        if success:
+            return True, "Profile updated successfully!"
+        if "Already exists" in result and "email" in result:
+            return False, "Email already registered."
+        return False, result
@@ -0,0 +1,39 @@
+import argparse
+from datetime import date
+
+import mysql.connector
+from db_connection import get_connection
+
+def rebuild_sales_rollup(start_date=None, end_date=None):
+    """Rebuilds the Daily_* rollup tables from Orders/Order_Item.
+
+    Triggers keep the rollups current as orders are placed and cancelled;
+    this is for the initial backfill and for repairing drift. Leaving both
+    dates as None rebuilds everything. Returns (success, message).
+    """
+    conn = None
+    cursor = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.callproc("RebuildSalesRollup", (start_date, end_date))
+        conn.commit()
+        return True, "Sales rollup rebuilt."
+    except mysql.connector.Error as err:
+        if conn:
+            conn.rollback()
+        return False, f"Rollup rebuild failed: {err}"
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill or rebuild the daily sales rollup tables.")
+    parser.add_argument("--start", type=date.fromisoformat, help="First day to rebuild (default: all history)")
+    parser.add_argument("--end", type=date.fromisoformat, help="Last day to rebuild (default: all history)")
+    args = parser.parse_args()
+    success, message = rebuild_sales_rollup(args.start, args.end)
+    print(message)
+    raise SystemExit(0 if success else 1)
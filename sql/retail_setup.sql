@@ -41,7 +41,7 @@ CREATE TABLE Customer (
     name VARCHAR(255) NOT NULL,
     email VARCHAR(255) NOT NULL UNIQUE,
     phone VARCHAR(20),
-    password VARCHAR(255) NOT NULL,  -- Plain text as requested
+    password VARCHAR(255) NOT NULL,  -- bcrypt hash; legacy plain-text rows are rehashed on login
     city VARCHAR(100),
     state VARCHAR(100),
     pin VARCHAR(10),
@@ -134,6 +134,80 @@ CREATE TABLE Inventory_Transaction (
     FOREIGN KEY (product_id) REFERENCES Product(product_id) ON DELETE CASCADE
 );
 
+-- Daily sales rollups (maintained incrementally by triggers, rebuilt by RebuildSalesRollup)
+-- Daily_Sales and Daily_Category_Sales are split into 16 shards by order_id % 16, so
+-- concurrent checkouts update different rows instead of queueing on one per day.
+-- A single shard can go negative after a cancellation; readers always SUM over shards.
+CREATE TABLE Daily_Sales (
+    sale_date DATE NOT NULL,
+    shard TINYINT NOT NULL DEFAULT 0,
+    total_orders INT NOT NULL DEFAULT 0,
+    units_sold INT NOT NULL DEFAULT 0,
+    total_revenue DECIMAL(14,2) NOT NULL DEFAULT 0,
+    unique_customers INT NOT NULL DEFAULT 0,
+    delivered_orders INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (sale_date, shard)
+);
+
+-- Orders per customer per day, so unique_customers can be maintained exactly
+CREATE TABLE Daily_Sales_Customer (
+    sale_date DATE NOT NULL,
+    customer_id INT NOT NULL,
+    order_count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (sale_date, customer_id)
+);
+
+CREATE TABLE Daily_Product_Sales (
+    sale_date DATE NOT NULL,
+    product_id INT NOT NULL,
+    category_id INT NOT NULL DEFAULT 0,  -- 0 = uncategorised
+    order_count INT NOT NULL DEFAULT 0,
+    units_sold INT NOT NULL DEFAULT 0,
+    revenue DECIMAL(14,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (sale_date, product_id),
+    INDEX idx_daily_product (product_id)
+);
+
+CREATE TABLE Daily_Category_Sales (
+    sale_date DATE NOT NULL,
+    category_id INT NOT NULL,  -- 0 = uncategorised
+    shard TINYINT NOT NULL DEFAULT 0,
+    order_count INT NOT NULL DEFAULT 0,
+    units_sold INT NOT NULL DEFAULT 0,
+    revenue DECIMAL(14,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (sale_date, category_id, shard)
+);
+
+-- Cart Table (one saved cart per customer)
+CREATE TABLE Cart (
+    cart_id INT AUTO_INCREMENT PRIMARY KEY,
+    customer_id INT NOT NULL UNIQUE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (customer_id) REFERENCES Customer(customer_id) ON DELETE CASCADE
+);
+
+-- Cart Items Table
+CREATE TABLE Cart_Item (
+    cart_id INT NOT NULL,
+    product_id INT NOT NULL,
+    quantity INT NOT NULL,
+    price_at_add DECIMAL(10,2) NOT NULL,  -- Informational; checkout always charges the current price
+    added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (cart_id, product_id),
+    FOREIGN KEY (cart_id) REFERENCES Cart(cart_id) ON DELETE CASCADE,
+    FOREIGN KEY (product_id) REFERENCES Product(product_id) ON DELETE CASCADE
+);
+
+-- Daily closing stock per product (written by ledger_archive.take_stock_snapshot)
+CREATE TABLE Stock_Snapshot (
+    snapshot_date DATE NOT NULL,  -- Stock at the end of this day
+    product_id INT NOT NULL,
+    stock_quantity INT NOT NULL,
+    PRIMARY KEY (snapshot_date, product_id),
+    INDEX idx_snapshot_product (product_id, snapshot_date)
+);
+
 -- Users Table (for staff/admin access)
 CREATE TABLE Users (
     user_id INT AUTO_INCREMENT PRIMARY KEY,
@@ -208,13 +282,21 @@ INSERT INTO Users (username, password, role, name, email) VALUES
 CREATE INDEX idx_product_category ON Product(category_id);
 CREATE INDEX idx_product_sku ON Product(sku);
 CREATE INDEX idx_product_status ON Product(status);
+CREATE INDEX idx_product_name ON Product(name);
+CREATE FULLTEXT INDEX ft_product_search ON Product(name, description);
+CREATE INDEX idx_product_browse_name ON Product(status, name);  -- Keyset pages for the customer product grid
+CREATE INDEX idx_product_browse_price ON Product(status, price);
+CREATE INDEX idx_product_browse_newest ON Product(status, created_at);
 CREATE INDEX idx_customer_email ON Customer(email);
+CREATE INDEX idx_customer_created ON Customer(created_at, customer_id);
 CREATE INDEX idx_orders_customer ON Orders(customer_id);
-CREATE INDEX idx_orders_date ON Orders(order_date);
-CREATE INDEX idx_order_items_order ON Order_Item(order_id);
-CREATE INDEX idx_order_items_product ON Order_Item(product_id);
+CREATE INDEX idx_orders_date ON Orders(order_date, order_id);
+CREATE INDEX idx_orders_status_date ON Orders(status, order_date, customer_id, total_amount);  -- Covers date-range reports
+CREATE INDEX idx_order_items_order ON Order_Item(order_id, product_id, quantity, subtotal);
+CREATE INDEX idx_order_items_product ON Order_Item(product_id, order_id, quantity, subtotal);
 CREATE INDEX idx_inventory_product ON Inventory_Transaction(product_id);
 CREATE INDEX idx_inventory_date ON Inventory_Transaction(transaction_date);
+CREATE INDEX idx_inventory_type_date ON Inventory_Transaction(transaction_type, transaction_date, product_id, quantity_change);  -- Covers the reorder engine's sales history scan
 
 -- Create Views for common queries
 CREATE VIEW ProductInventory AS
@@ -242,14 +324,14 @@ LEFT JOIN Category c ON p.category_id = c.category_id;
 
 CREATE VIEW SalesSummary AS
 SELECT 
-    DATE(o.order_date) as sale_date,
-    COUNT(o.order_id) as total_orders,
-    SUM(o.total_amount) as total_revenue,
-    AVG(o.total_amount) as average_order_value,
-    COUNT(DISTINCT o.customer_id) as unique_customers
-FROM Orders o
-WHERE o.status != 'cancelled'
-GROUP BY DATE(o.order_date);
+    sale_date,
+    CAST(SUM(total_orders) AS SIGNED) as total_orders,
+    SUM(total_revenue) as total_revenue,
+    SUM(total_revenue) / NULLIF(SUM(total_orders), 0) as average_order_value,
+    CAST(SUM(unique_customers) AS SIGNED) as unique_customers
+FROM Daily_Sales
+GROUP BY sale_date
+HAVING SUM(total_orders) > 0;
 
 -- Triggers
 DELIMITER $$
@@ -264,6 +346,11 @@ BEGIN
         updated_at = CURRENT_TIMESTAMP
     WHERE product_id = NEW.product_id;
     
+    -- Same rule as UpdateStock: a sale may never take stock below zero
+    IF (SELECT stock_quantity FROM Product WHERE product_id = NEW.product_id) < 0 THEN
+        SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = 'Insufficient stock';
+    END IF;
+    
     -- Record inventory transaction
     INSERT INTO Inventory_Transaction (
         product_id, transaction_type, quantity_change, 
@@ -305,6 +392,174 @@ BEGIN
     END IF;
 END$$
 
+-- Trigger to roll a new order into the daily sales totals
+CREATE TRIGGER rollup_on_order
+AFTER INSERT ON Orders
+FOR EACH ROW
+BEGIN
+    DECLARE v_new_customer INT DEFAULT 0;
+
+    IF NEW.status != 'cancelled' THEN
+        IF NEW.customer_id IS NOT NULL THEN
+            INSERT INTO Daily_Sales_Customer (sale_date, customer_id, order_count)
+            VALUES (DATE(NEW.order_date), NEW.customer_id, 1)
+            ON DUPLICATE KEY UPDATE order_count = order_count + 1;
+            -- ROW_COUNT() is 1 for a fresh insert, 2 when an existing row was bumped
+            SET v_new_customer = IF(ROW_COUNT() = 1, 1, 0);
+        END IF;
+
+        INSERT INTO Daily_Sales (sale_date, shard, total_orders, total_revenue, unique_customers, delivered_orders)
+        VALUES (DATE(NEW.order_date), NEW.order_id % 16, 1, NEW.total_amount, v_new_customer,
+                IF(NEW.status = 'delivered', 1, 0))
+        ON DUPLICATE KEY UPDATE
+            total_orders = total_orders + 1,
+            total_revenue = total_revenue + NEW.total_amount,
+            unique_customers = unique_customers + v_new_customer,
+            delivered_orders = delivered_orders + IF(NEW.status = 'delivered', 1, 0);
+    END IF;
+END$$
+
+-- Trigger to roll each order line into the daily product and category totals
+CREATE TRIGGER rollup_on_order_item
+AFTER INSERT ON Order_Item
+FOR EACH ROW
+BEGIN
+    DECLARE v_sale_date DATE;
+    DECLARE v_status VARCHAR(20);
+    DECLARE v_category_id INT;
+    DECLARE v_new_category INT;
+    DECLARE v_revenue DECIMAL(12,2);
+
+    SELECT DATE(order_date), status INTO v_sale_date, v_status
+    FROM Orders WHERE order_id = NEW.order_id;
+
+    IF v_status != 'cancelled' THEN
+        SET v_revenue = NEW.quantity * NEW.price_at_purchase;
+        SELECT IFNULL(category_id, 0) INTO v_category_id
+        FROM Product WHERE product_id = NEW.product_id;
+
+        INSERT INTO Daily_Sales (sale_date, shard, units_sold)
+        VALUES (v_sale_date, NEW.order_id % 16, NEW.quantity)
+        ON DUPLICATE KEY UPDATE units_sold = units_sold + NEW.quantity;
+
+        INSERT INTO Daily_Product_Sales (sale_date, product_id, category_id, order_count, units_sold, revenue)
+        VALUES (v_sale_date, NEW.product_id, v_category_id, 1, NEW.quantity, v_revenue)
+        ON DUPLICATE KEY UPDATE
+            order_count = order_count + 1,
+            units_sold = units_sold + NEW.quantity,
+            revenue = revenue + v_revenue;
+
+        -- Count the order once per category, however many of its lines fall in it
+        SELECT IF(COUNT(*) = 0, 1, 0) INTO v_new_category
+        FROM Order_Item oi
+        JOIN Product p ON oi.product_id = p.product_id
+        WHERE oi.order_id = NEW.order_id
+          AND oi.order_item_id != NEW.order_item_id
+          AND IFNULL(p.category_id, 0) = v_category_id;
+
+        INSERT INTO Daily_Category_Sales (sale_date, category_id, shard, order_count, units_sold, revenue)
+        VALUES (v_sale_date, v_category_id, NEW.order_id % 16, v_new_category, NEW.quantity, v_revenue)
+        ON DUPLICATE KEY UPDATE
+            order_count = order_count + v_new_category,
+            units_sold = units_sold + NEW.quantity,
+            revenue = revenue + v_revenue;
+    END IF;
+END$$
+
+-- Trigger to take cancelled orders back out of the rollups, put reinstated ones back
+-- in, and track deliveries. Every change is a signed delta upserted into the order's
+-- shard, so it applies whether or not the shard row exists (e.g. after a rebuild).
+CREATE TRIGGER rollup_on_status_change
+AFTER UPDATE ON Orders
+FOR EACH ROW
+FOLLOWS restore_stock_on_cancel
+BEGIN
+    DECLARE v_sale_date DATE;
+    DECLARE v_shard TINYINT;
+    DECLARE v_sign INT DEFAULT 0;
+    DECLARE v_customer_change INT DEFAULT 0;
+    SET v_sale_date = DATE(OLD.order_date);
+    SET v_shard = OLD.order_id % 16;
+
+    IF NEW.status = 'cancelled' AND OLD.status != 'cancelled' THEN
+        SET v_sign = -1;
+    ELSEIF OLD.status = 'cancelled' AND NEW.status != 'cancelled' THEN
+        SET v_sign = 1;
+    END IF;
+
+    IF v_sign != 0 THEN
+        INSERT INTO Daily_Sales (sale_date, shard, total_orders, units_sold, total_revenue, delivered_orders)
+        SELECT v_sale_date, v_shard, v_sign, v_sign * IFNULL(SUM(quantity), 0),
+               v_sign * IF(v_sign < 0, OLD.total_amount, NEW.total_amount),
+               v_sign * IF(IF(v_sign < 0, OLD.status, NEW.status) = 'delivered', 1, 0)
+        FROM Order_Item
+        WHERE order_id = OLD.order_id
+        ON DUPLICATE KEY UPDATE
+            total_orders = total_orders + VALUES(total_orders),
+            units_sold = units_sold + VALUES(units_sold),
+            total_revenue = total_revenue + VALUES(total_revenue),
+            delivered_orders = delivered_orders + VALUES(delivered_orders);
+
+        IF OLD.customer_id IS NOT NULL THEN
+            IF v_sign < 0 THEN
+                UPDATE Daily_Sales_Customer
+                SET order_count = order_count - 1
+                WHERE sale_date = v_sale_date AND customer_id = OLD.customer_id;
+
+                DELETE FROM Daily_Sales_Customer
+                WHERE sale_date = v_sale_date AND customer_id = OLD.customer_id AND order_count <= 0;
+                SET v_customer_change = -ROW_COUNT();
+            ELSE
+                INSERT INTO Daily_Sales_Customer (sale_date, customer_id, order_count)
+                VALUES (v_sale_date, OLD.customer_id, 1)
+                ON DUPLICATE KEY UPDATE order_count = order_count + 1;
+                SET v_customer_change = IF(ROW_COUNT() = 1, 1, 0);
+            END IF;
+
+            IF v_customer_change != 0 THEN
+                INSERT INTO Daily_Sales (sale_date, shard, unique_customers)
+                VALUES (v_sale_date, v_shard, v_customer_change)
+                ON DUPLICATE KEY UPDATE unique_customers = unique_customers + VALUES(unique_customers);
+            END IF;
+        END IF;
+
+        -- Use the category recorded at sale time so the subtraction matches the addition
+        INSERT INTO Daily_Category_Sales (sale_date, category_id, shard, order_count, units_sold, revenue)
+        SELECT v_sale_date, x.category_id, v_shard, v_sign, v_sign * SUM(x.units), v_sign * SUM(x.revenue)
+        FROM (
+            SELECT IFNULL(dps.category_id, IFNULL(p.category_id, 0)) as category_id,
+                   oi.quantity as units,
+                   oi.quantity * oi.price_at_purchase as revenue
+            FROM Order_Item oi
+            JOIN Product p ON p.product_id = oi.product_id
+            LEFT JOIN Daily_Product_Sales dps ON dps.sale_date = v_sale_date AND dps.product_id = oi.product_id
+            WHERE oi.order_id = OLD.order_id
+        ) x
+        GROUP BY x.category_id
+        ON DUPLICATE KEY UPDATE
+            order_count = order_count + VALUES(order_count),
+            units_sold = units_sold + VALUES(units_sold),
+            revenue = revenue + VALUES(revenue);
+
+        INSERT INTO Daily_Product_Sales (sale_date, product_id, category_id, order_count, units_sold, revenue)
+        SELECT v_sale_date, oi.product_id, IFNULL(p.category_id, 0),
+               v_sign * COUNT(*), v_sign * SUM(oi.quantity), v_sign * SUM(oi.quantity * oi.price_at_purchase)
+        FROM Order_Item oi
+        JOIN Product p ON p.product_id = oi.product_id
+        WHERE oi.order_id = OLD.order_id
+        GROUP BY oi.product_id, IFNULL(p.category_id, 0)
+        ON DUPLICATE KEY UPDATE
+            order_count = order_count + VALUES(order_count),
+            units_sold = units_sold + VALUES(units_sold),
+            revenue = revenue + VALUES(revenue);
+    ELSEIF NEW.status != 'cancelled' AND OLD.status != 'cancelled'
+           AND (NEW.status = 'delivered') != (OLD.status = 'delivered') THEN
+        INSERT INTO Daily_Sales (sale_date, shard, delivered_orders)
+        VALUES (v_sale_date, v_shard, IF(NEW.status = 'delivered', 1, -1))
+        ON DUPLICATE KEY UPDATE delivered_orders = delivered_orders + VALUES(delivered_orders);
+    END IF;
+END$$
+
 DELIMITER ;
 
 -- Stored Procedures
@@ -333,6 +588,8 @@ BEGIN
 END$$
 
 -- Update stock
+-- Locks the product row once, so concurrent movements serialize and the ledger
+-- chains correctly. Call it with autocommit off and commit afterwards.
 CREATE PROCEDURE UpdateStock(
     IN p_product_id INT,
     IN p_quantity_change INT,
@@ -344,15 +601,25 @@ CREATE PROCEDURE UpdateStock(
 BEGIN
     DECLARE v_current_stock INT;
     
-    SELECT stock_quantity INTO v_current_stock FROM Product WHERE product_id = p_product_id;
+    SELECT stock_quantity INTO v_current_stock
+    FROM Product
+    WHERE product_id = p_product_id
+    FOR UPDATE;
+    
+    IF v_current_stock IS NULL THEN
+        SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = 'Product not found';
+    END IF;
+    IF v_current_stock + p_quantity_change < 0 THEN
+        SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = 'Insufficient stock';
+    END IF;
+    
+    SET p_new_stock = v_current_stock + p_quantity_change;
     
     UPDATE Product
-    SET stock_quantity = stock_quantity + p_quantity_change,
+    SET stock_quantity = p_new_stock,
         updated_at = CURRENT_TIMESTAMP
     WHERE product_id = p_product_id;
     
-    SELECT stock_quantity INTO p_new_stock FROM Product WHERE product_id = p_product_id;
-    
     -- Record inventory transaction
     INSERT INTO Inventory_Transaction (
         product_id, transaction_type, quantity_change,
@@ -384,46 +651,124 @@ BEGIN
     ORDER BY (p.min_stock_level - p.stock_quantity) DESC;
 END$$
 
--- Get sales report for date range
+-- Get sales report for date range (reads the daily rollup)
 CREATE PROCEDURE GetSalesReport(
     IN p_start_date DATE,
     IN p_end_date DATE
 )
 BEGIN
     SELECT 
-        DATE(o.order_date) as sale_date,
-        COUNT(o.order_id) as total_orders,
-        SUM(o.total_amount) as total_revenue,
-        AVG(o.total_amount) as average_order_value,
-        COUNT(DISTINCT o.customer_id) as unique_customers,
-        SUM(CASE WHEN o.status = 'delivered' THEN 1 ELSE 0 END) as delivered_orders
-    FROM Orders o
-    WHERE DATE(o.order_date) BETWEEN p_start_date AND p_end_date
-      AND o.status != 'cancelled'
-    GROUP BY DATE(o.order_date)
+        sale_date,
+        CAST(SUM(total_orders) AS SIGNED) as total_orders,
+        SUM(total_revenue) as total_revenue,
+        SUM(total_revenue) / NULLIF(SUM(total_orders), 0) as average_order_value,
+        CAST(SUM(unique_customers) AS SIGNED) as unique_customers,
+        CAST(SUM(delivered_orders) AS SIGNED) as delivered_orders
+    FROM Daily_Sales
+    WHERE sale_date BETWEEN p_start_date AND p_end_date
+    GROUP BY sale_date
+    HAVING SUM(total_orders) > 0
     ORDER BY sale_date;
 END$$
 
--- Get top selling products
+-- Get top selling products (reads the daily rollup)
 CREATE PROCEDURE GetTopSellingProducts(IN p_limit INT)
 BEGIN
     SELECT 
         p.product_id,
         p.name,
         c.category_name,
-        SUM(oi.quantity) as total_sold,
-        SUM(oi.subtotal) as total_revenue,
-        COUNT(DISTINCT oi.order_id) as order_count
-    FROM Product p
-    JOIN Order_Item oi ON p.product_id = oi.product_id
-    JOIN Orders o ON oi.order_id = o.order_id
+        SUM(d.units_sold) as total_sold,
+        SUM(d.revenue) as total_revenue,
+        SUM(d.order_count) as order_count
+    FROM Daily_Product_Sales d
+    JOIN Product p ON d.product_id = p.product_id
     JOIN Category c ON p.category_id = c.category_id
-    WHERE o.status != 'cancelled'
     GROUP BY p.product_id, p.name, c.category_name
+    HAVING total_sold > 0
     ORDER BY total_sold DESC
     LIMIT p_limit;
 END$$
 
+-- Rebuild the daily sales rollups from Orders/Order_Item (NULL dates = everything).
+-- Rebuilt days land in shard 0; triggers add later orders to their own shards.
+CREATE PROCEDURE RebuildSalesRollup(
+    IN p_start_date DATE,
+    IN p_end_date DATE
+)
+BEGIN
+    DECLARE v_start DATE;
+    DECLARE v_end DATE;
+    SET v_start = IFNULL(p_start_date, '1000-01-01');
+    SET v_end = IFNULL(p_end_date, '9999-12-30');
+
+    DELETE FROM Daily_Sales WHERE sale_date BETWEEN v_start AND v_end;
+    DELETE FROM Daily_Sales_Customer WHERE sale_date BETWEEN v_start AND v_end;
+    DELETE FROM Daily_Product_Sales WHERE sale_date BETWEEN v_start AND v_end;
+    DELETE FROM Daily_Category_Sales WHERE sale_date BETWEEN v_start AND v_end;
+
+    INSERT INTO Daily_Sales (sale_date, total_orders, total_revenue, unique_customers, delivered_orders)
+    SELECT 
+        DATE(o.order_date),
+        COUNT(*),
+        SUM(o.total_amount),
+        COUNT(DISTINCT o.customer_id),
+        SUM(CASE WHEN o.status = 'delivered' THEN 1 ELSE 0 END)
+    FROM Orders o
+    WHERE o.order_date >= v_start
+      AND o.order_date < v_end + INTERVAL 1 DAY
+      AND o.status IN ('pending', 'processing', 'shipped', 'delivered')
+    GROUP BY DATE(o.order_date);
+
+    INSERT INTO Daily_Sales_Customer (sale_date, customer_id, order_count)
+    SELECT DATE(o.order_date), o.customer_id, COUNT(*)
+    FROM Orders o
+    WHERE o.order_date >= v_start
+      AND o.order_date < v_end + INTERVAL 1 DAY
+      AND o.status IN ('pending', 'processing', 'shipped', 'delivered')
+      AND o.customer_id IS NOT NULL
+    GROUP BY DATE(o.order_date), o.customer_id;
+
+    INSERT INTO Daily_Product_Sales (sale_date, product_id, category_id, order_count, units_sold, revenue)
+    SELECT 
+        DATE(o.order_date),
+        oi.product_id,
+        IFNULL(p.category_id, 0),
+        COUNT(*),
+        SUM(oi.quantity),
+        SUM(oi.subtotal)
+    FROM Orders o
+    JOIN Order_Item oi ON oi.order_id = o.order_id
+    JOIN Product p ON p.product_id = oi.product_id
+    WHERE o.order_date >= v_start
+      AND o.order_date < v_end + INTERVAL 1 DAY
+      AND o.status IN ('pending', 'processing', 'shipped', 'delivered')
+    GROUP BY DATE(o.order_date), oi.product_id, IFNULL(p.category_id, 0);
+
+    INSERT INTO Daily_Category_Sales (sale_date, category_id, order_count, units_sold, revenue)
+    SELECT sale_date, category_id, COUNT(DISTINCT order_id), SUM(units), SUM(revenue)
+    FROM (
+        SELECT DATE(o.order_date) as sale_date, IFNULL(p.category_id, 0) as category_id,
+               o.order_id, oi.quantity as units, oi.subtotal as revenue
+        FROM Orders o
+        JOIN Order_Item oi ON oi.order_id = o.order_id
+        JOIN Product p ON p.product_id = oi.product_id
+        WHERE o.order_date >= v_start
+          AND o.order_date < v_end + INTERVAL 1 DAY
+          AND o.status IN ('pending', 'processing', 'shipped', 'delivered')
+    ) sold
+    GROUP BY sale_date, category_id;
+
+    UPDATE Daily_Sales ds
+    JOIN (
+        SELECT sale_date, SUM(units_sold) as units
+        FROM Daily_Product_Sales
+        WHERE sale_date BETWEEN v_start AND v_end
+        GROUP BY sale_date
+    ) x ON ds.sale_date = x.sale_date
+    SET ds.units_sold = x.units;
+END$$
+
 DELIMITER ;
 
 -- Functions
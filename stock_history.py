@@ -0,0 +1,300 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+from db_connection import get_connection
+from ledger_archive import archived_through, iter_archived_ledger
+
+# Ledger rows read per keyset query; a few MB of int64 arrays per chunk.
+LEDGER_CHUNK = 500000
+# The consistency checker keeps at most this many problem rows (counts are always exact).
+MAX_FLAGGED_ROWS = 10000
+
+def _begin_snapshot(conn):
+    """Starts a read-only transaction so every chunk sees the same ledger and Product rows."""
+    conn.start_transaction(consistent_snapshot=True, readonly=True)
+
+def iter_ledger(cursor, columns, where="1 = 1", params=(), start_after=0, stop_at=None, chunk_size=LEDGER_CHUNK):
+    """Yields Inventory_Transaction rows as int64 arrays, one column per array, in transaction_id order.
+
+    ``columns`` must all be integer columns and start with transaction_id.
+    Reads are keyset-paged on the primary key, so each query is a short
+    range scan and memory stays at one chunk however long the ledger is.
+    ``stop_at`` caps the id range, so a date-bounded read doesn't scan the
+    primary key on to the end of the table after its last match.
+    """
+    last_id = start_after
+    if stop_at is not None:
+        where, params = f"transaction_id <= %s AND {where}", (stop_at, *params)
+    while True:
+        cursor.execute(f"""
+            SELECT {', '.join(columns)}
+            FROM Inventory_Transaction
+            WHERE transaction_id > %s AND {where}
+            ORDER BY transaction_id
+            LIMIT {int(chunk_size)}
+        """, (last_id, *params))
+        rows = cursor.fetchall()
+        if not rows:
+            return
+        block = np.array(rows, dtype=np.int64)
+        yield tuple(block[:, i] for i in range(len(columns)))
+        if len(rows) < chunk_size:
+            return
+        last_id = int(block[-1, 0])
+
+def group_totals(product_ids, changes):
+    """Per-product sums of ``changes``: returns (unique product_ids, totals).
+
+    Sorts once by product_id, takes a running total, and differences it at
+    each product's last row, so there is no Python loop over products.
+    """
+    if len(product_ids) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    order = np.argsort(product_ids, kind="stable")
+    ids = product_ids[order]
+    running = np.cumsum(changes[order])
+    ends = np.flatnonzero(np.r_[ids[1:] != ids[:-1], True])
+    totals = np.diff(np.r_[0, running[ends]])
+    return ids[ends], totals
+
+def _first_id_after(cursor, moment):
+    """transaction_id just before the first row dated after ``moment`` (via idx_inventory_date)."""
+    cursor.execute("SELECT MIN(transaction_id) FROM Inventory_Transaction WHERE transaction_date > %s", (moment,))
+    first = cursor.fetchone()[0]
+    return None if first is None else first - 1
+
+def _replay(totals, product_ids, changes):
+    """Adds one chunk's per-product change totals into the dense ``totals`` array (grown as needed)."""
+    ids, sums = group_totals(product_ids, changes)
+    if len(ids) and ids[-1] >= len(totals):
+        totals = np.concatenate([totals, np.zeros(int(ids[-1]) + 1 - len(totals), dtype=np.int64)])
+    totals[ids] += sums
+    return totals
+
+def stock_at(moment, conn=None, on_progress=None):
+    """Stock of every product that existed at ``moment``, rebuilt by replaying the ledger backwards.
+
+    Starts from the earliest Stock_Snapshot on or after ``moment``'s day when
+    there is one, otherwise from current Product.stock_quantity, and
+    subtracts every ledger movement between ``moment`` and that starting
+    point. Archived months are read back from Parquet when the replay
+    reaches them. Everything is read in one consistent snapshot, so sales
+    committing meanwhile can't skew the result.
+
+    Returns a DataFrame (product_id, sku, name, stock_quantity).
+    """
+    if isinstance(moment, str):
+        moment = datetime.fromisoformat(moment)
+    own_conn = conn is None
+    conn = conn or get_connection()
+    cursor = conn.cursor()
+    try:
+        _begin_snapshot(conn)
+        cursor.execute("SELECT MIN(snapshot_date) FROM Stock_Snapshot WHERE snapshot_date >= %s", (moment.date(),))
+        base_day = cursor.fetchone()[0]
+        if base_day is not None:
+            # Closing stock of base_day = stock at the first instant of the next day
+            until = datetime.combine(base_day + timedelta(days=1), datetime.min.time())
+            cursor.execute("""
+                SELECT p.product_id, p.sku, p.name, s.stock_quantity
+                FROM Stock_Snapshot s
+                JOIN Product p ON p.product_id = s.product_id
+                WHERE s.snapshot_date = %s AND p.created_at <= %s
+            """, (base_day, moment))
+            where, params = "transaction_date > %s AND transaction_date < %s", (moment, until)
+        else:
+            until = None
+            cursor.execute("SELECT product_id, sku, name, stock_quantity FROM Product WHERE created_at <= %s", (moment,))
+            where, params = "transaction_date > %s", (moment,)
+        stock = pd.DataFrame(cursor.fetchall(), columns=["product_id", "sku", "name", "stock_quantity"])
+
+        totals = np.zeros(int(stock["product_id"].max()) + 1 if len(stock) else 1, dtype=np.int64)
+        archived = archived_through()
+        if archived is not None and moment.date() < archived:
+            # Streamed a Parquet batch at a time rather than loading every archived month at once
+            for old in iter_archived_ledger(moment.date(), until.date() if until else None,
+                                            columns=["product_id", "quantity_change", "transaction_date"]):
+                old = old[old["transaction_date"] > pd.Timestamp(moment)]
+                totals = _replay(totals, old["product_id"].to_numpy(np.int64),
+                                 old["quantity_change"].to_numpy(np.int64))
+
+        start_after = _first_id_after(cursor, moment)
+        stop_at = None
+        if until is not None:
+            # Highest id in the replayed date range, so paging stops there instead of at the table's end.
+            # Ids aren't in date order (a row's timestamp is taken when its statement starts), so this is
+            # the exact maximum over the range, still a range read on idx_inventory_date.
+            cursor.execute("SELECT MAX(transaction_id) FROM Inventory_Transaction "
+                           "WHERE transaction_date > %s AND transaction_date < %s", (moment, until))
+            stop_at = cursor.fetchone()[0]
+            if stop_at is None:
+                start_after = None  # no movements between moment and the snapshot
+        if start_after is not None:
+            replayed = 0
+            for _, product_ids, changes in iter_ledger(cursor, ["transaction_id", "product_id", "quantity_change"],
+                                                       where, params, start_after, stop_at):
+                totals = _replay(totals, product_ids, changes)
+                replayed += len(product_ids)
+                if on_progress:
+                    on_progress(replayed)
+        conn.commit()
+
+        ids = stock["product_id"].to_numpy(np.int64)
+        stock["stock_quantity"] = stock["stock_quantity"].to_numpy(np.int64) - totals[ids]
+        return stock
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        if own_conn:
+            conn.close()
+
+def stock_timeline(product_ids, since, conn=None):
+    """Stock after every ledger movement since ``since`` for the given products.
+
+    Rows are sorted by product and newest first, and a running total of
+    their changes is subtracted from current stock, giving each row's
+    stock_after as reconstructed from the present. Returns a DataFrame
+    (product_id, transaction_id, transaction_date, transaction_type,
+    quantity_change, stock_after) in date order. When ``since`` reaches
+    into archived months, their rows for these products are read back from
+    the ledger archive.
+    """
+    product_ids = [int(product_id) for product_id in product_ids]
+    columns = ["product_id", "transaction_id", "transaction_date", "transaction_type", "quantity_change", "stock_after"]
+    if not product_ids:
+        return pd.DataFrame(columns=columns)
+    placeholders = ", ".join(["%s"] * len(product_ids))
+    own_conn = conn is None
+    conn = conn or get_connection()
+    cursor = conn.cursor()
+    try:
+        _begin_snapshot(conn)
+        cursor.execute(f"SELECT product_id, stock_quantity FROM Product WHERE product_id IN ({placeholders})",
+                       product_ids)
+        current = dict(cursor.fetchall())
+        cursor.execute(f"""
+            SELECT product_id, transaction_id, transaction_date, transaction_type, quantity_change
+            FROM Inventory_Transaction
+            WHERE product_id IN ({placeholders}) AND transaction_date >= %s
+        """, (*product_ids, since))
+        ledger = pd.DataFrame(cursor.fetchall(), columns=columns[:-1])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        if own_conn:
+            conn.close()
+
+    archived = archived_through()
+    since_day = since.date() if isinstance(since, datetime) else since
+    if archived is not None and since_day < archived:
+        old = [batch[batch["product_id"].isin(product_ids)]
+               for batch in iter_archived_ledger(since, archived, columns=columns[:-1])]
+        ledger = pd.concat([*old, ledger], ignore_index=True)
+
+    if ledger.empty:
+        return pd.DataFrame(columns=columns)
+    ledger = ledger.sort_values(["product_id", "transaction_id"], ascending=[True, False], ignore_index=True)
+    ids = ledger["product_id"].to_numpy(np.int64)
+    changes = ledger["quantity_change"].to_numpy(np.int64)
+    # Changes made after each row: running total within the product, excluding the row itself
+    running = np.cumsum(changes)
+    starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+    before_group = np.repeat(running[starts] - changes[starts], np.diff(np.r_[starts, len(ids)]))
+    later = running - changes - before_group
+    ledger["stock_after"] = ledger["product_id"].map(current).fillna(0).to_numpy(np.int64) - later
+    return ledger.sort_values(["transaction_date", "transaction_id"], ignore_index=True)
+
+def check_ledger_chain(conn=None, on_progress=None, chunk_size=LEDGER_CHUNK, max_rows=MAX_FLAGGED_ROWS):
+    """Scans the whole ledger and flags rows whose stock figures don't add up.
+
+    Three problems are reported:
+
+    * ``arithmetic``: stock_after != stock_before + quantity_change.
+    * ``chain``: stock_before differs from the same product's previous stock_after.
+    * ``drift``: a product's last stock_after differs from Product.stock_quantity.
+
+    The ledger is streamed in transaction_id order with the last stock_after
+    per product carried between chunks in a dense array, so a 50M-row
+    ledger needs one sequential pass and a few MB per chunk. The first
+    online row of each product has nothing to chain from (its history may
+    be archived) and is not checked. Returns (summary dict, DataFrame of at
+    most ``max_rows`` flagged rows).
+    """
+    own_conn = conn is None
+    conn = conn or get_connection()
+    cursor = conn.cursor()
+    flagged = []
+    counts = {"rows": 0, "arithmetic": 0, "chain": 0, "drift": 0}
+
+    def flag(problem, transaction_ids, product_ids, before, after, expected):
+        counts[problem] += len(transaction_ids)
+        room = max_rows - sum(len(frame) for frame in flagged)
+        if room > 0 and len(transaction_ids):
+            flagged.append(pd.DataFrame({
+                "problem": problem, "transaction_id": transaction_ids[:room], "product_id": product_ids[:room],
+                "stock_before": before[:room], "stock_after": after[:room], "expected": expected[:room],
+            }))
+
+    try:
+        _begin_snapshot(conn)
+        cursor.execute("SELECT COALESCE(MAX(transaction_id), 0) FROM Inventory_Transaction")
+        max_id = cursor.fetchone()[0]
+        cursor.execute("SELECT COALESCE(MAX(product_id), 0) FROM Product")
+        size = cursor.fetchone()[0] + 1
+        last_after = np.zeros(size, dtype=np.int64)
+        last_id = np.zeros(size, dtype=np.int64)  # 0 = no row seen yet
+
+        for tids, pids, changes, before, after in iter_ledger(
+                cursor, ["transaction_id", "product_id", "quantity_change", "stock_before", "stock_after"],
+                chunk_size=chunk_size):
+            counts["rows"] += len(tids)
+            if pids.max() >= len(last_after):
+                grow = int(pids.max()) + 1 - len(last_after)
+                last_after = np.concatenate([last_after, np.zeros(grow, dtype=np.int64)])
+                last_id = np.concatenate([last_id, np.zeros(grow, dtype=np.int64)])
+
+            bad = after != before + changes
+            flag("arithmetic", tids[bad], pids[bad], before[bad], after[bad], (before + changes)[bad])
+
+            # Stable sort keeps each product's rows in transaction_id order
+            order = np.argsort(pids, kind="stable")
+            s_tid, s_pid, s_before, s_after = tids[order], pids[order], before[order], after[order]
+            first = np.r_[True, s_pid[1:] != s_pid[:-1]]
+            previous = np.roll(s_after, 1)
+            previous[first] = last_after[s_pid[first]]
+            checked = ~first | (last_id[s_pid] > 0)
+            broken = checked & (s_before != previous)
+            flag("chain", s_tid[broken], s_pid[broken], s_before[broken], s_after[broken], previous[broken])
+
+            last = np.r_[s_pid[1:] != s_pid[:-1], True]
+            last_after[s_pid[last]] = s_after[last]
+            last_id[s_pid[last]] = s_tid[last]
+            if on_progress:
+                on_progress(int(tids[-1]), int(max_id))
+
+        cursor.execute("SELECT product_id, stock_quantity FROM Product")
+        products = np.array(cursor.fetchall(), dtype=np.int64).reshape(-1, 2)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        if own_conn:
+            conn.close()
+
+    pids, stock = products[:, 0], products[:, 1]
+    seen = last_id[pids] > 0
+    drifted = seen & (last_after[pids] != stock)
+    flag("drift", last_id[pids][drifted], pids[drifted], last_after[pids][drifted], last_after[pids][drifted],
+         stock[drifted])
+
+    columns = ["problem", "transaction_id", "product_id", "stock_before", "stock_after", "expected"]
+    report = pd.concat(flagged, ignore_index=True) if flagged else pd.DataFrame(columns=columns)
+    return counts, report
@@ -0,0 +1,86 @@
+import mysql.connector
+from db_connection import get_connection
+from query_cache import invalidate_tables
+
+TRANSACTION_TYPES = ("purchase", "sale", "adjustment", "return", "damage")
+
+def _error_message(err):
+    # SIGNALs raised by UpdateStock carry a user-facing message
+    if getattr(err, "sqlstate", None) == "45000":
+        return err.msg
+    return f"Stock update failed: {err}"
+
+def _call_update_stock(cursor, product_id, quantity_change, transaction_type, notes, user_id):
+    # Ids often arrive as NumPy integers from DataFrames, which the driver can't bind
+    args = cursor.callproc("UpdateStock", (int(product_id), int(quantity_change), transaction_type, notes, user_id, 0))
+    for result in cursor.stored_results():
+        result.fetchall()
+    return args[5]
+
+def move_stock(product_id, quantity_change, transaction_type, notes=None, user_id=None):
+    """Applies one stock movement atomically through the UpdateStock procedure.
+
+    The product row is locked for the whole movement, so concurrent checkouts
+    and adjustments can't lose updates or write ledger rows with a stale
+    stock_before. Movements that would take stock below zero are rejected.
+
+    Returns (True, new_stock) or (False, message).
+    """
+    if transaction_type not in TRANSACTION_TYPES:
+        return False, f"Unknown transaction type: {transaction_type}"
+
+    conn = None
+    cursor = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        new_stock = _call_update_stock(cursor, product_id, quantity_change, transaction_type, notes, user_id)
+        conn.commit()
+        invalidate_tables("Product", "Inventory_Transaction")
+        return True, new_stock
+    except mysql.connector.Error as err:
+        if conn:
+            conn.rollback()
+        return False, _error_message(err)
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+def set_stock_level(product_id, target_stock, notes=None, user_id=None):
+    """Sets stock to an absolute level, logging the difference as an adjustment.
+
+    The delta is computed from the locked current stock, not from a value the
+    caller read earlier. Returns (True, new_stock) or (False, message).
+    """
+    if target_stock < 0:
+        return False, "Stock cannot be negative"
+
+    conn = None
+    cursor = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        conn.start_transaction()
+        cursor.execute("SELECT stock_quantity FROM Product WHERE product_id = %s FOR UPDATE", (int(product_id),))
+        row = cursor.fetchone()
+        if row is None:
+            conn.rollback()
+            return False, "Product not found"
+        delta = target_stock - row[0]
+        new_stock = row[0]
+        if delta:
+            new_stock = _call_update_stock(cursor, product_id, delta, "adjustment", notes, user_id)
+        conn.commit()
+        invalidate_tables("Product", "Inventory_Transaction")
+        return True, new_stock
+    except mysql.connector.Error as err:
+        if conn:
+            conn.rollback()
+        return False, _error_message(err)
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
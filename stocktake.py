@@ -0,0 +1,137 @@
+import mysql.connector
+import pandas as pd
+from db_connection import get_connection
+from query_cache import invalidate_tables
+
+def normalize_counts(counts):
+    """Cleans a count sheet into one (sku, counted_quantity) row per SKU.
+
+    Counts for the same SKU (e.g. from two shelf locations) are summed.
+    Returns (counts DataFrame, list of error strings).
+    """
+    counts = counts.rename(columns=lambda c: str(c).strip().lower())
+    missing = [c for c in ("sku", "counted_quantity") if c not in counts.columns]
+    if missing:
+        return pd.DataFrame(columns=["sku", "counted_quantity"]), [f"Missing column(s): {', '.join(missing)}"]
+
+    sku = counts["sku"].fillna("").astype(str).str.strip()
+    quantity = pd.to_numeric(counts["counted_quantity"], errors="coerce")
+    bad = (sku == "") | quantity.isna() | (quantity < 0) | (quantity % 1 != 0)
+
+    errors = [f"Line {i + 2}: needs a SKU and a whole counted_quantity >= 0" for i in counts.index[bad]]
+    clean = pd.DataFrame({"sku": sku[~bad], "counted_quantity": quantity[~bad].astype(int)})
+    clean = clean.groupby("sku", as_index=False)["counted_quantity"].sum()
+    return clean, errors
+
+def _load_counts(cursor, counts):
+    """Loads the counts into a per-connection temporary table with one multi-row INSERT."""
+    cursor.execute("DROP TEMPORARY TABLE IF EXISTS Stocktake_Count")
+    cursor.execute("""
+        CREATE TEMPORARY TABLE Stocktake_Count (
+            sku VARCHAR(100) PRIMARY KEY,
+            counted_quantity INT NOT NULL
+        )
+    """)
+    rows = list(zip(counts["sku"].tolist(), (int(q) for q in counts["counted_quantity"])))
+    for start in range(0, len(rows), 10000):
+        cursor.executemany("INSERT INTO Stocktake_Count (sku, counted_quantity) VALUES (%s, %s)",
+                           rows[start:start + 10000])
+
+def _unknown_skus(cursor):
+    cursor.execute("""
+        SELECT t.sku
+        FROM Stocktake_Count t
+        LEFT JOIN Product p ON p.sku = t.sku
+        WHERE p.product_id IS NULL
+    """)
+    return [row[0] for row in cursor.fetchall()]
+
+def preview_stocktake(counts):
+    """Returns (True, DataFrame of SKUs whose count differs from the system, unknown SKUs) or (False, message, [])."""
+    conn = None
+    cursor = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        _load_counts(cursor, counts)
+        cursor.execute("""
+            SELECT p.sku, p.name, p.stock_quantity AS system_quantity, t.counted_quantity,
+                   t.counted_quantity - p.stock_quantity AS delta
+            FROM Stocktake_Count t
+            JOIN Product p ON p.sku = t.sku
+            WHERE t.counted_quantity <> p.stock_quantity
+            ORDER BY ABS(t.counted_quantity - p.stock_quantity) DESC
+        """)
+        diff = pd.DataFrame(cursor.fetchall(), columns=["sku", "name", "system_quantity", "counted_quantity", "delta"])
+        unknown = _unknown_skus(cursor)
+        cursor.execute("DROP TEMPORARY TABLE IF EXISTS Stocktake_Count")
+        return True, diff, unknown
+    except mysql.connector.Error as err:
+        return False, f"Stocktake preview failed: {err}", []
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+def apply_stocktake(counts, notes="", user_id=None):
+    """Sets stock to the counted quantities in one transaction.
+
+    Deltas are computed in SQL against the locked current stock, not against
+    whatever the admin saw on screen, and every changed SKU gets an
+    'adjustment' Inventory_Transaction row with the true stock_before and
+    stock_after from a single INSERT ... SELECT.
+
+    Returns (success, message, unknown SKUs).
+    """
+    conn = None
+    cursor = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        conn.start_transaction()
+        _load_counts(cursor, counts)
+
+        # Lock every counted product so no sale slips in between the ledger and the update
+        cursor.execute("""
+            SELECT p.product_id
+            FROM Product p
+            JOIN Stocktake_Count t ON p.sku = t.sku
+            ORDER BY p.product_id
+            FOR UPDATE
+        """)
+        cursor.fetchall()
+
+        cursor.execute("""
+            INSERT INTO Inventory_Transaction
+                (product_id, transaction_type, quantity_change, reference_type, notes, created_by,
+                 stock_before, stock_after)
+            SELECT p.product_id, 'adjustment', t.counted_quantity - p.stock_quantity, 'manual', %s, %s,
+                   p.stock_quantity, t.counted_quantity
+            FROM Product p
+            JOIN Stocktake_Count t ON p.sku = t.sku
+            WHERE t.counted_quantity <> p.stock_quantity
+        """, (f"Stocktake: {notes}" if notes else "Stocktake", user_id))
+        adjusted = cursor.rowcount
+
+        cursor.execute("""
+            UPDATE Product p
+            JOIN Stocktake_Count t ON p.sku = t.sku
+            SET p.stock_quantity = t.counted_quantity
+            WHERE p.stock_quantity <> t.counted_quantity
+        """)
+
+        unknown = _unknown_skus(cursor)
+        conn.commit()
+        cursor.execute("DROP TEMPORARY TABLE IF EXISTS Stocktake_Count")
+        invalidate_tables("Product", "Inventory_Transaction")
+        return True, f"Stocktake applied: {adjusted:,} of {len(counts):,} SKUs adjusted.", unknown
+    except mysql.connector.Error as err:
+        if conn:
+            conn.rollback()
+        return False, f"Stocktake failed: {err}", []
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
@@ -1,9 +1,12 @@
 import streamlit as st
 import pandas as pd
 import mysql.connector
-from db_connection import get_cursor, get_connection
+from db_connection import get_cursor, get_connection, fetch_rows, execute_query, ResultSet
+from cart_store import add_item
+from image_cache import show_image, encode_base64
+from query_stats import record_query
 import os
-import base64
+import time
 
 def _to_native(value):
     try:
@@ -20,69 +23,36 @@ def _normalize_params(params):
         return params
 
 def fetch_data(query, params=None):
-    """Fetches data from the database using the given query."""
-    conn = None
-    cursor = None
-    try:
-        conn = get_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query, _normalize_params(params))
-        data = cursor.fetchall()
-        return pd.DataFrame(data) if data else pd.DataFrame()
-    except mysql.connector.Error as err:
-        st.error(f"Database error: {err}")
-        return pd.DataFrame()
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
-
-def execute_query(query, params=(), fetch_one=False, fetch_all=False):
-    """Execute a SQL query with proper error handling."""
-    conn = None
-    cursor = None
-    try:
-        conn = get_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query, params)
-        conn.commit()
-        
-        if fetch_one:
-            return cursor.fetchone()
-        elif fetch_all:
-            return cursor.fetchall()
-        return None  # For INSERT, UPDATE, DELETE
-    except mysql.connector.Error as err:
-        st.error(f"Database error: {err}")
-        if conn:
-            conn.rollback()
-        return None
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+    """Fetches data from the database using the given query (replica when available)."""
+    return fetch_rows(query, _normalize_params(params)).to_df()
 
 def call_procedure(procedure_name, params=()):
     """Calls a stored procedure."""
     conn = None
     cursor = None
+    frames = []
+    error = False
+    start = time.perf_counter()
+    acquire_time = 0.0
     try:
         conn = get_connection()
-        cursor = conn.cursor(dictionary=True)
+        acquire_time = time.perf_counter() - start
+        cursor = conn.cursor()
         cursor.callproc(procedure_name, params)
         
         # Get results
-        results = []
         for result in cursor.stored_results():
-            results.extend(result.fetchall())
+            frames.append(ResultSet(result.column_names, result.fetchall()).to_df())
         
-        return pd.DataFrame(results) if results else pd.DataFrame()
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
     except mysql.connector.Error as err:
+        error = True
         st.error(f"Procedure error: {err}")
         return pd.DataFrame()
     finally:
+        if conn:
+            record_query(f"CALL {procedure_name}", params, time.perf_counter() - start - acquire_time,
+                         sum(len(frame) for frame in frames), acquire_time, error=error)
         if cursor:
             cursor.close()
         if conn:
@@ -93,7 +63,7 @@ def display_product_card(product):
     col1, col2 = st.columns([1, 2])
     with col1:
         if product.get('image_url'):
-            st.image(product['image_url'], width=150)
+            show_image(product['image_url'], 150)
         else:
             st.image("https://via.placeholder.com/150", width=150)
     
@@ -104,29 +74,14 @@ def display_product_card(product):
         st.write(f"**Stock:** {product['stock_quantity']} units")
         
         if st.button(f"Add to Cart - {product['name']}", key=f"cart_{product['product_id']}"):
-            if 'cart' not in st.session_state:
-                st.session_state.cart = []
-            
-            # Check if product already in cart
-            for item in st.session_state.cart:
-                if item['product_id'] == product['product_id']:
-                    item['quantity'] += 1
-                    st.success(f"Added another {product['name']} to cart!")
-                    return
-            
-            # Add new item to cart
-            st.session_state.cart.append({
-                'product_id': product['product_id'],
-                'name': product['name'],
-                'price': product['price'],
-                'quantity': 1
-            })
-            st.success(f"Added {product['name']} to cart!")
+            if add_item(product['product_id'], product['name'], product['price']) > 1:
+                st.success(f"Added another {product['name']} to cart!")
+            else:
+                st.success(f"Added {product['name']} to cart!")
 
 def get_image_as_base64(image_path):
-    """Convert image to base64 for embedding in HTML."""
+    """Convert image to base64 for embedding in HTML (memoized per file version)."""
     try:
-        with open(image_path, "rb") as image_file:
-            return base64.b64encode(image_file.read()).decode()
+        return encode_base64(image_path)
     except FileNotFoundError:
         return None